@@ -11,5 +11,11 @@
 #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
 from netif import getifinfo, getifaddrs, getifindexes
+from netif import queryifinfo, queryifaddrs, queryifindexes
+from netif import getiflinkinfo, queryiflinkinfo
+from netif import getifsnapshot, invalidateifsnapshot, getifmulticast
+from ifquery import IFQuery
+from ifflags import IFFlags
 from ip import ip, ipnet, guessIPFamily
+from linkaddr import mac, MACAddress
 
@@ -0,0 +1,304 @@
+#!/usr/bin/env python
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+##~ Copyright (C) 2002-2007  TechGame Networks, LLC.              ##
+##~                                                               ##
+##~ This library is free software; you can redistribute it        ##
+##~ and/or modify it under the terms of the BSD style License as  ##
+##~ found in the LICENSE file included with this distribution.    ##
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+
+"""Memory footprint of the package's data structures.
+
+measure() walks an object graph -- containers, instance dicts and slots --
+adding up sys.getsizeof() of every object reachable from it, each counted
+once however often it is shared.  Classes, modules and functions are not
+followed, so class level caches such as the netmask tables are excluded.
+
+Run as a script for a benchmark of allocation counts and peak RSS over
+representative workloads.
+"""
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Imports
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+import os
+import sys
+import types
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Constants / Variables / Etc.
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+_notFollowed = (type, types.ClassType, types.ModuleType, types.FunctionType,
+        types.BuiltinFunctionType, types.MethodType, property, staticmethod,
+        classmethod)
+_leafTypes = (str, unicode, int, long, float, bool, complex, type(None))
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Definitions
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def _slotNames(klass):
+    names = []
+    for base in klass.__mro__:
+        slots = base.__dict__.get('__slots__', ())
+        if isinstance(slots, basestring):
+            slots = (slots,)
+        names.extend(s for s in slots if s not in ('__dict__', '__weakref__'))
+    return names
+
+_slotNamesCache = {}
+def _referents(obj):
+    if isinstance(obj, dict):
+        for k, v in obj.iteritems():
+            yield k
+            yield v
+        return
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        for each in obj:
+            yield each
+        return
+
+    klass = type(obj)
+    slots = _slotNamesCache.get(klass)
+    if slots is None:
+        slots = _slotNamesCache[klass] = _slotNames(klass)
+    for name in slots:
+        value = getattr(obj, name, None)
+        if value is not None:
+            yield value
+    ns = getattr(obj, '__dict__', None)
+    if isinstance(ns, dict):
+        yield ns
+
+class Footprint(object):
+    """Deep size of an object graph, with a breakdown by type"""
+
+    def __init__(self):
+        self.total = 0
+        self.objects = 0
+        self.byType = {}
+
+    def __repr__(self):
+        return '<%s %d bytes in %d objects>' % (self.__class__.__name__, self.total, self.objects)
+
+    def add(self, obj, size):
+        self.total += size
+        self.objects += 1
+        name = type(obj).__name__
+        count, nbytes = self.byType.get(name, (0, 0))
+        self.byType[name] = (count + 1, nbytes + size)
+
+    def perItem(self, count):
+        if not count:
+            return 0.
+        return float(self.total) / count
+
+    def report(self, count=None, top=8):
+        lines = ['%d bytes in %d objects' % (self.total, self.objects)]
+        if count:
+            lines[0] += ', %.1f bytes per item' % (self.perItem(count),)
+        ranked = sorted(self.byType.iteritems(), key=lambda e: -e[1][1])
+        for name, (n, nbytes) in ranked[:top]:
+            lines.append('  %-16s %9d objects %12d bytes' % (name, n, nbytes))
+        return '\n'.join(lines)
+
+def measure(*objs, **kw):
+    """Footprint of everything reachable from objs.
+
+    Objects whose ids are in the optional exclude set are neither counted
+    nor followed -- e.g. pass an index's shared entries to size only the
+    index itself.
+    """
+    result = Footprint()
+    seen = set(kw.pop('exclude', ()))
+    getsizeof = sys.getsizeof
+    stack = list(objs)
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, _notFollowed):
+            continue
+        seen.add(id(obj))
+        result.add(obj, getsizeof(obj))
+        if not isinstance(obj, _leafTypes):
+            stack.extend(_referents(obj))
+    return result
+
+def sizeOf(*objs, **kw):
+    """Deep size of objs in bytes"""
+    return measure(*objs, **kw).total
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Benchmark
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def peakRSS():
+    """Peak resident set size of this process in bytes, or None"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        return peak
+    return peak * 1024
+
+def trackedObjects():
+    import gc
+    gc.collect()
+    return len(gc.get_objects())
+
+class WorkloadStats(object):
+    """Measurements of one workload, as returned from its child process"""
+
+    def __init__(self, name, count, allocated, rssBefore, rssAfter, footprint, maxBytesPerItem=None):
+        self.name = name
+        self.count = count
+        self.allocated = allocated
+        self.rssBefore = rssBefore
+        self.rssAfter = rssAfter
+        self.footprint = footprint
+        self.maxBytesPerItem = maxBytesPerItem
+
+    def __repr__(self):
+        return '<%s %s: %.1f bytes per item>' % (self.__class__.__name__,
+                self.name, self.bytesPerItem())
+
+    def bytesPerItem(self):
+        return self.footprint.perItem(self.count)
+
+    def isOverBudget(self):
+        if self.maxBytesPerItem is None:
+            return False
+        return self.bytesPerItem() > self.maxBytesPerItem
+
+    def report(self):
+        count = self.count
+        lines = ['%s (%d items):' % (self.name, count)]
+        lines.append('  %d gc tracked objects allocated, %.1f per item' % (
+                self.allocated, float(self.allocated)/count))
+        if self.rssBefore is not None:
+            lines.append('  peak RSS %.1f MB (+%.1f MB)' % (self.rssAfter/1048576.,
+                    (self.rssAfter - self.rssBefore)/1048576.))
+        lines.append('  ' + self.footprint.report(count).replace('\n', '\n  '))
+        if self.isOverBudget():
+            lines.append('  OVER BUDGET: %.1f bytes per item, limit %d' % (
+                    self.bytesPerItem(), self.maxBytesPerItem))
+        return '\n'.join(lines)
+
+def measureWorkload(name, count, fn, maxBytesPerItem=None):
+    """Runs fn() in this process and returns its WorkloadStats"""
+    objectsBefore, rssBefore = trackedObjects(), peakRSS()
+    result = fn()
+    allocated = trackedObjects() - objectsBefore
+    rssAfter = peakRSS()
+    return WorkloadStats(name, count, allocated, rssBefore, rssAfter,
+                measure(result), maxBytesPerItem)
+
+def _workloadChild(conn, args):
+    try:
+        conn.send(measureWorkload(*args))
+    finally:
+        conn.close()
+
+def runWorkload(name, count, fn, maxBytesPerItem=None):
+    """Measures fn() in a forked child and prints its WorkloadStats.
+
+    ru_maxrss is a high-water mark for the whole process, so each workload
+    gets a fresh child; its RSS before fn() is the memory inherited at the
+    fork.  fn need not be picklable, but where processes are spawned
+    rather than forked the workload runs in this process instead.
+    """
+    import multiprocessing
+    args = (name, count, fn, maxBytesPerItem)
+    if not hasattr(os, 'fork'):
+        stats = measureWorkload(*args)
+    else:
+        recvConn, sendConn = multiprocessing.Pipe(False)
+        child = multiprocessing.Process(target=_workloadChild, args=(sendConn, args))
+        child.start()
+        sendConn.close()
+        try:
+            stats = recvConn.recv()
+        except EOFError:
+            stats = None
+        recvConn.close()
+        child.join()
+        if stats is None:
+            raise RuntimeError('Workload %r failed in its child process (exit code %s)' % (
+                    name, child.exitcode))
+
+    print stats.report()
+    print
+    return stats
+
+def _syntheticIFInfo(count):
+    from ip import IPNetv4, IPNetv6
+    from ifflags import IFFlags
+    flags = IFFlags(0x1043)
+    ifinfo = []
+    for i in xrange(count):
+        name = 'veth%d' % (i,)
+        entries = [
+            {'name': name, 'if_index': i+1, 'desc': '', 'flags': flags,
+                'addrs': [IPNetv4.fromNumber((10 << 24) | i, 24)]},
+            {'name': name, 'if_index': i+1, 'desc': '', 'flags': flags,
+                'addrs': [IPNetv6.fromNumber((0xfd00 << 112) | i, 64)]},
+            ]
+        ifinfo.append((name, entries))
+    return ifinfo
+
+# Bytes per item each benchmark workload must stay under; the headroom over
+# what CPython 2.7 on x64 measures is for allocator and platform variation
+budgets = {
+    'parsed IPv4 addresses': 512,
+    'parsed IPv4 addresses, as integers': 48,
+    'IPNetv4 list': 1280,
+    'interface snapshot': 4608,
+    'prefix table': 384,
+    }
+
+def benchmark(addressCount=1000000, interfaceCount=10000):
+    """Runs the workloads, returning the WorkloadStats of any over budget"""
+    import random
+    from ip import asIP, IPNetv4
+    from ifsnapshot import IFSnapshot
+    from routes import Route, RouteTable
+    from socket import AF_INET
+
+    texts = ['10.%d.%d.%d' % (random.randrange(256), random.randrange(256), random.randrange(256))
+                for i in xrange(addressCount)]
+    workloads = []
+    def add(name, count, fn):
+        workloads.append(runWorkload(name, count, fn, budgets.get(name)))
+
+    add('parsed IPv4 addresses', addressCount, lambda: [asIP(t) for t in texts])
+    add('parsed IPv4 addresses, as integers', addressCount,
+            lambda: [long(asIP(t)) for t in texts])
+    texts = None
+
+    netCount = addressCount // 10
+    add('IPNetv4 list', netCount,
+            lambda: [IPNetv4.fromNumber(random.getrandbits(32), 24) for i in xrange(netCount)])
+
+    add('interface snapshot', interfaceCount,
+            lambda: IFSnapshot(_syntheticIFInfo(interfaceCount)))
+
+    routeCount = addressCount // 10
+    add('prefix table', routeCount,
+            lambda: RouteTable(Route(AF_INET, random.getrandbits(24) << 8, 24, 0, 'eth0')
+                                for i in xrange(routeCount)))
+    return [stats for stats in workloads if stats.isOverBudget()]
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Main
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+if __name__=='__main__':
+    args = [int(a) for a in sys.argv[1:3]]
+    overBudget = benchmark(*args)
+    for stats in overBudget:
+        print 'over budget: %s' % (stats,)
+    sys.exit(overBudget and 1 or 0)
+
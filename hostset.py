@@ -0,0 +1,367 @@
+#!/usr/bin/env python
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+##~ Copyright (C) 2002-2007  TechGame Networks, LLC.              ##
+##~                                                               ##
+##~ This library is free software; you can redistribute it        ##
+##~ and/or modify it under the terms of the BSD style License as  ##
+##~ found in the LICENSE file included with this distribution.    ##
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+
+"""Compact exact-match sets of host addresses, such as deny lists.
+
+Hosts are kept in open addressing hash tables laid out in integer arrays
+(4 bytes a slot for IPv4, 16 for IPv6) instead of as IP objects.  An
+optional Bloom filter answers most misses before the table is probed.
+Entries shorter than a host route go to a small per prefix length index,
+in the same way RouteTable indexes routes.
+"""
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Imports
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+import array
+from socket import AF_INET, AF_INET6
+
+from ip import asIP, asIPNet, IPBase, IPNetBase
+from ipbulk import parseTexts, _code32, _words64
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Constants / Variables / Etc.
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+_bitsByFamily = {AF_INET: 32, AF_INET6: 128}
+
+_mask32 = (1L<<32) - 1
+_mask64 = (1L<<64) - 1
+_golden64 = 0x9E3779B97F4A7C15
+_mix64 = 0xC2B2AE3D27D4EB4F
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Definitions
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def _hash64(n):
+    # fold to 64 bits and scramble; the table uses the top bits
+    return (((n ^ (n >> 64)) & _mask64) * _golden64) & _mask64
+
+class BloomFilter(object):
+    """Bit array Bloom filter over 64 bit hashes, using double hashing"""
+
+    def __init__(self, nbits, nhashes=3):
+        self.nbits = max(nbits, 8)
+        self.nhashes = nhashes
+        self.bits = bytearray((self.nbits + 7) >> 3)
+
+    def _positions(self, h):
+        h1 = h & _mask32
+        h2 = ((h * _mix64) >> 32 & _mask32) | 1
+        nbits = self.nbits
+        return [(h1 + i*h2) % nbits for i in xrange(self.nhashes)]
+
+    def add(self, h):
+        bits = self.bits
+        for p in self._positions(h):
+            bits[p >> 3] |= 1 << (p & 7)
+
+    def mightContain(self, h):
+        bits = self.bits
+        for p in self._positions(h):
+            if not (bits[p >> 3] & (1 << (p & 7))):
+                return False
+        return True
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class _HostTable(object):
+    """Linear probing table of address integers; slot value 0 is empty, so
+    the all zeros address is tracked by a flag of its own"""
+
+    maxLoad = 0.5
+
+    def __init__(self, capacity=16):
+        self.count = 0
+        self.hasZero = False
+        self._allocate(capacity)
+
+    def __len__(self):
+        return self.count + self.hasZero
+
+    def _allocate(self, capacity):
+        capBits = 4
+        while (1 << capBits) * self.maxLoad < capacity:
+            capBits += 1
+        self.capBits = capBits
+        self.capacity = 1 << capBits
+        self.shift = 64 - capBits
+        self._newSlots()
+
+    def _slotOf(self, n):
+        return _hash64(n) >> self.shift
+
+    def reserve(self, count):
+        if (self.count + count) > self.capacity * self.maxLoad:
+            existing = list(self.iterNumbers(False))
+            self._allocate(self.count + count)
+            self.count = 0
+            for n in existing:
+                self._insert(n)
+
+    def add(self, n):
+        if n == 0:
+            added = not self.hasZero
+            self.hasZero = True
+            return added
+        self.reserve(1)
+        return self._insert(n)
+
+    def __contains__(self, n):
+        if n == 0:
+            return self.hasZero
+        return self._find(n)
+
+    def iterNumbers(self, includeZero=True):
+        if includeZero and self.hasZero:
+            yield 0
+        for n in self._iterSlots():
+            if n:
+                yield n
+
+class _HostTable32(_HostTable):
+    def _newSlots(self):
+        self.slots = array.array(_code32, [0]) * self.capacity
+
+    def _iterSlots(self):
+        return iter(self.slots)
+
+    def _insert(self, n):
+        slots, mask = self.slots, self.capacity - 1
+        i = self._slotOf(n)
+        while True:
+            v = slots[i]
+            if v == 0:
+                slots[i] = n
+                self.count += 1
+                return True
+            elif v == n:
+                return False
+            i = (i + 1) & mask
+
+    def _find(self, n):
+        slots, mask = self.slots, self.capacity - 1
+        i = self._slotOf(n)
+        while True:
+            v = slots[i]
+            if v == n:
+                return True
+            elif v == 0:
+                return False
+            i = (i + 1) & mask
+
+class _HostTable128(_HostTable):
+    def _newSlots(self):
+        words = _words64()
+        words.extend([0]*self.capacity)
+        self.hi = words
+        self.lo = words[:]
+
+    def _iterSlots(self):
+        for hi, lo in zip(self.hi, self.lo):
+            yield (hi << 64) | lo
+
+    def _insert(self, n):
+        his, los, mask = self.hi, self.lo, self.capacity - 1
+        hi, lo = n >> 64, n & _mask64
+        i = self._slotOf(n)
+        while True:
+            h, l = his[i], los[i]
+            if h == 0 and l == 0:
+                his[i], los[i] = hi, lo
+                self.count += 1
+                return True
+            elif h == hi and l == lo:
+                return False
+            i = (i + 1) & mask
+
+    def _find(self, n):
+        his, los, mask = self.hi, self.lo, self.capacity - 1
+        hi, lo = n >> 64, n & _mask64
+        i = self._slotOf(n)
+        while True:
+            h, l = his[i], los[i]
+            if h == hi and l == lo:
+                return True
+            elif h == 0 and l == 0:
+                return False
+            i = (i + 1) & mask
+
+_tableByFamily = {AF_INET: _HostTable32, AF_INET6: _HostTable128}
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class HostSet(object):
+    """Exact-match set of host addresses, with prefix entries as a fallback.
+
+    With bloomBitsPerHost set, a Bloom filter sized for expectedHosts is
+    consulted before the tables; it is rebuilt whenever more hosts than
+    expected have been added.
+    """
+
+    def __init__(self, expectedHosts=0, bloomBitsPerHost=None, bloomHashes=3):
+        self.expectedHosts = expectedHosts
+        self.bloomBitsPerHost = bloomBitsPerHost
+        self.bloomHashes = bloomHashes
+        self._tables = {}
+        self._prefixes = {}
+        self.bloom = None
+        self._resetBloom()
+
+    def __len__(self):
+        return (sum(len(t) for t in self._tables.itervalues())
+                + sum(len(nets) for plens, byPlen in self._prefixes.itervalues()
+                        for nets in byPlen.itervalues()))
+
+    def _tableFor(self, afamily):
+        table = self._tables.get(afamily)
+        if table is None:
+            table = self._tables[afamily] = _tableByFamily[afamily](self.expectedHosts)
+        return table
+
+    #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    def _resetBloom(self):
+        if not self.bloomBitsPerHost:
+            self.bloom = None
+            return
+        hosts = sum(len(t) for t in self._tables.itervalues())
+        self.expectedHosts = max(self.expectedHosts, hosts, 1)
+        self.bloom = BloomFilter(self.expectedHosts * self.bloomBitsPerHost, self.bloomHashes)
+        for table in self._tables.itervalues():
+            for n in table.iterNumbers():
+                self.bloom.add(_hash64(n))
+
+    def _bloomAdd(self, n):
+        bloom = self.bloom
+        if bloom is not None:
+            if sum(len(t) for t in self._tables.itervalues()) > self.expectedHosts:
+                self.expectedHosts *= 2
+                self._resetBloom()
+            else: bloom.add(_hash64(n))
+
+    #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    def addNumber(self, afamily, n, prefixLen=None):
+        bits = _bitsByFamily[afamily]
+        if prefixLen is None or prefixLen == bits:
+            if self._tableFor(afamily).add(n):
+                self._bloomAdd(n)
+            return
+
+        plens, byPlen = self._prefixes.setdefault(afamily, ([], {}))
+        nets = byPlen.get(prefixLen)
+        if nets is None:
+            nets = byPlen[prefixLen] = set()
+            plens.append(prefixLen)
+            plens.sort(reverse=True)
+        nets.add(n >> (bits - prefixLen))
+
+    def add(self, entry):
+        """Adds an IP, an IPNet, or the text of either"""
+        if isinstance(entry, basestring):
+            if '/' in entry:
+                entry = asIPNet(entry)
+            else: entry = asIP(entry)
+
+        if isinstance(entry, IPNetBase):
+            self.addNumber(entry.afamily, entry.networkNumber, entry.prefixLen)
+        else:
+            self.addNumber(entry.afamily, entry._getIPNumber())
+
+    def update(self, entries):
+        for entry in entries:
+            self.add(entry)
+
+    def loadNumbers(self, afamily, numbers):
+        """Bulk adds host address integers of one family"""
+        numbers = list(numbers)
+        table = self._tableFor(afamily)
+        table.reserve(len(numbers))
+        bloom = self.bloom
+        if bloom is not None and len(table) + len(numbers) > self.expectedHosts:
+            self.expectedHosts = len(table) + len(numbers)
+            bloom = None
+
+        for n in numbers:
+            if table.add(n) and bloom is not None:
+                bloom.add(_hash64(n))
+        if self.bloomBitsPerHost and bloom is None:
+            self._resetBloom()
+
+    def loadTexts(self, texts, strict=True):
+        """Bulk adds address texts; prefixes shorter than a host are added
+        to the prefix index, everything else through the batch parser"""
+        hosts = []
+        for text in texts:
+            text = text.strip()
+            if not text or text.startswith('#'):
+                continue
+            if '/' in text:
+                net = asIPNet(text)
+                if net.prefixLen != _bitsByFamily[net.afamily]:
+                    self.addNumber(net.afamily, net.networkNumber, net.prefixLen)
+                    continue
+                text = text.split('/', 1)[0]
+            hosts.append(text)
+
+        for afamily, addrs in parseTexts(hosts, strict).iteritems():
+            self.loadNumbers(afamily, addrs.iterNumbers())
+
+    @classmethod
+    def fromTexts(klass, texts, bloomBitsPerHost=None, strict=True):
+        texts = list(texts)
+        self = klass(len(texts), bloomBitsPerHost)
+        self.loadTexts(texts, strict)
+        return self
+
+    @classmethod
+    def fromFile(klass, path, bloomBitsPerHost=None, strict=True):
+        with open(path, 'r') as f:
+            return klass.fromTexts(f, bloomBitsPerHost, strict)
+
+    #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    def containsNumber(self, afamily, n):
+        table = self._tables.get(afamily)
+        if table is not None:
+            bloom = self.bloom
+            if bloom is None or bloom.mightContain(_hash64(n)):
+                if n in table:
+                    return True
+
+        entry = self._prefixes.get(afamily)
+        if entry is not None:
+            plens, byPlen = entry
+            bits = _bitsByFamily[afamily]
+            for plen in plens:
+                if (n >> (bits - plen)) in byPlen[plen]:
+                    return True
+        return False
+
+    def __contains__(self, ip):
+        if not isinstance(ip, IPBase):
+            ip = asIP(ip)
+        return self.containsNumber(ip.afamily, ip._getIPNumber())
+
+    def containsMany(self, ips):
+        return [ip in self for ip in ips]
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Main
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+if __name__=='__main__':
+    deny = HostSet.fromTexts(['192.0.2.1', '192.0.2.7/32', '198.51.100.0/24', '2001:db8::1', '# comment'], 10)
+    print len(deny)
+    for each in ['192.0.2.1', '192.0.2.2', '198.51.100.77', '2001:db8::1', '2001:db8::2']:
+        print each, each in deny
+
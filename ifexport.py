@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+##~ Copyright (C) 2002-2007  TechGame Networks, LLC.              ##
+##~                                                               ##
+##~ This library is free software; you can redistribute it        ##
+##~ and/or modify it under the terms of the BSD style License as  ##
+##~ found in the LICENSE file included with this distribution.    ##
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+
+"""Compact serialization of interface snapshots for collectors.
+
+Records are built straight from the snapshot's address keys, so no address
+is ever rendered as text.  A full record looks like::
+
+    {"t": 1190000000.0, "full": 1,
+     "ifs": [[ifindex, name, flags], ...],
+     "addrs": [[ifindex, family, address, prefixLen], ...]}
+
+and an incremental record carries "ifs+", "ifs-", "ifs~", "addrs+" and
+"addrs-" lists in the same shapes, with removed interfaces given by index.
+Families are 4, 6 or 0 for link layer; addresses are hex in JSON and raw
+bytes in the msgpack encoding.
+"""
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Imports
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+import json
+import struct
+from socket import AF_INET, AF_INET6
+
+from linkaddr import AF_LINK
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Constants / Variables / Etc.
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+FORMAT_JSON = 'json'
+FORMAT_MSGPACK = 'msgpack'
+
+_familyCodes = {AF_INET: 4, AF_INET6: 6, AF_LINK: 0}
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Definitions
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def _interfaceRecord(key):
+    ifIndex, name, flags = key
+    if isinstance(name, str):
+        name = name.decode('utf-8', 'replace')
+    return [ifIndex, name, int(flags)]
+
+def _addressRecords(keys, packedFn):
+    result = []
+    for ifIndex, afamily, packed, prefixLen in keys:
+        code = _familyCodes.get(afamily)
+        if code is None or not isinstance(packed, str):
+            # undecoded families have nothing portable to send
+            continue
+        result.append([ifIndex, code, packedFn(packed), prefixLen])
+    return result
+
+def _hexPacked(packed):
+    return packed.encode('hex')
+def _rawPacked(packed):
+    return packed
+
+def snapshotRecord(snapshot, packedFn=_hexPacked):
+    return {
+        't': snapshot.timestamp,
+        'full': 1,
+        'ifs': [_interfaceRecord(k) for k in snapshot.interfaceKeys().itervalues()],
+        'addrs': _addressRecords(snapshot.addressKeys(), packedFn),
+        }
+
+def diffRecord(diff, timestamp, packedFn=_hexPacked):
+    return {
+        't': timestamp,
+        'ifs+': [_interfaceRecord(k) for k in diff.addedInterfaces],
+        'ifs-': [k[0] for k in diff.removedInterfaces],
+        'ifs~': [_interfaceRecord(new) for old, new in diff.changedInterfaces],
+        'addrs+': _addressRecords(diff.addedAddressKeys, packedFn),
+        'addrs-': _addressRecords(diff.removedAddressKeys, packedFn),
+        }
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Encoders
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def encodeJSON(record):
+    return json.dumps(record, separators=(',', ':'), sort_keys=True) + '\n'
+
+def _packInt(n, out):
+    if 0 <= n < 0x80:
+        out.append(chr(n))
+    elif -0x20 <= n < 0:
+        out.append(chr(n & 0xff))
+    elif n >= 0:
+        if n <= 0xff: out.append('\xcc' + chr(n))
+        elif n <= 0xffff: out.append(struct.pack('>BH', 0xcd, n))
+        elif n <= 0xffffffff: out.append(struct.pack('>BL', 0xce, n))
+        else: out.append(struct.pack('>BQ', 0xcf, n))
+    else:
+        if n >= -0x80: out.append(struct.pack('>Bb', 0xd0, n))
+        elif n >= -0x8000: out.append(struct.pack('>Bh', 0xd1, n))
+        elif n >= -0x80000000: out.append(struct.pack('>Bl', 0xd2, n))
+        else: out.append(struct.pack('>Bq', 0xd3, n))
+
+def _packLength(n, fix, fixLimit, codes, out):
+    if fix is not None and n < fixLimit:
+        out.append(chr(fix | n))
+    elif codes[0] is not None and n <= 0xff:
+        out.append(struct.pack('>BB', codes[0], n))
+    elif n <= 0xffff:
+        out.append(struct.pack('>BH', codes[1], n))
+    else: out.append(struct.pack('>BL', codes[2], n))
+
+def _packObj(obj, out):
+    if obj is None:
+        out.append('\xc0')
+    elif obj is True:
+        out.append('\xc3')
+    elif obj is False:
+        out.append('\xc2')
+    elif isinstance(obj, (int, long)):
+        _packInt(obj, out)
+    elif isinstance(obj, float):
+        out.append(struct.pack('>Bd', 0xcb, obj))
+    elif isinstance(obj, unicode):
+        data = obj.encode('utf-8')
+        _packLength(len(data), 0xa0, 32, (0xd9, 0xda, 0xdb), out)
+        out.append(data)
+    elif isinstance(obj, str):
+        # byte strings are packed addresses, sent as bin like msgpack's
+        # use_bin_type
+        _packLength(len(obj), None, 0, (0xc4, 0xc5, 0xc6), out)
+        out.append(obj)
+    elif isinstance(obj, (list, tuple)):
+        _packLength(len(obj), 0x90, 16, (None, 0xdc, 0xdd), out)
+        for each in obj:
+            _packObj(each, out)
+    elif isinstance(obj, dict):
+        _packLength(len(obj), 0x80, 16, (None, 0xde, 0xdf), out)
+        for k in sorted(obj):
+            _packObj(unicode(k), out)
+            _packObj(obj[k], out)
+    else:
+        raise TypeError("Cannot msgpack encode %r" % (obj,))
+
+def encodeMsgpack(record):
+    if msgpack is not None:
+        return msgpack.packb(record, use_bin_type=True)
+    out = []
+    _packObj(record, out)
+    return ''.join(out)
+
+_encoders = {
+    FORMAT_JSON: (encodeJSON, _hexPacked),
+    FORMAT_MSGPACK: (encodeMsgpack, _rawPacked),
+    }
+
+def exportSnapshot(snapshot, format=FORMAT_JSON):
+    encode, packedFn = _encoders[format]
+    return encode(snapshotRecord(snapshot, packedFn))
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class SnapshotExporter(object):
+    """Encodes successive snapshots, sending only changes after the first.
+
+    export() returns None when nothing changed since the last export.  A
+    full record is sent again every fullEvery exports (when set), and after
+    reset(), so a collector that missed records can resynchronize.
+    """
+
+    def __init__(self, format=FORMAT_JSON, incremental=True, fullEvery=None):
+        self.encode, self.packedFn = _encoders[format]
+        self.format = format
+        self.incremental = incremental
+        self.fullEvery = fullEvery
+        self.reset()
+
+    def reset(self):
+        self.last = None
+        self.sinceFull = 0
+
+    def export(self, snapshot):
+        last = self.last
+        self.last = snapshot
+
+        if (last is None or not self.incremental
+                or (self.fullEvery and self.sinceFull >= self.fullEvery)):
+            self.sinceFull = 1
+            return self.encode(snapshotRecord(snapshot, self.packedFn))
+
+        self.sinceFull += 1
+        diff = snapshot.diffFrom(last)
+        if not diff:
+            return None
+        return self.encode(diffRecord(diff, snapshot.timestamp, self.packedFn))
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Main
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+if __name__=='__main__':
+    import netif
+    snapshot = netif.getifsnapshot()
+    line = exportSnapshot(snapshot)
+    print line,
+    print '%d bytes json, %d bytes msgpack' % (len(line), len(exportSnapshot(snapshot, FORMAT_MSGPACK)))
+
+    exporter = SnapshotExporter()
+    exporter.export(snapshot)
+    print 'unchanged:', exporter.export(netif.queryifsnapshot())
+
@@ -0,0 +1,94 @@
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+##~ Copyright (C) 2002-2007  TechGame Networks, LLC.              ##
+##~                                                               ##
+##~ This library is free software; you can redistribute it        ##
+##~ and/or modify it under the terms of the BSD style License as  ##
+##~ found in the LICENSE file included with this distribution.    ##
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+
+__all__ = [
+    'IFFlags',
+
+    'IFF_UP',
+    'IFF_BROADCAST',
+    'IFF_DEBUG',
+    'IFF_LOOPBACK',
+    'IFF_POINTOPOINT',
+    'IFF_RUNNING',
+    'IFF_NOARP',
+    'IFF_PROMISC',
+    'IFF_ALLMULTI',
+    'IFF_MULTICAST',
+    ]
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Imports
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+import sys
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Constants / Variables / Etc.
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+# The low bits of ifa_flags agree between linux and the BSDs, the high
+# bits do not.  The windows backend synthesizes these same values from
+# its adapter records, so everything above the backends can rely on them.
+
+IFF_UP          = 0x1
+IFF_BROADCAST   = 0x2
+IFF_DEBUG       = 0x4
+IFF_LOOPBACK    = 0x8
+IFF_POINTOPOINT = 0x10
+IFF_RUNNING     = 0x40
+IFF_NOARP       = 0x80
+IFF_PROMISC     = 0x100
+IFF_ALLMULTI    = 0x200
+
+if sys.platform.startswith('linux') or sys.platform == 'win32':
+    IFF_MULTICAST   = 0x1000
+else:
+    IFF_MULTICAST   = 0x8000
+
+_flagNames = [
+    ('UP', IFF_UP),
+    ('BROADCAST', IFF_BROADCAST),
+    ('DEBUG', IFF_DEBUG),
+    ('LOOPBACK', IFF_LOOPBACK),
+    ('POINTOPOINT', IFF_POINTOPOINT),
+    ('RUNNING', IFF_RUNNING),
+    ('NOARP', IFF_NOARP),
+    ('PROMISC', IFF_PROMISC),
+    ('ALLMULTI', IFF_ALLMULTI),
+    ('MULTICAST', IFF_MULTICAST),
+    ]
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Definitions
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class IFFlags(int):
+    __slots__ = ()
+
+    def __new__(klass, flags=0):
+        return int.__new__(klass, flags & 0xffffffff)
+
+    def __repr__(self):
+        return '%s(%s)' % (self.__class__.__name__, '|'.join(self.names()) or '0')
+
+    def names(self):
+        return [n for n, f in _flagNames if self & f]
+
+    def matches(self, flags=0, notFlags=0):
+        return ((self & flags) == flags) and not (self & notFlags)
+
+    isUp = property(lambda self: bool(self & IFF_UP))
+    isBroadcast = property(lambda self: bool(self & IFF_BROADCAST))
+    isLoopback = property(lambda self: bool(self & IFF_LOOPBACK))
+    isPointToPoint = property(lambda self: bool(self & IFF_POINTOPOINT))
+    isRunning = property(lambda self: bool(self & IFF_RUNNING))
+    isNoArp = property(lambda self: bool(self & IFF_NOARP))
+    isPromisc = property(lambda self: bool(self & IFF_PROMISC))
+    isAllMulti = property(lambda self: bool(self & IFF_ALLMULTI))
+    isMulticast = property(lambda self: bool(self & IFF_MULTICAST))
+
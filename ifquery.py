@@ -0,0 +1,146 @@
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+##~ Copyright (C) 2002-2007  TechGame Networks, LLC.              ##
+##~                                                               ##
+##~ This library is free software; you can redistribute it        ##
+##~ and/or modify it under the terms of the BSD style License as  ##
+##~ found in the LICENSE file included with this distribution.    ##
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Imports
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+import re
+import fnmatch
+from socket import AF_INET, AF_INET6
+
+from ifflags import *
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Constants / Variables / Etc.
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+SCOPE_HOST = 'host'
+SCOPE_LINK = 'link'
+SCOPE_SITE = 'site'
+SCOPE_GLOBAL = 'global'
+
+_v6Loopback = '\x00'*15 + '\x01'
+_v6MulticastScopes = {
+    0x1: SCOPE_HOST,
+    0x2: SCOPE_LINK,
+    0x5: SCOPE_SITE,
+    }
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Definitions
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def scopeOfPacked(afamily, packed):
+    if afamily == AF_INET:
+        first = ord(packed[0])
+        if first == 127:
+            return SCOPE_HOST
+        elif first == 169 and ord(packed[1]) == 254:
+            return SCOPE_LINK
+        return SCOPE_GLOBAL
+
+    elif afamily == AF_INET6:
+        if packed == _v6Loopback:
+            return SCOPE_HOST
+        first, second = ord(packed[0]), ord(packed[1])
+        if first == 0xfe:
+            if (second & 0xc0) == 0x80:
+                return SCOPE_LINK
+            elif (second & 0xc0) == 0xc0:
+                return SCOPE_SITE
+        elif first == 0xff:
+            return _v6MulticastScopes.get(second & 0x0f, SCOPE_GLOBAL)
+        return SCOPE_GLOBAL
+
+    return None
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class IFQuery(object):
+    """Selects interface address records inside the platform backends.
+
+    Backends check the interface name and flags first, then the address
+    family, then the scope from the packed address -- each before any
+    further decoding of the record is done.  A name containing glob
+    characters is matched with fnmatch; otherwise it must match exactly.
+    Records without an IP address never satisfy a scope restriction.
+    """
+
+    name = None
+    flags = 0
+    notFlags = 0
+
+    def __init__(self, afamilies=(), name=None, flags=0, notFlags=0, scopes=()):
+        self.afamilies = frozenset(afamilies)
+        self.scopes = frozenset(scopes)
+        self.flags = flags
+        self.notFlags = notFlags
+        self.setName(name)
+
+    def __repr__(self):
+        return '%s(afamilies=%r, name=%r, flags=%#x, notFlags=%#x, scopes=%r)' % (
+                self.__class__.__name__, sorted(self.afamilies), self.name,
+                self.flags, self.notFlags, sorted(self.scopes))
+
+    @classmethod
+    def asIFQuery(klass, query=None):
+        if query is None:
+            return klass()
+        elif isinstance(query, klass):
+            return query
+        return klass(query)
+
+    #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    _matchName = None
+    def setName(self, name):
+        self.name = name
+        if name is None:
+            self._matchName = None
+        elif self.isGlob(name):
+            self._matchName = re.compile(fnmatch.translate(name)).match
+        else:
+            # not name.__eq__, which returns the (true) NotImplemented when
+            # a str name meets a unicode interface name
+            self._matchName = lambda ifName: ifName == name
+
+    @staticmethod
+    def isGlob(name):
+        return '*' in name or '?' in name or '[' in name
+
+    def isExactName(self):
+        return self.name is not None and not self.isGlob(self.name)
+
+    #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    def matchName(self, ifName):
+        matchName = self._matchName
+        return matchName is None or bool(matchName(ifName))
+
+    def matchFlags(self, ifFlags):
+        return ((ifFlags & self.flags) == self.flags) and not (ifFlags & self.notFlags)
+
+    def matchInterface(self, ifName, ifFlags):
+        return self.matchName(ifName) and self.matchFlags(ifFlags)
+
+    def matchFamily(self, afamily):
+        return not self.afamilies or afamily in self.afamilies
+
+    def matchScope(self, afamily, packed):
+        if not self.scopes:
+            return True
+        return scopeOfPacked(afamily, packed) in self.scopes
+
+    def matchAddress(self, afamily, packed=None):
+        if not self.matchFamily(afamily):
+            return False
+        elif self.scopes and packed is None:
+            return False
+        return self.matchScope(afamily, packed)
+
@@ -0,0 +1,231 @@
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+##~ Copyright (C) 2002-2007  TechGame Networks, LLC.              ##
+##~                                                               ##
+##~ This library is free software; you can redistribute it        ##
+##~ and/or modify it under the terms of the BSD style License as  ##
+##~ found in the LICENSE file included with this distribution.    ##
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Imports
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+import time
+
+from ifflags import IFFlags
+from linkaddr import MACAddress
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Definitions
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class IFIndexMap(object):
+    """Bidirectional interface name <-> index map.
+
+    Misses are answered by the fallback function given to the lookup,
+    typically the platform libc call, and remembered.
+    """
+
+    def __init__(self, pairs=()):
+        self.indexByName = {}
+        self.nameByIndex = {}
+        for name, index in pairs:
+            self.add(name, index)
+
+    def __len__(self):
+        return len(self.indexByName)
+
+    def add(self, name, index):
+        self.indexByName[name] = index
+        self.nameByIndex[index] = name
+
+    def nameToIndex(self, name, fallback=None):
+        index = self.indexByName.get(name)
+        if index is None and fallback is not None:
+            index = fallback(name)
+            if index:
+                self.add(name, index)
+        return index
+
+    def indexToName(self, index, fallback=None):
+        name = self.nameByIndex.get(index)
+        if name is None and fallback is not None:
+            name = fallback(index)
+            if name:
+                self.add(name, index)
+        return name
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def addressKey(ifIndex, addr):
+    if isinstance(addr, MACAddress):
+        return (ifIndex, addr.afamily, addr.packed(), None)
+
+    afamily = getattr(addr, 'afamily', None)
+    if afamily is None:
+        # undecoded entries are (afamily, addr, ...) tuples
+        return (ifIndex, addr[0], addr[1], None)
+
+    if addr.netmask is not None:
+        prefixLen = addr.prefixLen
+    else: prefixLen = None
+    return (ifIndex, afamily, addr.ip.packed(), prefixLen)
+
+class IFSnapshotDiff(object):
+    """The minimal set of changes between two snapshots.
+
+    Interfaces are keyed by if_index and reported as added, removed or
+    changed (renamed or new flags, as (old, new) pairs).  Addresses are
+    keyed by (if_index, family, packed address, prefix length) and are
+    only ever added or removed.
+    """
+
+    def __init__(self, old, new):
+        oldIFs, newIFs = old.interfaceKeys(), new.interfaceKeys()
+        self.addedInterfaces = [newIFs[k] for k in newIFs if k not in oldIFs]
+        self.removedInterfaces = [oldIFs[k] for k in oldIFs if k not in newIFs]
+        self.changedInterfaces = [(oldIFs[k], newIFs[k]) for k in newIFs 
+                                    if k in oldIFs and oldIFs[k] != newIFs[k]]
+
+        oldAddrs, newAddrs = old.addressKeys(), new.addressKeys()
+        self.addedAddressKeys = [k for k in newAddrs if k not in oldAddrs]
+        self.removedAddressKeys = [k for k in oldAddrs if k not in newAddrs]
+        self.addedAddresses = [newAddrs[k] for k in self.addedAddressKeys]
+        self.removedAddresses = [oldAddrs[k] for k in self.removedAddressKeys]
+
+    def __nonzero__(self):
+        return bool(self.addedInterfaces or self.removedInterfaces or self.changedInterfaces
+                or self.addedAddresses or self.removedAddresses)
+
+    def __repr__(self):
+        return '<%s +%d/-%d/~%d interfaces, +%d/-%d addresses>' % (
+                self.__class__.__name__, 
+                len(self.addedInterfaces), len(self.removedInterfaces), len(self.changedInterfaces),
+                len(self.addedAddresses), len(self.removedAddresses))
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class IFSnapshot(object):
+    """An indexed, read-only view of one getifinfo() result.
+
+    Interface flags are indexed by their distinct values, so a flag
+    selection only visits each distinct combination once, and the answer
+    is kept for the life of the snapshot.
+    """
+
+    timeFn = time.time
+
+    def __init__(self, ifinfo, timestamp=None):
+        if timestamp is None:
+            timestamp = self.timeFn()
+        self.timestamp = timestamp
+        self.ifinfo = ifinfo
+
+        self._selectCache = {}
+        self._buildIndexes(ifinfo)
+
+    def __repr__(self):
+        return '<%s %d interfaces at %r>' % (self.__class__.__name__, len(self.names), self.timestamp)
+
+    def age(self):
+        return self.timeFn() - self.timestamp
+
+    def _buildIndexes(self, ifinfo):
+        self.names = names = []
+        self.byName = byName = {}
+        self.flags = flagsByName = {}
+        self.byFlags = byFlags = {}
+        self.ifindexes = ifindexes = IFIndexMap()
+
+        for name, entries in ifinfo:
+            names.append(name)
+            byName[name] = entries
+
+            flags = 0
+            for e in entries:
+                flags |= e['flags']
+                if e.get('if_index'):
+                    ifindexes.add(name, e['if_index'])
+            flags = IFFlags(flags)
+            flagsByName[name] = flags
+            byFlags.setdefault(flags, []).append(name)
+
+    #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    def __len__(self):
+        return len(self.names)
+    def __iter__(self):
+        return iter(self.ifinfo)
+    def __contains__(self, name):
+        return name in self.byName
+
+    def entriesOf(self, name):
+        return self.byName.get(name, [])
+    def addrsOf(self, name):
+        return [a for e in self.entriesOf(name) for a in e['addrs']]
+    def flagsOf(self, name):
+        return self.flags.get(name)
+
+    def indexOf(self, name, fallback=None):
+        return self.ifindexes.nameToIndex(name, fallback)
+    def nameOf(self, index, fallback=None):
+        return self.ifindexes.indexToName(index, fallback)
+
+    _indexByAddress = None
+    def indexForAddress(self, ip):
+        indexByAddress = self._indexByAddress
+        if indexByAddress is None:
+            indexByAddress = {}
+            for name, entries in self.ifinfo:
+                for e in entries:
+                    for a in e['addrs']:
+                        afamily = getattr(a, 'afamily', None)
+                        if afamily is not None and not isinstance(a, MACAddress):
+                            indexByAddress.setdefault((afamily, long(a.ip)), e['if_index'])
+            self._indexByAddress = indexByAddress
+        return indexByAddress.get((ip.afamily, long(ip)))
+
+    _interfaceKeys = None
+    def interfaceKeys(self):
+        """{if_index: (if_index, name, flags)}"""
+        interfaceKeys = self._interfaceKeys
+        if interfaceKeys is None:
+            interfaceKeys = {}
+            for name in self.names:
+                ifIndex = self.ifindexes.indexByName.get(name, name)
+                interfaceKeys[ifIndex] = (ifIndex, name, self.flags[name])
+            self._interfaceKeys = interfaceKeys
+        return interfaceKeys
+
+    _addressKeys = None
+    def addressKeys(self):
+        """{addressKey: (name, addr)}"""
+        addressKeys = self._addressKeys
+        if addressKeys is None:
+            addressKeys = {}
+            for name, entries in self.ifinfo:
+                for e in entries:
+                    ifIndex = e.get('if_index') or name
+                    for a in e['addrs']:
+                        addressKeys[addressKey(ifIndex, a)] = (name, a)
+            self._addressKeys = addressKeys
+        return addressKeys
+
+    @staticmethod
+    def diff(old, new):
+        return IFSnapshotDiff(old, new)
+    def diffFrom(self, old):
+        return IFSnapshotDiff(old, self)
+
+    def select(self, flags=0, notFlags=0):
+        key = (flags, notFlags)
+        result = self._selectCache.get(key)
+        if result is None:
+            matched = set()
+            for ifFlags, names in self.byFlags.iteritems():
+                if ifFlags.matches(flags, notFlags):
+                    matched.update(names)
+            result = tuple(n for n in self.names if n in matched)
+            self._selectCache[key] = result
+        return result
+
@@ -0,0 +1,191 @@
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+##~ Copyright (C) 2002-2007  TechGame Networks, LLC.              ##
+##~                                                               ##
+##~ This library is free software; you can redistribute it        ##
+##~ and/or modify it under the terms of the BSD style License as  ##
+##~ found in the LICENSE file included with this distribution.    ##
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+
+"""Opt-in counters and timings for the enumeration stages.
+
+Instrumentation is off by default.  Functions wrapped by instrumented() then
+still cost the wrapper's call and a flag test, so it is kept to calls made
+once per enumeration.  Per interface and per address paths test the module
+flag inline, which is then their only cost::
+
+    if instrument.enabled:
+        instrument.count('ip.parse')
+"""
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Imports
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+import threading
+from contextlib import contextmanager
+from timeit import default_timer as _timer
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Constants / Variables / Etc.
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+enabled = False
+
+_enabledFlag = False
+_activeProfiles = 0
+_stats = {}         # name -> [count, seconds]
+_listeners = []
+_lock = threading.Lock()
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Definitions
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def _updateEnabled():
+    global enabled
+    enabled = _enabledFlag or _activeProfiles > 0
+
+def enable(flag=True):
+    """Turns instrumentation on or off; profile() blocks keep it on while
+    they run either way"""
+    global _enabledFlag
+    with _lock:
+        _enabledFlag = bool(flag)
+        _updateEnabled()
+
+def disable():
+    enable(False)
+
+def isEnabled():
+    return enabled
+
+def reset():
+    with _lock:
+        _stats.clear()
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def record(name, count=1, seconds=0.0):
+    with _lock:
+        entry = _stats.get(name)
+        if entry is None:
+            entry = _stats[name] = [0, 0.0]
+        entry[0] += count
+        entry[1] += seconds
+    for listener in _listeners:
+        listener(name, count, seconds)
+
+def count(name, n=1):
+    if enabled:
+        record(name, n)
+
+@contextmanager
+def stage(name):
+    if not enabled:
+        yield
+        return
+    start = _timer()
+    try:
+        yield
+    finally:
+        record(name, 1, _timer() - start)
+
+def instrumented(name):
+    """Decorator counting calls of a function and their cumulative time"""
+    def decorate(fn):
+        def wrapper(*args, **kw):
+            if not enabled:
+                return fn(*args, **kw)
+            start = _timer()
+            try:
+                return fn(*args, **kw)
+            finally:
+                record(name, 1, _timer() - start)
+        wrapper.__name__ = fn.__name__
+        wrapper.__doc__ = fn.__doc__
+        wrapper.__wrapped__ = fn
+        return wrapper
+    return decorate
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def addListener(listener):
+    """listener(name, count, seconds) is called for every record made"""
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+def removeListener(listener):
+    if listener in _listeners:
+        _listeners.remove(listener)
+
+def asDict():
+    with _lock:
+        return dict((name, {'count': c, 'seconds': s})
+                    for name, (c, s) in _stats.iteritems())
+
+def export(callback):
+    """Passes each (name, count, seconds) accumulated so far to callback"""
+    for name, entry in sorted(asDict().items()):
+        callback(name, entry['count'], entry['seconds'])
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class Profile(object):
+    stats = None
+
+    def __repr__(self):
+        return '<%s %r>' % (self.__class__.__name__, self.stats)
+
+    def report(self):
+        if self.stats is None:
+            return ''
+        lines = []
+        for name, entry in sorted(self.stats.items(), key=lambda e: -e[1]['seconds']):
+            lines.append('%-32s %8d %10.6fs' % (name, entry['count'], entry['seconds']))
+        return '\n'.join(lines)
+
+def _subtract(after, before):
+    result = {}
+    for name, entry in after.iteritems():
+        prior = before.get(name, {'count': 0, 'seconds': 0.0})
+        c = entry['count'] - prior['count']
+        if c:
+            result[name] = {'count': c, 'seconds': entry['seconds'] - prior['seconds']}
+    return result
+
+@contextmanager
+def profile():
+    """Enables instrumentation for a block; the yielded Profile holds the
+    counts and timings recorded inside it once the block exits.
+
+    Blocks may nest or run on several threads at once; instrumentation
+    stays on until the last one exits.  Records are process wide, so each
+    Profile also holds what other threads recorded during its block.
+    """
+    global _activeProfiles
+    result = Profile()
+    before = asDict()
+    with _lock:
+        _activeProfiles += 1
+        _updateEnabled()
+    try:
+        yield result
+    finally:
+        with _lock:
+            _activeProfiles -= 1
+            _updateEnabled()
+        result.stats = _subtract(asDict(), before)
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Main
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+if __name__=='__main__':
+    # run through the imported module, which is the one netif records into
+    import netif
+    from instrument import profile
+    with profile() as p:
+        netif.invalidateifsnapshot()
+        netif.getifsnapshot()
+    print p.report()
+
@@ -0,0 +1,305 @@
+#!/usr/bin/env python
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+##~ Copyright (C) 2002-2007  TechGame Networks, LLC.              ##
+##~                                                               ##
+##~ This library is free software; you can redistribute it        ##
+##~ and/or modify it under the terms of the BSD style License as  ##
+##~ found in the LICENSE file included with this distribution.    ##
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+
+"""Address range -> payload maps in a file that is queried through mmap.
+
+File layout, all offsets from the start of the file::
+
+    header      '<4sBBxxII'  magic, family (4 or 6), key width, count, blob size
+    starts      count keys   big endian, so byte order is numeric order
+    ends        count keys   inclusive range ends
+    payloads    count '<II'  (offset, length) into the blob
+    blob        payload bytes, identical payloads stored once
+
+Ranges are disjoint and sorted, so a lookup is a binary search over the
+starts column comparing raw key bytes, and nothing is loaded onto the heap.
+"""
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Imports
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+import os
+import mmap
+import struct
+from socket import AF_INET, AF_INET6
+
+from ip import asIP, asIPNet, IPBase, IPNetBase, IPv4, IPv6
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Constants / Variables / Etc.
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+_magic = 'IVM1'
+_header = struct.Struct('<4sBBxxII')
+_payloadRef = struct.Struct('<II')
+
+_familyCodes = {AF_INET: 4, AF_INET6: 6}
+_familyByCode = {4: AF_INET, 6: AF_INET6}
+_IPByFamily = {AF_INET: IPv4, AF_INET6: IPv6}
+_keyWidths = {AF_INET: 4, AF_INET6: 16}
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Definitions
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def _asNumber(ip, afamily):
+    if isinstance(ip, (int, long)):
+        return ip
+    if not isinstance(ip, IPBase):
+        ip = asIP(ip)
+    if ip.afamily != afamily:
+        return None
+    return ip._getIPNumber()
+
+class IntervalMapBuilder(object):
+    """Collects (start, end, payload) ranges and writes an interval map file.
+
+    Ranges may nest, as prefixes do; the range starting last (the more
+    specific one) owns the addresses it covers.  Adjacent pieces with equal
+    payloads are merged.
+    """
+
+    def __init__(self, afamily=AF_INET):
+        self.afamily = afamily
+        self.IP = _IPByFamily[afamily]
+        self.ranges = []
+
+    def __len__(self):
+        return len(self.ranges)
+
+    def add(self, start, end, payload):
+        start, end = _asNumber(start, self.afamily), _asNumber(end, self.afamily)
+        if start is None or end is None:
+            raise ValueError("Range is not of the map's address family")
+        if end < start:
+            raise ValueError("Range end %r is before start %r" % (end, start))
+        if isinstance(payload, unicode):
+            payload = payload.encode('utf-8')
+        self.ranges.append((start, end, payload))
+
+    def addNet(self, ipnet, payload):
+        if not isinstance(ipnet, IPNetBase):
+            ipnet = asIPNet(ipnet)
+        self.add(ipnet.networkNumber, ipnet.broadcastNumber, payload)
+
+    def flattened(self):
+        """Disjoint, sorted [(start, end, payload)]"""
+        result = []
+        def emit(start, end, payload):
+            if start > end:
+                return
+            if result and result[-1][2] == payload and result[-1][1] + 1 == start:
+                result[-1] = (result[-1][0], end, payload)
+            else: result.append((start, end, payload))
+
+        stack = []
+        pos = None
+        for start, end, payload in sorted(self.ranges, key=lambda r: (r[0], -r[1])):
+            while stack and stack[-1][1] < start:
+                top = stack.pop()
+                emit(pos, top[1], top[2])
+                pos = max(pos, top[1] + 1)
+            if stack:
+                emit(pos, start - 1, stack[-1][2])
+            stack.append((start, end, payload))
+            pos = start
+        while stack:
+            top = stack.pop()
+            emit(pos, top[1], top[2])
+            pos = max(pos, top[1] + 1)
+        return result
+
+    def build(self):
+        """Returns the encoded map as a string"""
+        ranges = self.flattened()
+        width = _keyWidths[self.afamily]
+        packKey = self.IP._packNumber
+
+        blob = []
+        blobSize = 0
+        offsetOf = {}
+        starts, ends, refs = [], [], []
+        for start, end, payload in ranges:
+            starts.append(packKey(start))
+            ends.append(packKey(end))
+            offset = offsetOf.get(payload)
+            if offset is None:
+                offset = offsetOf[payload] = blobSize
+                blob.append(payload)
+                blobSize += len(payload)
+            refs.append(_payloadRef.pack(offset, len(payload)))
+
+        header = _header.pack(_magic, _familyCodes[self.afamily], width, len(ranges), blobSize)
+        return ''.join([header] + starts + ends + refs + blob)
+
+    def write(self, path):
+        # write aside and rename, so readers mapping the old file keep working
+        tmpPath = path + '.tmp'
+        with open(tmpPath, 'wb') as f:
+            f.write(self.build())
+        if os.name == 'nt' and os.path.exists(path):
+            os.remove(path)
+        os.rename(tmpPath, path)
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class IntervalMap(object):
+    """Read only interval map over a mapped file or an in memory string"""
+
+    _file = None
+    _mmap = None
+
+    def __init__(self, pathOrData):
+        if isinstance(pathOrData, str) and pathOrData.startswith(_magic):
+            data = pathOrData
+        else:
+            self._file = open(pathOrData, 'rb')
+            self._mmap = data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._data = data
+
+        magic, code, width, count, blobSize = _header.unpack_from(data, 0)
+        if magic != _magic:
+            raise ValueError("Not an interval map file")
+        self.afamily = _familyByCode[code]
+        self.IP = _IPByFamily[self.afamily]
+        self.width = width
+        self.count = count
+        self._starts = _header.size
+        self._ends = self._starts + count*width
+        self._refs = self._ends + count*width
+        self._blob = self._refs + count*_payloadRef.size
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._file.close()
+            self._mmap = self._file = None
+        self._data = None
+
+    def __enter__(self):
+        return self
+    def __exit__(self, excType, exc, tb):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    def _startKey(self, i):
+        offset = self._starts + i*self.width
+        return self._data[offset:offset+self.width]
+
+    def _search(self, key, lo=0):
+        # index of the last range starting at or before key, else lo-1
+        data, width, base = self._data, self.width, self._starts
+        hi = self.count
+        while lo < hi:
+            mid = (lo + hi) >> 1
+            offset = base + mid*width
+            if key < data[offset:offset+width]:
+                hi = mid
+            else: lo = mid + 1
+        return lo - 1
+
+    def _payloadAt(self, i, key):
+        if i < 0:
+            return None
+        offset = self._ends + i*self.width
+        if key > self._data[offset:offset+self.width]:
+            return None
+        offset, length = _payloadRef.unpack_from(self._data, self._refs + i*_payloadRef.size)
+        offset += self._blob
+        return self._data[offset:offset+length]
+
+    def lookupNumber(self, n, default=None):
+        key = self.IP._packNumber(n)
+        result = self._payloadAt(self._search(key), key)
+        if result is None:
+            return default
+        return result
+
+    def lookup(self, ip, default=None):
+        n = _asNumber(ip, self.afamily)
+        if n is None:
+            return default
+        return self.lookupNumber(n, default)
+    __getitem__ = lookup
+
+    def lookupMany(self, ips, default=None):
+        """Payloads for many addresses, in the order given.
+
+        The queries are sorted first, so each binary search only covers the
+        ranges after the previous answer, and queries falling in the same
+        range as the previous one are answered without searching.
+        """
+        afamily, packKey = self.afamily, self.IP._packNumber
+        keyed = []
+        result = [default] * len(ips)
+        for idx, ip in enumerate(ips):
+            n = _asNumber(ip, afamily)
+            if n is not None:
+                keyed.append((packKey(n), idx))
+        keyed.sort()
+
+        data, width, ends = self._data, self.width, self._ends
+        lo = 0
+        endKey = None
+        payload = None
+        for key, idx in keyed:
+            if endKey is None or key > endKey:
+                i = self._search(key, lo)
+                lo = max(i, 0)
+                if i < 0:
+                    continue
+                offset = ends + i*width
+                endKey = data[offset:offset+width]
+                payload = self._payloadAt(i, key)
+            if payload is not None:
+                result[idx] = payload
+        return result
+
+    def iterRanges(self):
+        """Yields (start, end, payload) with integer bounds"""
+        unpackKey = self.IP._unpackNumber
+        for i in xrange(self.count):
+            start = self._startKey(i)
+            offset = self._ends + i*self.width
+            end = self._data[offset:offset+self.width]
+            yield unpackKey(start), unpackKey(end), self._payloadAt(i, end)
+
+def buildIntervalMap(path, entries, afamily=AF_INET):
+    """Writes entries of (start, end, payload) or (ipnet, payload)"""
+    builder = IntervalMapBuilder(afamily)
+    for entry in entries:
+        if len(entry) == 2:
+            builder.addNet(*entry)
+        else: builder.add(*entry)
+    builder.write(path)
+    return len(builder)
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Main
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+if __name__=='__main__':
+    import tempfile
+    path = os.path.join(tempfile.gettempdir(), 'networkinfo-demo.ivm')
+    buildIntervalMap(path, [
+        ('10.0.0.0/8', 'corp'),
+        ('10.1.0.0/16', 'lab'),
+        ('192.0.2.0/24', 'doc'),
+        ])
+    with IntervalMap(path) as m:
+        for start, end, payload in m.iterRanges():
+            print IPv4.fromNumber(start), IPv4.fromNumber(end), payload
+        print m.lookupMany(['10.1.2.3', '10.2.0.1', '192.0.2.9', '8.8.8.8'])
+    os.remove(path)
+
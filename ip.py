@@ -21,6 +21,10 @@ if hasattr(socket, 'inet_pton'):
 else:
     from .utils.inet import inet_pton, inet_ntop
 
+import ipclass
+import instrument
+from ipclass import classifyNumber
+from ipfamily import familyOf, AF_INVALID
 #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 #~ Constants / Variables / Etc. 
 #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
@@ -28,6 +32,30 @@ else:
 _IPbyFamily = {}
 _IPNetbyFamily = {}
 
+_packedV4 = struct.Struct('!L')
+_packedV6 = struct.Struct('!QQ')
+_mask64 = (1L<<64) - 1
+
+def _packV4(n):
+    return _packedV4.pack(n)
+def _unpackV4(packed):
+    return _packedV4.unpack(packed)[0]
+
+def _packV6(n):
+    return _packedV6.pack(n >> 64, n & _mask64)
+def _unpackV6(packed):
+    hi, lo = _packedV6.unpack(packed)
+    return (hi << 64) | lo
+
+def _portNumber(port):
+    if port is None:
+        return 0
+    elif isinstance(port, (int, long)):
+        return int(port)
+    elif port.isdigit():
+        return int(port)
+    else: return socket.getservbyname(port)
+
 #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 #~ Definitions 
 #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
@@ -42,20 +70,52 @@ class IPBase(object):
             self._isNetmask = isNetmask
         self._setIP(ip)
 
+    # sockaddr tuples are built locally from the packed form and kept in a
+    # small per-address cache keyed by port, so the connect path never goes
+    # through getaddrinfo.  flowinfo is keyword only: this used to forward
+    # extra arguments to getaddrinfo, and e.g. a socket type passed there
+    # must fail rather than be taken as the flowinfo.
+
+    _sockaddrs = None
+    _sockaddrCacheSize = 8
     def sockaddr(self, port=None, *args, **kw):
-        ip = self._getIP()
-        try:
-            address = socket.getaddrinfo(ip, port, *args, **kw)[0][-1]
-        except socket.gaierror, e:
-            if e.args[0] == socket.EAI_SERVICE:
-                address = socket.getaddrinfo(ip, None, *args, **kw)[0][-1]
-                address = (address[0], int(port)) + address[2:]
-            else: raise
+        if args:
+            raise TypeError("sockaddr() takes only the port positionally, and flowinfo by keyword")
+        flowinfo = kw.pop('flowinfo', 0)
+        if kw:
+            raise TypeError("sockaddr() got unexpected keyword arguments: %s" % (', '.join(sorted(kw)),))
+        key = (port, flowinfo)
+        cache = self._sockaddrs
+        if cache is None:
+            cache = self._sockaddrs = {}
+        else:
+            address = cache.get(key)
+            if address is not None:
+                return address
+
+        if instrument.enabled:
+            instrument.count('ip.sockaddr')
+        address = self._sockaddr(_portNumber(port), flowinfo)
+        if len(cache) >= self._sockaddrCacheSize:
+            cache.clear()
+        cache[key] = address
         return address
 
+    def _sockaddr(self, port, flowinfo):
+        return (self._getIP(), port)
+
     def normalize(self):
-        ip = self.sockaddr()[0]
-        return self.asIP(ip, self._isNetmask)
+        if self._ip is None:
+            # built from packed or number form, so already canonical
+            return self
+        if instrument.enabled:
+            instrument.count('ip.normalize')
+        ip = self.unpack(self.packed())
+        if ip == self._ip:
+            return self
+        result = self.fromPacked(self._packed, self._isNetmask)
+        result._ip = ip
+        return result
 
     #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
@@ -67,44 +127,98 @@ class IPBase(object):
             return ip.ip
         return klass(ip, isNetmask)
 
+    @classmethod
+    def fromPacked(klass, packed, isNetmask=False):
+        self = klass.__new__(klass)
+        self._packed = packed
+        if isNetmask:
+            self._isNetmask = True
+        return self
+
+    @classmethod
+    def fromNumber(klass, ipNumber, isNetmask=False):
+        self = klass.__new__(klass)
+        self._ipNumber = ipNumber & klass.max
+        if isNetmask:
+            self._isNetmask = True
+        return self
+
+    @classmethod
+    def fromPrefixLen(klass, prefixLen):
+        hostBits = 8*klass.byteCount - prefixLen
+        return klass.fromNumber(klass.max ^ ((1L<<hostBits)-1), True)
+
+    def asNetmask(self):
+        if self._isNetmask:
+            return self
+        return self.fromNumber(self._getIPNumber(), True)
+
     #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
     def __eq__(self, other):
-        other = self.asIP(other)._getIPNumber()
-        return (self._getIPNumber() == other)
+        other = self.asIP(other)
+        return (self.afamily == other.afamily
+                    and self._getIPNumber() == other._getIPNumber())
     def __ne__(self, other):
         return not (self == other)
 
+    def sortKey(self):
+        return (self.afamily, self._getIPNumber())
+
+    def __lt__(self, other):
+        if not isinstance(other, IPBase):
+            return NotImplemented
+        return self.sortKey() < other.sortKey()
+    def __le__(self, other):
+        if not isinstance(other, IPBase):
+            return NotImplemented
+        return self.sortKey() <= other.sortKey()
+    def __gt__(self, other):
+        if not isinstance(other, IPBase):
+            return NotImplemented
+        return self.sortKey() > other.sortKey()
+    def __ge__(self, other):
+        if not isinstance(other, IPBase):
+            return NotImplemented
+        return self.sortKey() >= other.sortKey()
+
+    # Any of the text, packed and number forms may be the one the IP was
+    # built from; the others are derived from it on first use.
+
     _ip = None
     def _getIP(self):
-        return self._ip
+        ip = self._ip
+        if ip is None:
+            if instrument.enabled:
+                instrument.count('ip.format')
+            ip = self.unpack(self.packed())
+            self._ip = ip
+        return ip
     def _setIP(self, ip):
-        if self._ip is not None:
+        if self._ip is not None or self._packed is not None or self._ipNumber is not None:
             raise Exception("IP has already been set, and this class is intended to be immutable")
 
         if isinstance(ip, (int, long)):
             self._setIPNumber(ip)
         elif self._isNetmask and ip.isdigit():
-            ip = long(ip)
-            ip = (1L<<ip)-1
-            ip = self.max ^ ip
-            self._setIPNumber(ip)
+            hostBits = 8*self.byteCount - int(ip)
+            self._setIPNumber(self.max ^ ((1L<<hostBits)-1))
         else:
+            if instrument.enabled:
+                instrument.count('ip.parse')
             self._ip = ip
 
     _ipNumber = None
     def _getIPNumber(self):
         n = self._ipNumber
         if n is None:
-            n = 0L
-            for e in self.packed():
-                n = (n << 8) | ord(e)
+            if instrument.enabled:
+                instrument.count('ip.unpackNumber')
+            n = self._unpackNumber(self.packed())
             self._ipNumber = n
         return n
     def _setIPNumber(self, ipNumber):
-        bytes = [((ipNumber >> 8*(n-1)) & 0xff) for n in xrange(self.byteCount,0,-1)]
-        packed = ''.join(map(chr, bytes))
-        self._ip = self.unpack(packed)
+        self._ipNumber = ipNumber & self.max
 
     #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
@@ -117,7 +231,8 @@ class IPBase(object):
     def __hex__(self):
         return hex(self._getIPNumber())
     def __hash__(self):
-        return hash(self._getIP())
+        # consistent with __eq__, which compares family and address number
+        return hash((self.afamily, self._getIPNumber()))
 
     def __repr__(self):
         return '%s(%s)' % (self.__class__.__name__, self.asStr(True, True))
@@ -128,55 +243,112 @@ class IPBase(object):
     def asStr(self, short=True, incNetmask=True):
         raise NotImplementedError('Subclass Responsibility: %r' % (self.__class__,))
 
+    _packed = None
     def packed(self):
-        return inet_pton(self.afamily, self._getIP())
+        packed = self._packed
+        if packed is None:
+            if self._ipNumber is not None:
+                packed = self._packNumber(self._ipNumber)
+            else:
+                packed = inet_pton(self.afamily, self._ip)
+            self._packed = packed
+        return packed
     @classmethod
     def unpack(klass, packed):
         return inet_ntop(klass.afamily, packed)
 
-    @classmethod
-    def fromPacked(self, packed, *args, **kw):
-        return klass(self.unpack(packed), *args, **kw)
-
     #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
     def __invert__(self):
-        return self.asIP(~self._getIPNumber())
+        # mask to the address width rather than producing a negative long
+        return self.fromNumber(~self._getIPNumber() & self.max)
 
     def __and__(self, other):
-        return self.asIP(self._getIPNumber() & long(other))
+        return self.fromNumber(self._getIPNumber() & long(other))
     def __or__(self, other):
-        return self.asIP(self._getIPNumber() | long(other))
+        return self.fromNumber(self._getIPNumber() | long(other))
     def __xor__(self, other):
-        return self.asIP(self._getIPNumber() ^ long(other))
+        return self.fromNumber(self._getIPNumber() ^ long(other))
 
     def __rand__(self, other):
-        return self.asIP(long(other) & self._getIPNumber())
+        return self.fromNumber(long(other) & self._getIPNumber())
     def __ror__(self, other):
-        return self.asIP(long(other) | self._getIPNumber())
+        return self.fromNumber(long(other) | self._getIPNumber())
     def __rxor__(self, other):
-        return self.asIP(long(other) ^ self._getIPNumber())
+        return self.fromNumber(long(other) ^ self._getIPNumber())
+
+    #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    _ipClass = None
+    def classify(self):
+        ipClass = self._ipClass
+        if ipClass is None:
+            ipClass = classifyNumber(self.afamily, self._getIPNumber())
+            self._ipClass = ipClass
+        return ipClass
+
+    def isUnspecified(self):
+        return bool(self.classify() & ipclass.IPC_UNSPECIFIED)
+    def isLoopback(self):
+        return bool(self.classify() & ipclass.IPC_LOOPBACK)
+    def isPrivate(self):
+        return bool(self.classify() & (ipclass.IPC_PRIVATE | ipclass.IPC_ULA))
+    def isLinkLocal(self):
+        return bool(self.classify() & ipclass.IPC_LINK_LOCAL)
+    def isULA(self):
+        return bool(self.classify() & ipclass.IPC_ULA)
+    def isMulticast(self):
+        return bool(self.classify() & ipclass.IPC_MULTICAST)
+    def isDocumentation(self):
+        return bool(self.classify() & ipclass.IPC_DOCUMENTATION)
+    def isShared(self):
+        return bool(self.classify() & ipclass.IPC_SHARED)
+    def isReserved(self):
+        return bool(self.classify() & (ipclass.IPC_RESERVED | ipclass.IPC_IETF_PROTOCOL | ipclass.IPC_DISCARD))
+    def isGlobal(self):
+        return not (self.classify() & ipclass.IPC_NOT_GLOBAL)
+    def multicastScope(self):
+        return ipclass.multicastScope(self.afamily, self._getIPNumber())
 
     #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
     def inNetwork(self, ipaddr0, *ipaddrs):
         ipn = self._getIPNumber()
-        network = ipaddr0 & ipn
+        network = long(ipaddr0) & ipn
         for eachAddr in ipaddrs:
-            if network != (eachAddr & ipn):
+            if network != (long(eachAddr) & ipn):
                 return False
         return True
 
+    def asPrefixLen(self):
+        """Prefix length of a contiguous netmask, else None"""
+        return self._prefixLens.get(self._getIPNumber())
+
+    #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    # Only the family, number and netmask flag are pickled; the text and
+    # packed forms are rebuilt on demand by the receiving process.
+
+    def __reduce__(self):
+        return (_unpickleIP, self._pickleArgs())
+    def _pickleArgs(self):
+        if self._isNetmask:
+            return (self.byteCount, self._getIPNumber(), True)
+        return (self.byteCount, self._getIPNumber())
+
 #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
 class IPv4(IPBase):
     afamily = AF_INET
     max = (1L<<32) - 1
     byteCount = 4
+    _packNumber = staticmethod(_packV4)
+    _unpackNumber = staticmethod(_unpackV4)
 
     _shortNetmasks = {}
     for i in xrange(0, 33):
-        _shortNetmasks[max & ~((1L<<i)-1)] = i
+        _shortNetmasks[max & ~((1L<<i)-1)] = 32 - i
+    _prefixLens = _shortNetmasks
 
     #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
@@ -196,10 +368,68 @@ class IPv6(IPBase):
     afamily = AF_INET6
     max = (1L<<128) - 1
     byteCount = 16
+    _packNumber = staticmethod(_packV6)
+    _unpackNumber = staticmethod(_unpackV6)
 
     _shortNetmasks = {}
     for i in xrange(0, 129):
-        _shortNetmasks[max & ~((1L<<i)-1)] = i
+        _shortNetmasks[max & ~((1L<<i)-1)] = 128 - i
+    _prefixLens = _shortNetmasks
+
+    #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    @classmethod
+    def fromPacked(klass, packed, isNetmask=False, scopeId=None):
+        self = super(IPv6, klass).fromPacked(packed, isNetmask)
+        if scopeId:
+            self._scopeId = scopeId
+        return self
+
+    def normalize(self):
+        result = IPBase.normalize(self)
+        if result is not self:
+            result._zone = self._zone
+            result._scopeId = self._scopeId
+        return result
+
+    # The zone of 'fe80::1%eth0' is kept apart from the address text; a
+    # numeric zone is used as the scope id directly, while an interface name
+    # is only resolved to its index when a sockaddr is first needed.
+
+    _zone = None
+    def _setIP(self, ip):
+        if isinstance(ip, basestring) and '%' in ip:
+            ip, self._zone = ip.split('%', 1)
+        IPBase._setIP(self, ip)
+
+    def getZone(self):
+        return self._zone
+    zone = property(getZone)
+
+    _scopeId = None
+    def getScopeId(self):
+        scopeId = self._scopeId
+        if scopeId is None:
+            zone = self._zone
+            if not zone:
+                scopeId = 0
+            elif zone.isdigit():
+                scopeId = int(zone)
+            else:
+                import netif
+                scopeId = netif.getIFIndex(zone) or 0
+            self._scopeId = scopeId
+        return scopeId
+    scopeId = property(getScopeId)
+
+    def _sockaddr(self, port, flowinfo):
+        return (self._getIP(), port, flowinfo, self.getScopeId())
+
+    def _pickleArgs(self):
+        args = IPBase._pickleArgs(self)
+        if self._zone or self._scopeId:
+            args = args[:2] + (self._isNetmask, self._zone, self._scopeId)
+        return args
 
     #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
@@ -209,6 +439,8 @@ class IPv6(IPBase):
             if result is not None:
                 return str(result)
 
+        if self._zone:
+            return '%s%%%s' % (self._getIP(), self._zone)
         return self._getIP()
 
 _IPbyFamily[IPv6.afamily] = IPv6
@@ -218,6 +450,8 @@ _IPbyFamily[IPv6.afamily] = IPv6
 #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
 class IPNetBase(object):
+    _reservesNetworkAndBroadcast = False
+
     def __init__(self, ip, netmask=None):
         self.setIP(ip, netmask)
 
@@ -229,7 +463,7 @@ class IPNetBase(object):
     def __unicode__(self):
         return unicode(self.asStr(False, False))
 
-    def sockaddr(self, port, *args, **kw):
+    def sockaddr(self, port=None, *args, **kw):
         return self.ip.sockaddr(port, *args, **kw)
 
     def normalize(self):
@@ -241,6 +475,8 @@ class IPNetBase(object):
         if netmask is not None:
             netmask = netmask.normalize()
 
+        if ip is self.ip and netmask is self.netmask:
+            return self
         return self.asIPNet(ip, netmask)
 
     def asStr(self, short=True, incNetmask=True):
@@ -255,6 +491,7 @@ class IPNetBase(object):
     def setIP(self, ip, netmask=None):
         ip, netmask = self._splitIPandNetmask(ip, netmask)
         self._ip = self.asIP(ip, isNetmask=False)
+        self._resetDerived()
         if netmask:
             self.setNetmask(netmask)
     ip = property(getIP, setIP)
@@ -263,26 +500,139 @@ class IPNetBase(object):
     def getNetmask(self):
         return self._netmask
     def setNetmask(self, netmask):
-        self._netmask = self.asIP(netmask, isNetmask=True)
+        self._netmask = self.asIP(netmask, isNetmask=True).asNetmask()
+        self._resetDerived()
     netmask = property(getNetmask, setNetmask)
 
+    # The integer forms of the network are computed together on first use
+    # and kept until the address or netmask is replaced; range checks and
+    # ordering work on them directly.
+
+    _derived = None
+    _derivedIPs = None
+    def _resetDerived(self):
+        self._derived = None
+        self._derivedIPs = None
+
+    def _getDerived(self):
+        derived = self._derived
+        if derived is None:
+            derived = self._derive()
+            self._derived = derived
+        return derived
+
+    def _derive(self):
+        ip, netmask = self._ip, self._netmask
+        IP = ip.__class__
+        n = ip._getIPNumber()
+        if netmask is None:
+            mask = IP.max
+            prefixLen = 8*IP.byteCount
+        else:
+            mask = netmask._getIPNumber()
+            prefixLen = netmask.asPrefixLen()
+            if prefixLen is None:
+                prefixLen = bin(mask).count('1')
+        network = n & mask
+        broadcast = network | (IP.max ^ mask)
+        return (n, prefixLen, network, broadcast)
+
+    def getIPNumber(self):
+        return self._getDerived()[0]
+    ipNumber = property(getIPNumber)
+
+    def getPrefixLen(self):
+        return self._getDerived()[1]
+    prefixLen = property(getPrefixLen)
+
+    def getNetworkNumber(self):
+        return self._getDerived()[2]
+    networkNumber = property(getNetworkNumber)
+
+    def getBroadcastNumber(self):
+        return self._getDerived()[3]
+    broadcastNumber = property(getBroadcastNumber)
+
+    def getLocalNumber(self):
+        n, prefixLen, network, broadcast = self._getDerived()
+        return n & (broadcast ^ network)
+    localNumber = property(getLocalNumber)
+
+    def getHostCount(self):
+        n, prefixLen, network, broadcast = self._getDerived()
+        count = broadcast - network + 1
+        if self._reservesNetworkAndBroadcast and count > 2:
+            count -= 2
+        return count
+    hostCount = property(getHostCount)
+
+    def getFirstHostNumber(self):
+        n, prefixLen, network, broadcast = self._getDerived()
+        if self._reservesNetworkAndBroadcast and broadcast - network > 1:
+            return network + 1
+        return network
+    firstHostNumber = property(getFirstHostNumber)
+
+    def getLastHostNumber(self):
+        n, prefixLen, network, broadcast = self._getDerived()
+        if self._reservesNetworkAndBroadcast and broadcast - network > 1:
+            return broadcast - 1
+        return broadcast
+    lastHostNumber = property(getLastHostNumber)
+
+    def _cachedIP(self, key, numberFn):
+        cache = self._derivedIPs
+        if cache is None:
+            cache = self._derivedIPs = {}
+        ip = cache.get(key)
+        if ip is None:
+            ip = self._ip.fromNumber(numberFn(self))
+            cache[key] = ip
+        return ip
+
     def getNetwork(self):
-        return self.ip & self.netmask
+        return self._cachedIP('network', IPNetBase.getNetworkNumber)
     network = property(getNetwork)
 
     def getLocal(self):
-        return self.ip & ~self.netmask
+        return self._cachedIP('local', IPNetBase.getLocalNumber)
     local = property(getLocal)
 
     def getBroadcast(self):
-        return self.netmask & self.ip | ~self.netmask
+        return self._cachedIP('broadcast', IPNetBase.getBroadcastNumber)
     broadcast = property(getBroadcast)
 
+    def getFirstHost(self):
+        return self._cachedIP('firstHost', IPNetBase.getFirstHostNumber)
+    firstHost = property(getFirstHost)
+
+    def getLastHost(self):
+        return self._cachedIP('lastHost', IPNetBase.getLastHostNumber)
+    lastHost = property(getLastHost)
+
     #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
     @classmethod
     def asIPNet(klass, ip, netmask=None):
         return klass(ip, netmask)
+
+    @classmethod
+    def fromPacked(klass, packed, prefixLen=None):
+        self = klass.__new__(klass)
+        IP = _IPbyFamily[klass.afamily]
+        self._ip = IP.fromPacked(packed)
+        if prefixLen is not None:
+            self._netmask = IP.fromPrefixLen(prefixLen)
+        return self
+
+    @classmethod
+    def fromNumber(klass, ipNumber, prefixLen=None):
+        self = klass.__new__(klass)
+        IP = _IPbyFamily[klass.afamily]
+        self._ip = IP.fromNumber(ipNumber)
+        if prefixLen is not None:
+            self._netmask = IP.fromPrefixLen(prefixLen)
+        return self
     @classmethod
     def asIP(klass, ip, isNetmask=False):
         if hasattr(ip, 'getIP'):
@@ -307,12 +657,50 @@ class IPNetBase(object):
 
     def contains(self, ipOther):
         ipOther = self.asIP(ipOther)
-        return self.getNetmask().inNetwork(self.getIP(), ipOther)
+        if ipOther.afamily != self.afamily:
+            return False
+        n, prefixLen, network, broadcast = self._getDerived()
+        return network <= ipOther._getIPNumber() <= broadcast
     __contains__ = contains
 
+    def sortKey(self):
+        n, prefixLen, network, broadcast = self._getDerived()
+        return (self.afamily, network, prefixLen, n)
+
+    def __lt__(self, other):
+        if not isinstance(other, IPNetBase):
+            return NotImplemented
+        return self.sortKey() < other.sortKey()
+    def __le__(self, other):
+        if not isinstance(other, IPNetBase):
+            return NotImplemented
+        return self.sortKey() <= other.sortKey()
+    def __gt__(self, other):
+        if not isinstance(other, IPNetBase):
+            return NotImplemented
+        return self.sortKey() > other.sortKey()
+    def __ge__(self, other):
+        if not isinstance(other, IPNetBase):
+            return NotImplemented
+        return self.sortKey() >= other.sortKey()
+
     def __hash__(self):
         return hash((self.getIP(), self.getNetmask()))
 
+    def __reduce__(self):
+        ip, netmask = self._ip, self._netmask
+        if netmask is None:
+            args = (ip.byteCount, ip._getIPNumber())
+        else:
+            prefixLen = netmask.asPrefixLen()
+            if prefixLen is None:
+                # non-contiguous netmask
+                prefixLen = netmask
+            args = (ip.byteCount, ip._getIPNumber(), prefixLen)
+        if isinstance(ip, IPv6) and (ip._zone or ip._scopeId):
+            args = (ip.byteCount, ip) + args[2:]
+        return (_unpickleIPNet, args)
+
     def __eq__(self, other):
         if isinstance(other, IPBase):
             return self.ip == other
@@ -328,6 +716,7 @@ class IPNetBase(object):
 
 class IPNetv4(IPNetBase):
     afamily = IPv4.afamily
+    _reservesNetworkAndBroadcast = True
     IPFactory = IPv4.asIP
 _IPNetbyFamily[None] = IPv4
 _IPNetbyFamily[IPv4.afamily] = IPNetv4
@@ -342,15 +731,19 @@ _IPNetbyFamily[IPv6.afamily] = IPNetv6
 #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
 def guessIPFamily(ip):
-    if ip.count(':') >= 2:
-        return AF_INET6
-    elif ip.count('.') == 3:
-        return AF_INET
-    else:
+    afamily = familyOf(ip)
+    if afamily == AF_INVALID and '/' in ip:
+        afamily = familyOf(ip.split('/', 1)[0])
+    if afamily == AF_INVALID:
         raise ValueError("IP %r does not appear to be a valid ip address" % (ip,))
+    return afamily
 
 def ip(ip, isNetmask=False, afamily=None):
-    if afamily is None:
+    if isinstance(ip, IPBase):
+        return ip
+    elif isinstance(ip, IPNetBase):
+        return ip.ip
+    elif afamily is None:
         afamily = guessIPFamily(ip)
 
     factory = _IPbyFamily[afamily] 
@@ -358,13 +751,51 @@ def ip(ip, isNetmask=False, afamily=None):
 asIP = ip
 
 def ipnet(ip, netmask=None, afamily=None):
-    if afamily is None:
+    if isinstance(ip, IPNetBase) and netmask is None:
+        return ip
+    elif isinstance(ip, IPBase):
+        afamily = ip.afamily
+    elif afamily is None:
         afamily = guessIPFamily(ip)
 
     factory = _IPNetbyFamily[afamily] 
     return factory(ip, netmask).normalize()
 asIPNet = ipnet
 
+_IPbyPackedLen = {4: IPv4, 16: IPv6}
+_IPNetbyPackedLen = {4: IPNetv4, 16: IPNetv6}
+
+def ipFromPacked(packed, isNetmask=False):
+    return _IPbyPackedLen[len(packed)].fromPacked(packed, isNetmask)
+
+def ipnetFromPacked(packed, prefixLen=None):
+    if not isinstance(packed, str):
+        packed, prefixLen = packed
+    return _IPNetbyPackedLen[len(packed)].fromPacked(packed, prefixLen)
+
+_IPbyByteCount = {4: IPv4, 16: IPv6}
+_IPNetbyByteCount = {4: IPNetv4, 16: IPNetv6}
+
+def _unpickleIP(byteCount, ipNumber, isNetmask=False, zone=None, scopeId=None):
+    self = _IPbyByteCount[byteCount].fromNumber(ipNumber, isNetmask)
+    if zone:
+        self._zone = zone
+    if scopeId:
+        self._scopeId = scopeId
+    return self
+
+def _unpickleIPNet(byteCount, ip, prefixLen=None):
+    klass = _IPNetbyByteCount[byteCount]
+    self = klass.__new__(klass)
+    if isinstance(ip, IPBase):
+        self._ip = ip
+    else: self._ip = _IPbyByteCount[byteCount].fromNumber(ip)
+    if isinstance(prefixLen, IPBase):
+        self._netmask = prefixLen
+    elif prefixLen is not None:
+        self._netmask = self._ip.fromPrefixLen(prefixLen)
+    return self
+
 #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 #~ Main 
 #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
@@ -0,0 +1,396 @@
+#!/usr/bin/env python
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+##~ Copyright (C) 2002-2007  TechGame Networks, LLC.              ##
+##~                                                               ##
+##~ This library is free software; you can redistribute it        ##
+##~ and/or modify it under the terms of the BSD style License as  ##
+##~ found in the LICENSE file included with this distribution.    ##
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+
+"""Hands out addresses from an IPNet pool.
+
+Pools of up to bitmapLimit addresses keep one free bit per address; the
+next free address is found by a C speed scan for a non-zero byte from a
+cursor that only wraps once the end is reached.  Larger pools, such as an
+IPv6 /64, keep a high water mark below which everything has been handed
+out, the released addresses, and the addresses taken out of order, so their
+state grows with use rather than with the pool.  Released addresses are
+reused first in both.
+"""
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Imports
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+import os
+import re
+import zlib
+import struct
+
+from ip import asIPNet, asIP, IPBase, IPNetBase, IPv6, ipnetFromPacked
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Constants / Variables / Etc.
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+bitmapLimit = 1 << 24
+
+_magic = 'IPA1'
+_header = struct.Struct('<4sBBB')
+_flagReserve = 0x01
+_flagSparse = 0x02
+
+_u32 = struct.Struct('<I')
+_packOffset = IPv6._packNumber
+_unpackOffset = IPv6._unpackNumber
+
+_nonZeroByte = re.compile('[^\x00]')
+_lowBit = [(b & -b).bit_length() - 1 for b in xrange(256)]
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Pools
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class PoolExhausted(LookupError):
+    pass
+
+class BitmapPool(object):
+    """Free set of offsets 0..size-1 as a bitmap, one set bit per free offset"""
+
+    def __init__(self, size):
+        self.size = size
+        nbytes = (size + 7) >> 3
+        self.bitmap = bytearray('\xff' * nbytes)
+        if size & 7:
+            self.bitmap[-1] = (1 << (size & 7)) - 1
+        self.free = size
+        self.cursor = 0
+        self.released = []
+
+    def isFree(self, offset):
+        return bool(self.bitmap[offset >> 3] & (1 << (offset & 7)))
+
+    def take(self, offset):
+        bit = 1 << (offset & 7)
+        if not (self.bitmap[offset >> 3] & bit):
+            return False
+        self.bitmap[offset >> 3] ^= bit
+        self.free -= 1
+        return True
+
+    def put(self, offset):
+        bit = 1 << (offset & 7)
+        if self.bitmap[offset >> 3] & bit:
+            return False
+        self.bitmap[offset >> 3] |= bit
+        self.free += 1
+        self.released.append(offset)
+        return True
+
+    def _nextFreeByte(self):
+        m = _nonZeroByte.search(self.bitmap, self.cursor)
+        if m is None:
+            m = _nonZeroByte.search(self.bitmap, 0, self.cursor)
+        self.cursor = m.start()
+        return self.cursor
+
+    def allocate(self, count=1):
+        if count > self.free:
+            raise PoolExhausted("%d addresses requested, %d free" % (count, self.free))
+
+        result = []
+        released, bitmap = self.released, self.bitmap
+        while released and len(result) < count:
+            offset = released.pop()
+            if self.take(offset):
+                result.append(offset)
+
+        while len(result) < count:
+            i = self._nextFreeByte()
+            byte = bitmap[i]
+            n = len(result)
+            while byte and len(result) < count:
+                bit = _lowBit[byte]
+                byte ^= 1 << bit
+                result.append((i << 3) | bit)
+            bitmap[i] = byte
+            self.free -= len(result) - n
+        return result
+
+    def iterTaken(self):
+        bitmap = self.bitmap
+        for i in xrange(len(bitmap)):
+            byte = bitmap[i]
+            if byte != 0xff:
+                for bit in xrange(8):
+                    offset = (i << 3) | bit
+                    if not (byte & (1 << bit)) and offset < self.size:
+                        yield offset
+
+    def dumps(self):
+        return _u32.pack(self.cursor) + zlib.compress(str(self.bitmap))
+
+    @classmethod
+    def loads(klass, size, data):
+        self = klass.__new__(klass)
+        self.size = size
+        self.cursor, = _u32.unpack_from(data, 0)
+        self.bitmap = bytearray(zlib.decompress(data[_u32.size:]))
+        self.free = sum(bin(b).count('1') for b in self.bitmap)
+        self.released = []
+        return self
+
+class SparsePool(object):
+    """Free set of offsets 0..size-1 kept as a high water mark, with the
+    released offsets below it and the offsets taken above it"""
+
+    def __init__(self, size):
+        self.size = size
+        self.next = 0
+        self.released = []
+        self.releasedSet = set()
+        self.taken = set()
+        self.free = size
+
+    def isFree(self, offset):
+        if offset >= self.next:
+            return offset not in self.taken
+        return offset in self.releasedSet
+
+    def take(self, offset):
+        if offset >= self.next:
+            if offset in self.taken:
+                return False
+            self.taken.add(offset)
+        elif offset in self.releasedSet:
+            # left in the released list, and skipped when popped
+            self.releasedSet.remove(offset)
+        else:
+            return False
+        self.free -= 1
+        return True
+
+    def put(self, offset):
+        if offset >= self.next:
+            if offset not in self.taken:
+                return False
+            self.taken.remove(offset)
+        elif offset in self.releasedSet:
+            return False
+        else:
+            self.releasedSet.add(offset)
+            self.released.append(offset)
+        self.free += 1
+        return True
+
+    def allocate(self, count=1):
+        if count > self.free:
+            raise PoolExhausted("%d addresses requested, %d free" % (count, self.free))
+
+        result = []
+        released, releasedSet = self.released, self.releasedSet
+        while released and len(result) < count:
+            offset = released.pop()
+            if offset in releasedSet:
+                releasedSet.remove(offset)
+                result.append(offset)
+
+        taken = self.taken
+        while len(result) < count:
+            offset = self.next
+            self.next += 1
+            if offset in taken:
+                taken.remove(offset)
+            else: result.append(offset)
+        self.free -= len(result)
+        return result
+
+    def iterTaken(self):
+        releasedSet = self.releasedSet
+        offset = 0
+        while offset < self.next:
+            if offset not in releasedSet:
+                yield offset
+            offset += 1
+        for offset in sorted(self.taken):
+            yield offset
+
+    def dumps(self):
+        released = sorted(self.releasedSet)
+        parts = [_packOffset(self.next), _u32.pack(len(released))]
+        parts.extend(_packOffset(o) for o in released)
+        parts.append(_u32.pack(len(self.taken)))
+        parts.extend(_packOffset(o) for o in sorted(self.taken))
+        return zlib.compress(''.join(parts))
+
+    @classmethod
+    def loads(klass, size, data):
+        data = zlib.decompress(data)
+        self = klass(size)
+        width = 16
+        self.next = _unpackOffset(data[:width])
+        offset = width
+
+        count, = _u32.unpack_from(data, offset)
+        offset += _u32.size
+        released = [_unpackOffset(data[i:i+width]) for i in xrange(offset, offset + count*width, width)]
+        offset += count*width
+        self.released = released[::-1]
+        self.releasedSet = set(released)
+
+        count, = _u32.unpack_from(data, offset)
+        offset += _u32.size
+        self.taken = set(_unpackOffset(data[i:i+width]) for i in xrange(offset, offset + count*width, width))
+
+        self.free = size - (self.next - len(self.releasedSet)) - len(self.taken)
+        return self
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Allocator
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class AddressAllocator(object):
+    """Allocates and releases the addresses of an IPNet.
+
+    The network and broadcast addresses are never handed out when
+    reserveNetworkAndBroadcast is true, which defaults to the IPNet's own
+    convention (IPv4 reserves them, IPv6 does not).
+    """
+
+    def __init__(self, ipnet, reserveNetworkAndBroadcast=None, poolFactory=None):
+        if not isinstance(ipnet, IPNetBase):
+            ipnet = asIPNet(ipnet)
+        if reserveNetworkAndBroadcast is None:
+            reserveNetworkAndBroadcast = ipnet._reservesNetworkAndBroadcast
+        self.ipnet = ipnet
+        self.IP = ipnet.ip.__class__
+        self.reserveNetworkAndBroadcast = reserveNetworkAndBroadcast
+
+        first, last = ipnet.networkNumber, ipnet.broadcastNumber
+        if reserveNetworkAndBroadcast and last - first > 1:
+            first, last = first + 1, last - 1
+        self.first, self.last = first, last
+        self.capacity = last - first + 1
+
+        if poolFactory is None:
+            if self.capacity <= bitmapLimit:
+                poolFactory = BitmapPool
+            else: poolFactory = SparsePool
+        self._pool = poolFactory(self.capacity)
+
+    def __repr__(self):
+        return '<%s %s %d/%d allocated>' % (self.__class__.__name__, self.ipnet.asStr(),
+                self.allocatedCount(), self.capacity)
+
+    def freeCount(self):
+        return self._pool.free
+    def allocatedCount(self):
+        return self.capacity - self._pool.free
+
+    def _offsetOf(self, ip):
+        if isinstance(ip, (int, long)):
+            n = ip
+        else:
+            if not isinstance(ip, IPBase):
+                ip = asIP(ip)
+            if ip.afamily != self.IP.afamily:
+                raise ValueError("%s is not in pool %s" % (ip, self.ipnet))
+            n = ip._getIPNumber()
+        if not (self.first <= n <= self.last):
+            raise ValueError("%s is not an allocatable address of %s" % (ip, self.ipnet))
+        return n - self.first
+
+    #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    def allocateNumbers(self, count=1):
+        first = self.first
+        return [first + offset for offset in self._pool.allocate(count)]
+
+    def allocateMany(self, count):
+        fromNumber = self.IP.fromNumber
+        return [fromNumber(n) for n in self.allocateNumbers(count)]
+
+    def allocate(self):
+        """Returns a free address, raising PoolExhausted when there is none"""
+        return self.IP.fromNumber(self.first + self._pool.allocate(1)[0])
+
+    def reserve(self, ip):
+        """Marks a specific address allocated; returns False if it already was"""
+        return self._pool.take(self._offsetOf(ip))
+
+    def release(self, ip):
+        """Returns an address to the pool; returns False if it was not allocated"""
+        return self._pool.put(self._offsetOf(ip))
+
+    def isAllocated(self, ip):
+        try:
+            offset = self._offsetOf(ip)
+        except ValueError:
+            return False
+        return not self._pool.isFree(offset)
+    __contains__ = isAllocated
+
+    def iterAllocated(self):
+        fromNumber, first = self.IP.fromNumber, self.first
+        for offset in self._pool.iterTaken():
+            yield fromNumber(first + offset)
+
+    #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    def dumps(self):
+        ipnet = self.ipnet
+        flags = 0
+        if self.reserveNetworkAndBroadcast:
+            flags |= _flagReserve
+        if isinstance(self._pool, SparsePool):
+            flags |= _flagSparse
+        header = _header.pack(_magic, self.IP.byteCount, ipnet.prefixLen, flags)
+        return header + ipnet.network.packed() + self._pool.dumps()
+
+    @classmethod
+    def loads(klass, data):
+        magic, byteCount, prefixLen, flags = _header.unpack_from(data, 0)
+        if magic != _magic:
+            raise ValueError("Not an address allocator state")
+        offset = _header.size
+        ipnet = ipnetFromPacked(data[offset:offset+byteCount], prefixLen)
+        offset += byteCount
+
+        Pool = flags & _flagSparse and SparsePool or BitmapPool
+        return klass(ipnet, bool(flags & _flagReserve),
+                lambda size: Pool.loads(size, data[offset:]))
+
+    def save(self, path):
+        # write aside and rename, so a crash never leaves a partial state
+        tmpPath = path + '.tmp'
+        with open(tmpPath, 'wb') as f:
+            f.write(self.dumps())
+        if os.name == 'nt' and os.path.exists(path):
+            os.remove(path)
+        os.rename(tmpPath, path)
+
+    @classmethod
+    def load(klass, path):
+        with open(path, 'rb') as f:
+            return klass.loads(f.read())
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Main
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+if __name__=='__main__':
+    import time
+
+    for pool in ('10.0.0.0/16', 'fd00::/64'):
+        alloc = AddressAllocator(pool)
+        start = time.time()
+        ips = alloc.allocateMany(50000)
+        for ip in ips[::2]:
+            alloc.release(ip)
+        for i in xrange(25000):
+            alloc.allocate()
+        elapsed = time.time() - start
+        print alloc, ips[0], ips[-1], '%.2fus per operation' % (elapsed/100000*1e6,)
+        print '  state %d bytes' % (len(alloc.dumps()),)
+        assert AddressAllocator.loads(alloc.dumps()).allocatedCount() == alloc.allocatedCount()
+
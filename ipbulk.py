@@ -0,0 +1,499 @@
+#!/usr/bin/env python
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+##~ Copyright (C) 2002-2007  TechGame Networks, LLC.              ##
+##~                                                               ##
+##~ This library is free software; you can redistribute it        ##
+##~ and/or modify it under the terms of the BSD style License as  ##
+##~ found in the LICENSE file included with this distribution.    ##
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+
+"""Sorting, deduplication and aggregation of large address collections.
+
+Addresses are held as integers in arrays -- one 32 bit array for IPv4, and
+parallel high/low 64 bit arrays for IPv6 -- and only turned back into IP
+objects when asked for.
+"""
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Imports
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+import array
+import bisect
+import heapq
+import struct
+import socket
+from socket import AF_INET, AF_INET6
+from itertools import groupby, izip
+
+if hasattr(socket, 'inet_pton'):
+    from socket import inet_pton
+else:
+    from .utils.inet import inet_pton
+
+from ip import IPBase, IPNetBase, IPv4, IPv6, IPNetv4, IPNetv6
+from ipfamily import familiesOf
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Constants / Variables / Etc.
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def _typecodeOfSize(size):
+    for code in 'BHILl':
+        if array.array(code).itemsize == size:
+            return code
+    return None
+
+_code32 = _typecodeOfSize(4)
+_code64 = _typecodeOfSize(8)
+
+_mask64 = (1L<<64) - 1
+_unpackV4 = struct.Struct('!L').unpack
+_unpackV6 = struct.Struct('!QQ').unpack
+
+# numbers sorted as Python ints at a time; about 40 MB of them
+sortChunkSize = 1 << 20
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Definitions
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def _words64():
+    if _code64 is not None:
+        return array.array(_code64)
+    # no 64 bit array type on this platform
+    return []
+
+def _columnLike(column, values=()):
+    if isinstance(column, array.array):
+        return array.array(column.typecode, values)
+    return list(values)
+
+def _spans(count, chunkSize):
+    return [(i, min(i + chunkSize, count)) for i in xrange(0, count, chunkSize)]
+
+def _iterSpan(column, start, end, step=4096):
+    for i in xrange(start, end, step):
+        for n in column[i:min(i + step, end)]:
+            yield n
+
+def _iterSpan128(hi, lo, start, end, step=4096):
+    for i in xrange(start, end, step):
+        j = min(i + step, end)
+        for h, l in izip(hi[i:j], lo[i:j]):
+            yield (h << 64) | l
+
+def sortColumn(column, chunkSize=None):
+    """Returns column sorted, itself when it fits in one chunk.
+
+    Each chunk is sorted in place, then the chunks are merged into a new
+    column; memory peaks at twice the column plus one chunk of ints.
+    """
+    chunkSize = chunkSize or sortChunkSize
+    spans = _spans(len(column), chunkSize)
+    for start, end in spans:
+        column[start:end] = _columnLike(column, sorted(column[start:end]))
+    if len(spans) <= 1:
+        return column
+
+    result = _columnLike(column)
+    result.extend(heapq.merge(*[_iterSpan(column, s, e) for s, e in spans]))
+    return result
+
+def sortColumns128(hi, lo, chunkSize=None):
+    """sortColumn() for 128 bit numbers split over high and low columns"""
+    chunkSize = chunkSize or sortChunkSize
+    spans = _spans(len(hi), chunkSize)
+    for start, end in spans:
+        chunk = sorted(_iterSpan128(hi, lo, start, end))
+        hi[start:end] = _columnLike(hi, (n >> 64 for n in chunk))
+        lo[start:end] = _columnLike(lo, (n & _mask64 for n in chunk))
+        del chunk
+    if len(spans) <= 1:
+        return hi, lo
+
+    resultHi, resultLo = _columnLike(hi), _columnLike(lo)
+    appendHi, appendLo = resultHi.append, resultLo.append
+    for n in heapq.merge(*[_iterSpan128(hi, lo, s, e) for s, e in spans]):
+        appendHi(n >> 64)
+        appendLo(n & _mask64)
+    return resultHi, resultLo
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class AddressArray(object):
+    """A compact collection of addresses of one family as integers.
+
+    Storage is 4 bytes per IPv4 and 16 per IPv6 address.  Sorting works
+    through the arrays sortChunkSize numbers at a time and peaks at twice
+    the array's size, e.g. about 800 MB for 100M IPv4 or 3.2 GB for 100M
+    IPv6 addresses; unique() and the counts stream over the sorted array
+    and only hold their results.
+    """
+
+    def __init__(self, afamily=AF_INET, numbers=()):
+        self.afamily = afamily
+        if afamily == AF_INET:
+            self.IP, self.IPNet, self.bits = IPv4, IPNetv4, 32
+            self._v4 = array.array(_code32)
+        elif afamily == AF_INET6:
+            self.IP, self.IPNet, self.bits = IPv6, IPNetv6, 128
+            self._hi = _words64()
+            self._lo = _words64()
+        else:
+            raise ValueError("Unsupported address family: %r" % (afamily,))
+        self.isSorted = True
+        self.extend(numbers)
+
+    @classmethod
+    def fromIPs(klass, ips, afamily=None):
+        """Builds an array from IP objects, all of afamily or else of the
+        first one's family; use splitByFamily for mixed input"""
+        ips = iter(ips)
+        if afamily is None:
+            first = next(ips, None)
+            if first is None:
+                return klass()
+            self = klass(first.afamily)
+            self.append(first)
+        else: self = klass(afamily)
+        self.extend(_numbersOf(ips, self.afamily))
+        return self
+
+    @classmethod
+    def fromTexts(klass, texts, afamily=AF_INET, strict=True):
+        """Parses address texts straight to integers.
+
+        With strict false, texts that are not addresses of afamily are
+        skipped rather than raising ValueError.
+        """
+        self = klass(afamily)
+        self.extend(parseNumbers(texts, afamily, strict))
+        return self
+
+    #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    def __len__(self):
+        if self.afamily == AF_INET:
+            return len(self._v4)
+        return len(self._hi)
+
+    def __iter__(self):
+        return self.iterNumbers()
+
+    def iterNumbers(self):
+        if self.afamily == AF_INET:
+            return iter(self._v4)
+        return ((hi << 64) | lo for hi, lo in izip(self._hi, self._lo))
+
+    def numberAt(self, i):
+        if self.afamily == AF_INET:
+            return self._v4[i]
+        return (self._hi[i] << 64) | self._lo[i]
+
+    def ipAt(self, i):
+        return self.IP.fromNumber(self.numberAt(i))
+    __getitem__ = ipAt
+
+    def iterIPs(self):
+        fromNumber = self.IP.fromNumber
+        return (fromNumber(n) for n in self.iterNumbers())
+    def asIPs(self):
+        return list(self.iterIPs())
+
+    def __repr__(self):
+        return '<%s %d %s addresses%s>' % (self.__class__.__name__, len(self),
+                self.IP.__name__, self.isSorted and ', sorted' or '')
+
+    def __reduce__(self):
+        # arrays pickle as lists of numbers; ship their raw bytes instead
+        if self.afamily == AF_INET:
+            columns = (_arrayBytes(self._v4),)
+        else: columns = (_arrayBytes(self._hi), _arrayBytes(self._lo))
+        return (_unpickleAddressArray, (self.afamily, self.isSorted) + columns)
+
+    #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    def append(self, ip):
+        if isinstance(ip, IPBase):
+            if ip.afamily != self.afamily:
+                raise ValueError("Address %s is not of this array's family" % (ip,))
+            ip = ip._getIPNumber()
+        self.extend((ip,))
+
+    def extend(self, numbers):
+        if self.afamily == AF_INET:
+            self._v4.extend(numbers)
+        else:
+            hi, lo = self._hi, self._lo
+            for n in numbers:
+                hi.append(n >> 64)
+                lo.append(n & _mask64)
+        if len(self) > 1:
+            self.isSorted = False
+
+    def _setNumbers(self, numbers, isSorted):
+        if self.afamily == AF_INET:
+            self._v4 = array.array(_code32, numbers)
+        else:
+            self._hi = _words64()
+            self._lo = _words64()
+            self.extend(numbers)
+        self.isSorted = isSorted
+
+    def _copyWith(self, numbers, isSorted):
+        result = self.__class__(self.afamily)
+        result._setNumbers(numbers, isSorted)
+        return result
+
+    #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    def sort(self, chunkSize=None):
+        """Sorts in place in bounded memory; see sortColumn()"""
+        if not self.isSorted:
+            if self.afamily == AF_INET:
+                self._v4 = sortColumn(self._v4, chunkSize)
+            else: self._hi, self._lo = sortColumns128(self._hi, self._lo, chunkSize)
+            self.isSorted = True
+        return self
+
+    def sortedNumbers(self):
+        return self.sort().iterNumbers()
+
+    def unique(self):
+        """Sorted copy without duplicates"""
+        return self._copyWith((k for k, g in groupby(self.sortedNumbers())), True)
+
+    def counts(self):
+        """[(number, occurrences)] in address order"""
+        return [(k, sum(1 for _ in g)) for k, g in groupby(self.sortedNumbers())]
+
+    def countDistinct(self):
+        return sum(1 for _ in groupby(self.sortedNumbers()))
+
+    def groupByPrefix(self, prefixLen, asIPNets=False):
+        """[(network, address count)] for the prefixLen networks present,
+        with the network as an integer or, on request, as an IPNet"""
+        shift = self.bits - prefixLen
+        result = [(k << shift, sum(1 for _ in g))
+                    for k, g in groupby(self.sortedNumbers(), lambda n: n >> shift)]
+        if asIPNets:
+            fromNumber = self.IPNet.fromNumber
+            result = [(fromNumber(n, prefixLen), c) for n, c in result]
+        return result
+
+    def __contains__(self, ip):
+        if isinstance(ip, IPBase):
+            if ip.afamily != self.afamily:
+                return False
+            ip = ip._getIPNumber()
+        if not self.isSorted:
+            return any(n == ip for n in self.iterNumbers())
+        if self.afamily == AF_INET:
+            i = bisect.bisect_left(self._v4, ip)
+            return i < len(self._v4) and self._v4[i] == ip
+
+        hi, lo = ip >> 64, ip & _mask64
+        i = bisect.bisect_left(self._hi, hi)
+        j = bisect.bisect_right(self._hi, hi, i)
+        k = bisect.bisect_left(self._lo, lo, i, j)
+        return k < j and self._lo[k] == lo
+
+def _numbersOf(ips, afamily):
+    for ip in ips:
+        if ip.afamily != afamily:
+            raise ValueError("Address %s is not of this array's family" % (ip,))
+        yield long(ip)
+
+def _arrayBytes(column):
+    if isinstance(column, array.array):
+        return (column.typecode, column.tostring())
+    return (None, column)
+
+def _arrayFromBytes(column):
+    typecode, data = column
+    if typecode is None:
+        return data
+    column = array.array(typecode)
+    column.fromstring(data)
+    return column
+
+def _unpickleAddressArray(afamily, isSorted, *columns):
+    self = AddressArray(afamily)
+    if afamily == AF_INET:
+        self._v4, = map(_arrayFromBytes, columns)
+    else: self._hi, self._lo = map(_arrayFromBytes, columns)
+    self.isSorted = isSorted
+    return self
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def parseNumbers(texts, afamily=AF_INET, strict=True):
+    """Yields the integer of each address text of afamily"""
+    if afamily == AF_INET:
+        unpack = _unpackV4
+        for text in texts:
+            try:
+                yield unpack(inet_pton(AF_INET, text))[0]
+            except (socket.error, ValueError, TypeError):
+                if strict:
+                    raise ValueError("%r is not an IPv4 address" % (text,))
+    elif afamily == AF_INET6:
+        unpack = _unpackV6
+        for text in texts:
+            if '%' in text:
+                text = text.split('%', 1)[0]
+            try:
+                hi, lo = unpack(inet_pton(AF_INET6, text))
+            except (socket.error, ValueError, TypeError):
+                if strict:
+                    raise ValueError("%r is not an IPv6 address" % (text,))
+                continue
+            yield (hi << 64) | lo
+    else:
+        raise ValueError("Unsupported address family: %r" % (afamily,))
+
+def parseTexts(texts, strict=True):
+    """Splits address texts of both families into {afamily: AddressArray}"""
+    texts = list(texts)
+    families = familiesOf(texts)
+    result = {}
+    for afamily in (AF_INET, AF_INET6):
+        selected = [t for t, f in izip(texts, families) if f == afamily]
+        if selected:
+            result[afamily] = AddressArray.fromTexts(selected, afamily)
+    if strict and sum(len(a) for a in result.itervalues()) != len(texts):
+        bad = [t for t, f in izip(texts, families) if f not in (AF_INET, AF_INET6)]
+        raise ValueError("%r is not an IP address" % (bad[0],))
+    return result
+
+def splitByFamily(ips):
+    """Splits IP objects into {afamily: AddressArray}"""
+    result = {}
+    for ip in ips:
+        arr = result.get(ip.afamily)
+        if arr is None:
+            arr = result[ip.afamily] = AddressArray(ip.afamily)
+        arr.append(ip)
+    return result
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Packed Lists
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+# Each item is a tag byte followed by the packed address and, for networks,
+# a prefix length byte; netmasks that are not a prefix follow packed, then
+# an IPv6 zone as a length byte and the zone text, or a kernel scope id.
+_tagV6 = 0x01
+_tagNet = 0x02
+_tagNetmask = 0x04
+_tagMaskPacked = 0x08
+_tagZone = 0x10
+_tagScopeId = 0x20
+
+_noPrefix = 0xff
+_scopeId = struct.Struct('!L')
+
+def _packItem(item, out):
+    if isinstance(item, IPNetBase):
+        ip, netmask = item.ip, item.netmask
+        tag = _tagNet
+    else:
+        ip, netmask = item, None
+        tag = ip._isNetmask and _tagNetmask or 0
+    if ip.afamily == AF_INET6:
+        tag |= _tagV6
+        zone, scopeId = ip._zone, ip._scopeId
+        if zone:
+            tag |= _tagZone
+        elif scopeId:
+            tag |= _tagScopeId
+
+    prefixLen = _noPrefix
+    if netmask is not None:
+        prefixLen = netmask.asPrefixLen()
+        if prefixLen is None:
+            tag |= _tagMaskPacked
+
+    out.append(chr(tag))
+    out.append(ip.packed())
+    if tag & _tagNet:
+        if tag & _tagMaskPacked:
+            out.append(netmask.packed())
+        else: out.append(chr(prefixLen))
+    if tag & _tagZone:
+        out.append(chr(len(zone)))
+        out.append(zone)
+    elif tag & _tagScopeId:
+        out.append(_scopeId.pack(scopeId))
+
+def packIPs(items):
+    """Packs IP and IPNet objects into one string"""
+    out = []
+    for item in items:
+        _packItem(item, out)
+    return ''.join(out)
+
+def iterUnpackIPs(data):
+    offset, end = 0, len(data)
+    while offset < end:
+        tag = ord(data[offset])
+        offset += 1
+        IP = tag & _tagV6 and IPv6 or IPv4
+        width = IP.byteCount
+        ip = IP.fromPacked(data[offset:offset+width], bool(tag & _tagNetmask))
+        offset += width
+
+        netmask = None
+        if tag & _tagNet:
+            if tag & _tagMaskPacked:
+                netmask = IP.fromPacked(data[offset:offset+width], True)
+                offset += width
+            else:
+                prefixLen = ord(data[offset])
+                offset += 1
+                if prefixLen != _noPrefix:
+                    netmask = IP.fromPrefixLen(prefixLen)
+
+        if tag & _tagZone:
+            length = ord(data[offset])
+            ip._zone = data[offset+1:offset+1+length]
+            offset += 1 + length
+        elif tag & _tagScopeId:
+            ip._scopeId, = _scopeId.unpack_from(data, offset)
+            offset += _scopeId.size
+
+        if tag & _tagNet:
+            IPNet = tag & _tagV6 and IPNetv6 or IPNetv4
+            net = IPNet.__new__(IPNet)
+            net._ip = ip
+            net._netmask = netmask
+            yield net
+        else: yield ip
+
+def unpackIPs(data):
+    return PackedIPList(iterUnpackIPs(data))
+
+class PackedIPList(list):
+    """A list of IP and IPNet objects that pickles as a single packed
+    string, for shipping large batches to worker processes"""
+
+    def __reduce__(self):
+        return (unpackIPs, (packIPs(self),))
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Main
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+if __name__=='__main__':
+    import random
+    import time
+
+    count = 1000000
+    addrs = AddressArray(AF_INET, (random.getrandbits(24) | (10 << 24) for i in xrange(count)))
+    start = time.time()
+    addrs.sort()
+    print 'sorted %d addresses in %.3fs' % (count, time.time() - start)
+    print 'distinct:', addrs.countDistinct()
+    print 'largest /16s:', sorted(addrs.groupByPrefix(16, True), key=lambda e: -e[1])[:3]
+
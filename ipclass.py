@@ -0,0 +1,141 @@
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+##~ Copyright (C) 2002-2007  TechGame Networks, LLC.              ##
+##~                                                               ##
+##~ This library is free software; you can redistribute it        ##
+##~ and/or modify it under the terms of the BSD style License as  ##
+##~ found in the LICENSE file included with this distribution.    ##
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Imports
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+import array
+import socket
+from socket import AF_INET, AF_INET6
+
+if hasattr(socket, 'inet_pton'):
+    from socket import inet_pton
+else:
+    from .utils.inet import inet_pton
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Constants / Variables / Etc.
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+IPC_UNSPECIFIED     = 0x0001
+IPC_LOOPBACK        = 0x0002
+IPC_PRIVATE         = 0x0004
+IPC_LINK_LOCAL      = 0x0008
+IPC_ULA             = 0x0010
+IPC_SITE_LOCAL      = 0x0020
+IPC_MULTICAST       = 0x0040
+IPC_BROADCAST       = 0x0080
+IPC_DOCUMENTATION   = 0x0100
+IPC_SHARED          = 0x0200
+IPC_BENCHMARK       = 0x0400
+IPC_RESERVED        = 0x0800
+IPC_IETF_PROTOCOL   = 0x1000
+IPC_DISCARD         = 0x2000
+IPC_V4MAPPED        = 0x4000
+IPC_NAT64           = 0x8000
+IPC_6TO4            = 0x10000
+IPC_TEREDO          = 0x20000
+
+# classes that RFC 6890 marks as not globally reachable
+IPC_NOT_GLOBAL = (IPC_UNSPECIFIED | IPC_LOOPBACK | IPC_PRIVATE | IPC_LINK_LOCAL
+        | IPC_ULA | IPC_SITE_LOCAL | IPC_BROADCAST | IPC_DOCUMENTATION | IPC_SHARED
+        | IPC_BENCHMARK | IPC_RESERVED | IPC_IETF_PROTOCOL | IPC_DISCARD | IPC_V4MAPPED)
+
+# RFC 6890 special purpose registries, plus multicast and site local
+_v4Ranges = [
+    ('0.0.0.0', 8, IPC_UNSPECIFIED),
+    ('10.0.0.0', 8, IPC_PRIVATE),
+    ('100.64.0.0', 10, IPC_SHARED),
+    ('127.0.0.0', 8, IPC_LOOPBACK),
+    ('169.254.0.0', 16, IPC_LINK_LOCAL),
+    ('172.16.0.0', 12, IPC_PRIVATE),
+    ('192.0.0.0', 24, IPC_IETF_PROTOCOL),
+    ('192.0.2.0', 24, IPC_DOCUMENTATION),
+    ('192.88.99.0', 24, IPC_6TO4),
+    ('192.168.0.0', 16, IPC_PRIVATE),
+    ('198.18.0.0', 15, IPC_BENCHMARK),
+    ('198.51.100.0', 24, IPC_DOCUMENTATION),
+    ('203.0.113.0', 24, IPC_DOCUMENTATION),
+    ('224.0.0.0', 4, IPC_MULTICAST),
+    ('240.0.0.0', 4, IPC_RESERVED),
+    ('255.255.255.255', 32, IPC_BROADCAST),
+    ]
+
+_v6Ranges = [
+    ('::', 128, IPC_UNSPECIFIED),
+    ('::1', 128, IPC_LOOPBACK),
+    ('::ffff:0:0', 96, IPC_V4MAPPED),
+    ('64:ff9b::', 96, IPC_NAT64),
+    ('100::', 64, IPC_DISCARD),
+    ('2001::', 23, IPC_IETF_PROTOCOL),
+    ('2001::', 32, IPC_TEREDO),
+    ('2001:2::', 48, IPC_BENCHMARK),
+    ('2001:10::', 28, IPC_RESERVED),
+    ('2001:db8::', 32, IPC_DOCUMENTATION),
+    ('2002::', 16, IPC_6TO4),
+    ('fc00::', 7, IPC_ULA),
+    ('fe80::', 10, IPC_LINK_LOCAL),
+    ('fec0::', 10, IPC_SITE_LOCAL),
+    ('ff00::', 8, IPC_MULTICAST),
+    ]
+
+_bitsByFamily = {AF_INET: 32, AF_INET6: 128}
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Definitions
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def _buildPrefixTable(afamily, ranges):
+    # [(shift, {network >> shift: classes})], one dict per distinct prefix length
+    bits = _bitsByFamily[afamily]
+    byShift = {}
+    for text, plen, ipClass in ranges:
+        packed = inet_pton(afamily, text)
+        n = long(packed.encode('hex'), 16)
+        shift = bits - plen
+        table = byShift.setdefault(shift, {})
+        table[n >> shift] = table.get(n >> shift, 0) | ipClass
+    return sorted(byShift.items())
+
+_prefixTables = {
+    AF_INET: _buildPrefixTable(AF_INET, _v4Ranges),
+    AF_INET6: _buildPrefixTable(AF_INET6, _v6Ranges),
+    }
+
+def classifyNumber(afamily, n):
+    ipClass = 0
+    for shift, table in _prefixTables[afamily]:
+        ipClass |= table.get(n >> shift, 0)
+    return ipClass
+
+def classifyNumbers(afamily, numbers):
+    """Returns an array of class bits, one per address number"""
+    prefixTables = _prefixTables[afamily]
+    result = array.array('L')
+    append = result.append
+    for n in numbers:
+        ipClass = 0
+        for shift, table in prefixTables:
+            ipClass |= table.get(n >> shift, 0)
+        append(ipClass)
+    return result
+
+def multicastScope(afamily, n):
+    """RFC 4291 style scope of a multicast address number, else None"""
+    if afamily == AF_INET6:
+        if (n >> 120) == 0xff:
+            return (n >> 112) & 0xf
+    elif afamily == AF_INET and (n >> 28) == 0xe:
+        if (n >> 8) == 0xe00000:
+            return 0x2
+        elif (n >> 24) == 239:
+            return 0x8
+        return 0xe
+    return None
+
@@ -0,0 +1,89 @@
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+##~ Copyright (C) 2002-2007  TechGame Networks, LLC.              ##
+##~                                                               ##
+##~ This library is free software; you can redistribute it        ##
+##~ and/or modify it under the terms of the BSD style License as  ##
+##~ found in the LICENSE file included with this distribution.    ##
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Imports
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+import re
+import array
+from socket import AF_INET, AF_INET6
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Constants / Variables / Etc.
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+AF_INVALID = 0
+
+def _buildPattern():
+    # strict dotted quad: no leading zeros, no short forms
+    octet = r'(?:25[0-5]|2[0-4][0-9]|1[0-9][0-9]|[1-9]?[0-9])'
+    ipv4 = r'%s(?:\.%s){3}' % (octet, octet)
+
+    # RFC 3986 IPv6address, with an optional zone id
+    h16 = r'[0-9A-Fa-f]{1,4}'
+    ls32 = r'(?:%s:%s|%s)' % (h16, h16, ipv4)
+    def head(n):
+        if n < 0: return ''
+        return r'(?:(?:%s:){0,%d}%s)?' % (h16, n, h16)
+    forms = [
+        r'(?:%s:){6}%s' % (h16, ls32),
+        r'::(?:%s:){5}%s' % (h16, ls32),
+        head(0) + r'::(?:%s:){4}%s' % (h16, ls32),
+        head(1) + r'::(?:%s:){3}%s' % (h16, ls32),
+        head(2) + r'::(?:%s:){2}%s' % (h16, ls32),
+        head(3) + r'::%s:%s' % (h16, ls32),
+        head(4) + r'::%s' % (ls32,),
+        head(5) + r'::%s' % (h16,),
+        head(6) + r'::',
+        ]
+    ipv6 = r'(?:%s)(?:%%[0-9A-Za-z_.\-]+)?' % ('|'.join(forms),)
+    return re.compile(r'(?:(?P<v4>%s)|(?P<v6>%s))\Z' % (ipv4, ipv6))
+
+_ipPattern = _buildPattern()
+_familyByGroup = {'v4': AF_INET, 'v6': AF_INET6}
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Definitions
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def familyOf(text, _match=_ipPattern.match):
+    """Returns AF_INET, AF_INET6 or AF_INVALID for an address text.
+
+    Never raises for malformed input; the text is validated strictly by a
+    single anchored match.
+    """
+    try:
+        m = _match(text)
+    except TypeError:
+        return AF_INVALID
+    if m is None:
+        return AF_INVALID
+    return _familyByGroup[m.lastgroup]
+
+def familiesOf(texts):
+    """Returns an array('B') with familyOf() for each text"""
+    match = _ipPattern.match
+    v4, v6 = AF_INET, AF_INET6
+    result = array.array('B')
+    append = result.append
+    for text in texts:
+        try:
+            m = match(text)
+        except TypeError:
+            m = None
+        if m is None:
+            append(AF_INVALID)
+        elif m.lastgroup == 'v4':
+            append(v4)
+        else: append(v6)
+    return result
+
+def isValidIP(text):
+    return familyOf(text) != AF_INVALID
+
@@ -0,0 +1,175 @@
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+##~ Copyright (C) 2002-2007  TechGame Networks, LLC.              ##
+##~                                                               ##
+##~ This library is free software; you can redistribute it        ##
+##~ and/or modify it under the terms of the BSD style License as  ##
+##~ found in the LICENSE file included with this distribution.    ##
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Imports
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+import re
+import struct
+
+try:
+    from socket import AF_LINK
+except ImportError:
+    AF_LINK = 18
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Constants / Variables / Etc.
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+_macSeparators = re.compile('[-:.]')
+
+def _unpackEUI48(packed):
+    hi, lo = struct.unpack('!HL', packed)
+    return (hi << 32) | lo
+def _unpackEUI64(packed):
+    return struct.unpack('!Q', packed)[0]
+_unpackByLength = {6: _unpackEUI48, 8: _unpackEUI64}
+
+def _packEUI48(n):
+    return struct.pack('!HL', n >> 32, n & 0xffffffff)
+def _packEUI64(n):
+    return struct.pack('!Q', n)
+_packByLength = {6: _packEUI48, 8: _packEUI64}
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Definitions
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class MACAddress(object):
+    """Link layer (EUI-48, EUI-64 or other length) address held as an integer"""
+
+    __slots__ = ['_n', 'byteCount']
+    afamily = AF_LINK
+
+    def __init__(self, mac, byteCount=6):
+        if isinstance(mac, (int, long)):
+            self._n = mac
+            self.byteCount = byteCount
+        elif isinstance(mac, MACAddress):
+            self._n = mac._n
+            self.byteCount = mac.byteCount
+        else:
+            digits = _macSeparators.sub('', mac)
+            if not digits or len(digits) & 1:
+                raise ValueError("Link address %r has an odd number of digits" % (mac,))
+            self._n = int(digits, 16)
+            self.byteCount = len(digits) >> 1
+
+    @classmethod
+    def fromPacked(klass, packed):
+        """Returns None for an empty address, as reported by tunnels and
+        other interfaces without a hardware address"""
+        if not packed:
+            return None
+        self = klass.__new__(klass)
+        unpack = _unpackByLength.get(len(packed))
+        if unpack is not None:
+            self._n = unpack(packed)
+        else: self._n = int(packed.encode('hex'), 16)
+        self.byteCount = len(packed)
+        return self
+
+    @classmethod
+    def asMAC(klass, mac):
+        if isinstance(mac, klass):
+            return mac
+        return klass(mac)
+
+    def __getstate__(self):
+        return (self._n, self.byteCount)
+    def __setstate__(self, state):
+        self._n, self.byteCount = state
+
+    #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    def __int__(self):
+        return self._n
+    def __long__(self):
+        return long(self._n)
+    def __hash__(self):
+        return hash(self._n) ^ self.byteCount
+    def __nonzero__(self):
+        return self.byteCount > 0
+
+    def _key(self, other):
+        if not isinstance(other, MACAddress):
+            other = MACAddress(other)
+        return other._n, other.byteCount
+
+    def __eq__(self, other):
+        try:
+            return (self._n, self.byteCount) == self._key(other)
+        except (TypeError, ValueError):
+            return False
+    def __ne__(self, other):
+        return not (self == other)
+    def __lt__(self, other):
+        return (self._n, self.byteCount) < self._key(other)
+    def __le__(self, other):
+        return (self._n, self.byteCount) <= self._key(other)
+    def __gt__(self, other):
+        return (self._n, self.byteCount) > self._key(other)
+    def __ge__(self, other):
+        return (self._n, self.byteCount) >= self._key(other)
+
+    #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    def packed(self):
+        packFn = _packByLength.get(self.byteCount)
+        if packFn is not None:
+            return packFn(self._n)
+        elif not self.byteCount:
+            return ''
+        return ('%0*x' % (self.byteCount*2, self._n)).decode('hex')
+
+    def hexdigits(self):
+        if not self.byteCount:
+            return ''
+        return '%0*x' % (self.byteCount*2, self._n)
+
+    def asStr(self, sep=':'):
+        h = self.hexdigits()
+        return sep.join([h[i:i+2] for i in xrange(0, len(h), 2)])
+
+    def asDotted(self):
+        # cisco style: 0123.4567.89ab
+        h = self.hexdigits()
+        return '.'.join([h[i:i+4] for i in xrange(0, len(h), 4)])
+
+    def __str__(self):
+        return self.asStr(':')
+    def __unicode__(self):
+        return unicode(self.asStr(':'))
+    def __repr__(self):
+        return '%s(%s)' % (self.__class__.__name__, self.asStr(':'))
+
+    #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    def _firstOctet(self):
+        if not self.byteCount:
+            return 0
+        return self._n >> (8*self.byteCount - 8)
+
+    def isMulticast(self):
+        return bool(self._firstOctet() & 0x01)
+    def isLocallyAdministered(self):
+        return bool(self._firstOctet() & 0x02)
+
+    def asEUI64(self):
+        if self.byteCount == 8:
+            return self
+        elif self.byteCount != 6:
+            raise ValueError("Only EUI-48 addresses can be extended to EUI-64")
+        n = self._n
+        return MACAddress(((n >> 24) << 40) | (0xfffe << 24) | (n & 0xffffff), 8)
+
+def mac(mac):
+    return MACAddress.asMAC(mac)
+asMAC = mac
+
@@ -0,0 +1,192 @@
+#!/usr/bin/env python
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+##~ Copyright (C) 2002-2007  TechGame Networks, LLC.              ##
+##~                                                               ##
+##~ This library is free software; you can redistribute it        ##
+##~ and/or modify it under the terms of the BSD style License as  ##
+##~ found in the LICENSE file included with this distribution.    ##
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+
+"""Link attributes -- MTU, operational state, carrier and speed -- of all
+interfaces at once.
+
+One RTM_GETLINK dump answers everything but the speed, which the kernel
+only reports through ethtool or sysfs; it is read from sysfs for links that
+have a carrier, since others have no speed to report.  Without netlink every
+attribute comes from one walk over /sys/class/net.  Carrier is None for
+links that are administratively down, whichever source answered.
+"""
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Imports
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+import os
+import struct
+
+import linux_netlink
+from ifflags import IFF_UP
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Constants / Variables / Etc.
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+IFLA_IFNAME = 3
+IFLA_MTU = 4
+IFLA_OPERSTATE = 16
+IFLA_CARRIER = 33
+
+_ifinfomsg = struct.Struct('=BxHiII')
+_u32 = struct.Struct('=I')
+
+# RFC 2863 operational states, named as sysfs reports them
+operStates = ['unknown', 'notpresent', 'down', 'lowerlayerdown',
+                'testing', 'dormant', 'up']
+
+sysClassNet = '/sys/class/net'
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Definitions
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class LinkAttributes(object):
+    __slots__ = ['ifindex', 'name', 'mtu', 'operstate', 'carrier', 'speed']
+
+    def __init__(self, ifindex, name, mtu=None, operstate=None, carrier=None, speed=None):
+        self.ifindex = ifindex
+        self.name = name
+        self.mtu = mtu
+        self.operstate = operstate
+        self.carrier = carrier
+        self.speed = speed
+
+    def __repr__(self):
+        return '<%s %s(%s) mtu %s %s carrier %s speed %s>' % (
+                self.__class__.__name__, self.name, self.ifindex, self.mtu,
+                self.operstate, self.carrier, self.speed)
+
+    def asDict(self):
+        return dict(mtu=self.mtu, operstate=self.operstate,
+                    carrier=self.carrier, speed=self.speed)
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def _readSysfs(path):
+    try:
+        with open(path, 'r') as f:
+            return f.read().strip()
+    except (IOError, OSError):
+        # e.g. EINVAL reading the speed of a link without one
+        return None
+
+def _sysfsInt(path):
+    value = _readSysfs(path)
+    if value:
+        try:
+            return int(value)
+        except ValueError:
+            pass
+    return None
+
+def _sysfsFlags(path):
+    value = _readSysfs(path)
+    if value:
+        try:
+            return int(value, 16)
+        except ValueError:
+            pass
+    return None
+
+def _sysfsSpeed(name, root=sysClassNet):
+    speed = _sysfsInt(os.path.join(root, name, 'speed'))
+    if speed is not None and speed < 0:
+        # SPEED_UNKNOWN
+        return None
+    return speed
+
+def readNetlinkLinks(withSpeed=True):
+    result = {}
+    for msgType, data in linux_netlink.netlinkDump(linux_netlink.RTM_GETLINK):
+        if msgType != linux_netlink.RTM_NEWLINK:
+            continue
+        family, ifType, ifindex, flags, change = _ifinfomsg.unpack_from(data, 0)
+        attrs = linux_netlink.parseAttrs(data, _ifinfomsg.size)
+
+        name = attrs.get(IFLA_IFNAME, '').rstrip('\0')
+        link = LinkAttributes(ifindex, name)
+        value = attrs.get(IFLA_MTU)
+        if value:
+            link.mtu, = _u32.unpack_from(value)
+        value = attrs.get(IFLA_OPERSTATE)
+        if value:
+            state = ord(value[0])
+            link.operstate = state < len(operStates) and operStates[state] or str(state)
+        value = attrs.get(IFLA_CARRIER)
+        if value and flags & IFF_UP:
+            # the kernel reports a carrier of 1 for links that are down
+            link.carrier = ord(value[0])
+        if withSpeed and link.carrier:
+            link.speed = _sysfsSpeed(name)
+        result[ifindex] = link
+    return result
+
+def readSysfsLinks(root=sysClassNet, withSpeed=True):
+    result = {}
+    try:
+        names = os.listdir(root)
+    except OSError:
+        return result
+
+    for name in names:
+        base = os.path.join(root, name)
+        ifindex = _sysfsInt(os.path.join(base, 'ifindex'))
+        if ifindex is None:
+            continue
+        link = LinkAttributes(ifindex, name,
+                mtu=_sysfsInt(os.path.join(base, 'mtu')),
+                operstate=_readSysfs(os.path.join(base, 'operstate')))
+        # carrier reads fail with EINVAL while the link is down
+        flags = _sysfsFlags(os.path.join(base, 'flags'))
+        if flags is None or flags & IFF_UP:
+            link.carrier = _sysfsInt(os.path.join(base, 'carrier'))
+        if withSpeed and link.carrier:
+            link.speed = _sysfsSpeed(name, root)
+        result[ifindex] = link
+    return result
+
+def readLinkAttributes(withSpeed=True):
+    """Returns {ifindex: LinkAttributes} for every interface on the host"""
+    if linux_netlink.isAvailable():
+        try:
+            return readNetlinkLinks(withSpeed)
+        except (OSError, IOError):
+            pass
+    return readSysfsLinks(withSpeed=withSpeed)
+
+def mergeLinkAttributes(ifinfo, links):
+    """Adds 'mtu', 'operstate', 'carrier' and 'speed' to the interface
+    records of a getifinfo() result, matching by interface index"""
+    byName = dict((link.name, link) for link in links.itervalues())
+    for name, entries in ifinfo:
+        for e in entries:
+            link = links.get(e.get('if_index')) or byName.get(name)
+            if link is not None:
+                e.update(link.asDict())
+    return ifinfo
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Main
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+if __name__=='__main__':
+    import time
+    from pprint import pprint
+
+    start = time.time()
+    pprint(readNetlinkLinks().values())
+    print 'netlink: %.2fms' % ((time.time() - start)*1000,)
+
+    start = time.time()
+    pprint(readSysfsLinks().values())
+    print 'sysfs: %.2fms' % ((time.time() - start)*1000,)
+
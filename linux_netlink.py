@@ -0,0 +1,101 @@
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+##~ Copyright (C) 2002-2007  TechGame Networks, LLC.              ##
+##~                                                               ##
+##~ This library is free software; you can redistribute it        ##
+##~ and/or modify it under the terms of the BSD style License as  ##
+##~ found in the LICENSE file included with this distribution.    ##
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+
+__all__ = [
+    'netlinkDump',
+    'parseAttrs',
+    'isAvailable',
+
+    'RTM_NEWLINK',
+    'RTM_GETLINK',
+    'RTM_NEWNEIGH',
+    'RTM_GETNEIGH',
+    ]
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Imports
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+import os
+import struct
+import socket
+import itertools
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Definitions
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+NETLINK_ROUTE = 0
+
+NLMSG_ERROR = 2
+NLMSG_DONE = 3
+
+NLM_F_REQUEST = 0x1
+NLM_F_DUMP = 0x300
+
+RTM_NEWLINK = 16
+RTM_GETLINK = 18
+RTM_NEWNEIGH = 28
+RTM_GETNEIGH = 30
+
+_nlmsghdr = struct.Struct('=LHHLL')
+_rtattr = struct.Struct('=HH')
+_rtgenmsg = struct.Struct('=B3x')
+
+_seq = itertools.count(1)
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def isAvailable():
+    return hasattr(socket, 'AF_NETLINK')
+
+def _align(n):
+    return (n + 3) & ~3
+
+def netlinkDump(msgType, afamily=0, bufsize=65536):
+    """Yields (nlmsg_type, payload) for each message of an rtnetlink dump"""
+    sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, NETLINK_ROUTE)
+    try:
+        sock.bind((0, 0))
+        seq = next(_seq)
+        payload = _rtgenmsg.pack(afamily)
+        header = _nlmsghdr.pack(_nlmsghdr.size + len(payload), msgType,
+                    NLM_F_REQUEST | NLM_F_DUMP, seq, 0)
+        sock.send(header + payload)
+
+        while True:
+            data = sock.recv(bufsize)
+            offset = 0
+            while offset + _nlmsghdr.size <= len(data):
+                msgLen, msgType, flags, msgSeq, pid = _nlmsghdr.unpack_from(data, offset)
+                if msgLen < _nlmsghdr.size:
+                    return
+                if msgType == NLMSG_DONE:
+                    return
+                elif msgType == NLMSG_ERROR:
+                    err, = struct.unpack_from('=i', data, offset + _nlmsghdr.size)
+                    if err:
+                        raise OSError(-err, os.strerror(-err))
+                elif msgSeq == seq:
+                    yield msgType, data[offset + _nlmsghdr.size:offset + msgLen]
+                offset += _align(msgLen)
+    finally:
+        sock.close()
+
+def parseAttrs(data, offset):
+    """Returns {rta_type: value bytes} for the attributes starting at offset"""
+    attrs = {}
+    end = len(data)
+    while offset + _rtattr.size <= end:
+        rtaLen, rtaType = _rtattr.unpack_from(data, offset)
+        if rtaLen < _rtattr.size:
+            break
+        attrs[rtaType & 0x3fff] = data[offset + _rtattr.size:offset + rtaLen]
+        offset += _align(rtaLen)
+    return attrs
+
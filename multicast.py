@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+##~ Copyright (C) 2002-2007  TechGame Networks, LLC.              ##
+##~                                                               ##
+##~ This library is free software; you can redistribute it        ##
+##~ and/or modify it under the terms of the BSD style License as  ##
+##~ found in the LICENSE file included with this distribution.    ##
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+
+"""Multicast group membership of each interface.
+
+On linux this is read from /proc/net/igmp and /proc/net/igmp6, which list
+the groups joined on every interface by any socket on the host.
+"""
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Imports
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+import os
+import struct
+from socket import AF_INET, AF_INET6
+
+from ip import asIP, IPBase, IPv4, IPv6
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Constants / Variables / Etc.
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+# /proc/net/igmp prints the group's network order bytes as a host order
+# integer, so packing it back in host order restores the address bytes
+_packIGMPGroup = struct.Struct('=L').pack
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Definitions
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def readProcIGMP(igmpFile):
+    """Parses the linux /proc/net/igmp format, yielding (ifindex, ifname, IPv4)
+
+    Each interface has a header line, followed by one indented line per group.
+    """
+    lines = iter(igmpFile)
+    next(lines, None)
+    ifindex = ifname = None
+    for line in lines:
+        fields = line.split()
+        if not fields:
+            continue
+        if not line[0].isspace():
+            ifindex, ifname = int(fields[0]), fields[1].rstrip(':')
+        elif ifindex is not None:
+            yield ifindex, ifname, IPv4.fromPacked(_packIGMPGroup(int(fields[0], 16)))
+
+def readProcIGMP6(igmp6File):
+    """Parses the linux /proc/net/igmp6 format, yielding (ifindex, ifname, IPv6)"""
+    for line in igmp6File:
+        fields = line.split()
+        if len(fields) < 3:
+            continue
+        yield int(fields[0]), fields[1], IPv6.fromPacked(fields[2].decode('hex'))
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class MulticastMembership(object):
+    """Joined groups indexed by interface index, and interfaces by group.
+
+    byIndex maps ifindex -> set of group IPs, and byGroup maps group IP ->
+    set of ifindexes, so deciding which interfaces to send a group's traffic
+    out of is a single dict probe.
+    """
+
+    timestamp = None
+
+    def __init__(self, memberships=(), timestamp=None):
+        self.timestamp = timestamp
+        self.byIndex = {}
+        self.byGroup = {}
+        self.names = {}
+        for entry in memberships:
+            self.add(*entry)
+
+    @classmethod
+    def fromProc(klass, procNetDir='/proc/net', timestamp=None):
+        memberships = []
+        path = os.path.join(procNetDir, 'igmp')
+        if os.path.exists(path):
+            with open(path, 'r') as igmpFile:
+                memberships.extend(readProcIGMP(igmpFile))
+
+        path = os.path.join(procNetDir, 'igmp6')
+        if os.path.exists(path):
+            with open(path, 'r') as igmp6File:
+                memberships.extend(readProcIGMP6(igmp6File))
+        return klass(memberships, timestamp)
+
+    def __repr__(self):
+        return '<%s %d groups on %d interfaces>' % (self.__class__.__name__,
+                len(self.byGroup), len(self.byIndex))
+
+    def __len__(self):
+        return sum(len(groups) for groups in self.byIndex.itervalues())
+
+    def __iter__(self):
+        for ifindex, groups in self.byIndex.iteritems():
+            for group in groups:
+                yield ifindex, group
+
+    def add(self, ifindex, ifname, group):
+        if not isinstance(group, IPBase):
+            group = asIP(group)
+        self.byIndex.setdefault(ifindex, set()).add(group)
+        self.byGroup.setdefault(group, set()).add(ifindex)
+        if ifname:
+            self.names[ifindex] = ifname
+
+    #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    def groupsOf(self, ifindex, *afamilies):
+        groups = self.byIndex.get(ifindex, ())
+        if afamilies:
+            return set(g for g in groups if g.afamily in afamilies)
+        return set(groups)
+
+    def interfacesFor(self, group):
+        if not isinstance(group, IPBase):
+            group = asIP(group)
+        return set(self.byGroup.get(group, ()))
+
+    def isMember(self, ifindex, group):
+        if not isinstance(group, IPBase):
+            group = asIP(group)
+        return ifindex in self.byGroup.get(group, ())
+
+def readMulticastMembership(timestamp=None):
+    return MulticastMembership.fromProc(timestamp=timestamp)
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Main
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+if __name__=='__main__':
+    from pprint import pprint
+    membership = readMulticastMembership()
+    print membership
+    pprint(membership.byIndex)
+    pprint(membership.byGroup)
+
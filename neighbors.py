@@ -0,0 +1,216 @@
+#!/usr/bin/env python
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+##~ Copyright (C) 2002-2007  TechGame Networks, LLC.              ##
+##~                                                               ##
+##~ This library is free software; you can redistribute it        ##
+##~ and/or modify it under the terms of the BSD style License as  ##
+##~ found in the LICENSE file included with this distribution.    ##
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Imports
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+import struct
+import socket
+from socket import AF_INET, AF_INET6
+
+if hasattr(socket, 'inet_pton'):
+    from socket import inet_pton
+else:
+    from .utils.inet import inet_pton
+
+from ip import asIP, IPBase, IPv4, IPv6, _packedV4, _packedV6
+from ipfamily import familyOf
+from linkaddr import MACAddress
+import linux_netlink
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Constants / Variables / Etc.
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+NUD_INCOMPLETE = 0x01
+NUD_REACHABLE = 0x02
+NUD_STALE = 0x04
+NUD_DELAY = 0x08
+NUD_PROBE = 0x10
+NUD_FAILED = 0x20
+NUD_NOARP = 0x40
+NUD_PERMANENT = 0x80
+
+ATF_COM = 0x02
+
+NDA_DST = 1
+NDA_LLADDR = 2
+
+_ndmsg = struct.Struct('=BxxxiHBB')
+_IPByFamily = {AF_INET: IPv4, AF_INET6: IPv6}
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Definitions
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class Neighbor(object):
+    __slots__ = ['ifindex', 'ip', 'mac', 'state']
+
+    def __init__(self, ifindex, ip, mac, state=NUD_REACHABLE):
+        self.ifindex = ifindex
+        self.ip = ip
+        self.mac = mac
+        self.state = state
+
+    def __repr__(self):
+        return '<%s %s lladdr %s if %s state %#x>' % (self.__class__.__name__,
+                self.ip, self.mac, self.ifindex, self.state)
+
+    def key(self):
+        return (self.ifindex, self.ip.afamily, long(self.ip))
+
+    def __eq__(self, other):
+        return (self.key() == other.key() and self.mac == other.mac
+                    and self.state == other.state)
+    def __ne__(self, other):
+        return not (self == other)
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def _addressKey(ip):
+    """(afamily, number) of an IP, or of an address text without building an IP"""
+    if isinstance(ip, IPBase):
+        return ip.afamily, long(ip)
+    afamily = familyOf(ip)
+    if afamily == AF_INET:
+        return afamily, _packedV4.unpack(inet_pton(AF_INET, ip))[0]
+    elif afamily == AF_INET6:
+        hi, lo = _packedV6.unpack(inet_pton(AF_INET6, ip.split('%', 1)[0]))
+        return afamily, (hi << 64) | lo
+    ip = asIP(ip)
+    return ip.afamily, long(ip)
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def parseNetlinkNeighbor(data):
+    """Returns the Neighbor of an RTM_NEWNEIGH payload, or None for entries
+    without an address of a known family or a link layer address"""
+    family, ifindex, state, flags, ndType = _ndmsg.unpack_from(data, 0)
+    IP = _IPByFamily.get(family)
+    if IP is None:
+        return None
+
+    attrs = linux_netlink.parseAttrs(data, _ndmsg.size)
+    dst, lladdr = attrs.get(NDA_DST), attrs.get(NDA_LLADDR)
+    if dst is None or not lladdr:
+        return None
+    return Neighbor(ifindex, IP.fromPacked(dst), MACAddress.fromPacked(lladdr), state)
+
+def readNetlinkNeighbors(afamily=0):
+    for msgType, data in linux_netlink.netlinkDump(linux_netlink.RTM_GETNEIGH, afamily):
+        if msgType != linux_netlink.RTM_NEWNEIGH:
+            continue
+        n = parseNetlinkNeighbor(data)
+        if n is not None:
+            yield n
+
+def readProcArp(arpFile, ifindexFn):
+    """Parses the linux /proc/net/arp format; IPv4 only"""
+    lines = iter(arpFile)
+    next(lines, None)
+    for line in lines:
+        fields = line.split()
+        if len(fields) < 6:
+            continue
+        ip, hwType, flags, mac, mask, device = fields[:6]
+        if not (int(flags, 16) & ATF_COM):
+            continue
+        yield Neighbor(ifindexFn(device), IPv4(ip), MACAddress(mac))
+
+def readNeighbors():
+    if linux_netlink.isAvailable():
+        try:
+            return list(readNetlinkNeighbors())
+        except (OSError, IOError):
+            pass
+
+    import netif
+    with open('/proc/net/arp', 'r') as arpFile:
+        return list(readProcArp(arpFile, netif.getIFIndex))
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class NeighborTable(object):
+    """Neighbor cache snapshot indexed by (ifindex, IP) and by MAC.
+
+    refresh() reads the cache again and only touches the index entries of
+    neighbors that appeared, changed or went away, returning the count of
+    changes made.
+    """
+
+    readNeighbors = staticmethod(readNeighbors)
+
+    def __init__(self, neighbors=None):
+        self.byKey = {}
+        self.byMAC = {}
+        if neighbors is None:
+            self.refresh()
+        else:
+            self.update(neighbors)
+
+    def __len__(self):
+        return len(self.byKey)
+    def __iter__(self):
+        return self.byKey.itervalues()
+
+    def refresh(self):
+        return self.update(self.readNeighbors())
+
+    def update(self, neighbors):
+        byKey, byMAC = self.byKey, self.byMAC
+        changes = 0
+
+        seen = set()
+        for n in neighbors:
+            key = n.key()
+            seen.add(key)
+            current = byKey.get(key)
+            if current is not None:
+                if current == n:
+                    continue
+                self._removeMAC(current)
+            byKey[key] = n
+            byMAC.setdefault(n.mac, {})[key] = n
+            changes += 1
+
+        for key in [k for k in byKey if k not in seen]:
+            self._removeMAC(byKey.pop(key))
+            changes += 1
+        return changes
+
+    def _removeMAC(self, n):
+        entries = self.byMAC.get(n.mac)
+        if entries is not None:
+            entries.pop(n.key(), None)
+            if not entries:
+                del self.byMAC[n.mac]
+
+    #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    def lookup(self, ifindex, ip):
+        afamily, n = _addressKey(ip)
+        return self.byKey.get((ifindex, afamily, n))
+
+    def lookupMAC(self, mac):
+        return self.byMAC.get(MACAddress.asMAC(mac), {}).values()
+
+    def macFor(self, ifindex, ip):
+        n = self.lookup(ifindex, ip)
+        if n is not None:
+            return n.mac
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Main
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+if __name__=='__main__':
+    from pprint import pprint
+    pprint(list(NeighborTable()))
+
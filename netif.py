@@ -13,7 +13,15 @@
 
 import sys
 import platform as _platform
+from timeit import default_timer as _timer
 from ip import asIP, asIPNet
+from linkaddr import MACAddress
+from ifquery import IFQuery
+from ifsnapshot import IFSnapshot
+from multicast import readMulticastMembership
+from linkattrs import readLinkAttributes, mergeLinkAttributes
+import instrument
+from instrument import instrumented
 
 #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 #~ Definitions 
@@ -37,39 +45,56 @@ else:
 #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
 def ifaddrAsIP(afamily, addr, netmask=None, *args):
+    if isinstance(addr, MACAddress):
+        return addr
     try:
         return asIPNet(addr, netmask, afamily=afamily)
     except LookupError:
         return (afamily, addr, netmask)
 
-def getifinfo(*afamilies):
+@instrumented('netif.queryifinfo')
+def queryifinfo(query=None):
     order = []
     result = {}
-    for k, e in platform_getifaddrs():
-        addrs = e['addrs']
-        addrs = [a for a in addrs if a[1]]
-        if afamilies:
-            addrs = [a for a in addrs if a[0] in afamilies]
+    for k, e in platform_getifaddrs(query=query):
+        # called per address, so timed here rather than wrapped
+        if instrument.enabled:
+            start = _timer()
+            addrs = [ifaddrAsIP(*a) for a in e['addrs'] if a[1]]
+            instrument.record('netif.ifaddrAsIP', len(addrs), _timer() - start)
+        else: addrs = [ifaddrAsIP(*a) for a in e['addrs'] if a[1]]
         if not addrs:
             continue
 
-        addrs = [ifaddrAsIP(*a) for a in addrs]
         e['addrs'] = addrs
-        if k not in order:
+        if k not in result:
             order.append(k)
         result.setdefault(k, []).append(e)
     return [(n, result[n]) for n in order]
 
+def getifinfo(*afamilies):
+    return queryifinfo(IFQuery(afamilies))
+
+def queryiflinkinfo(query=None, withSpeed=True):
+    """queryifinfo() with each record's mtu, operstate, carrier and speed"""
+    return mergeLinkAttributes(queryifinfo(query), readLinkAttributes(withSpeed))
+def getiflinkinfo(*afamilies):
+    return queryiflinkinfo(IFQuery(afamilies))
+
 def orderedset(l):
     v = dict(zip(l,l))
     return [v.pop(e) for e in l if e in v]
-def getifindexes(*afamilies):
+def queryifindexes(query=None):
     return [(n,orderedset([k['if_index'] for k in entries])) 
-                for n, entries in getifinfo(*afamilies)]
+                for n, entries in queryifinfo(query)]
+def getifindexes(*afamilies):
+    return queryifindexes(IFQuery(afamilies))
 
-def getifaddrs(*afamilies):
+def queryifaddrs(query=None):
     return [(n,[a for k in entries for a in k['addrs']])
-                for n, entries in getifinfo(*afamilies)]
+                for n, entries in queryifinfo(query)]
+def getifaddrs(*afamilies):
+    return queryifaddrs(IFQuery(afamilies))
 
 def getifaddrs_mac(): 
     return getifaddrs(AF_LINK)
@@ -80,7 +105,8 @@ def getifaddrs_v6():
     return getifaddrs(AF_INET6)
 
 def getIFAddressList(ifname, *afamilies):
-    return [k for n, k in getifaddrs(*afamilies) if n == ifname]
+    query = IFQuery(afamilies, name=ifname)
+    return [k for n, k in queryifaddrs(query)]
 def getIFAddressList_v4(ifname):
     return getIFAddressList(ifname, AF_INET)
 def getIFAddressList_v6(ifname):
@@ -89,21 +115,75 @@ def getIFAddressList_mac(ifname):
     return getIFAddressList(ifname, AF_LINK)
 getIFAddressList_link = getIFAddressList_mac
 
+@instrumented('netif.queryifsnapshot')
+def queryifsnapshot(query=None):
+    return IFSnapshot(queryifinfo(query))
+
+_ifsnapshot = None
+def getifsnapshot(maxAge=None):
+    global _ifsnapshot
+    snapshot = _ifsnapshot
+    if snapshot is None or (maxAge is not None and snapshot.age() > maxAge):
+        snapshot = queryifsnapshot()
+        _ifsnapshot = snapshot
+    return snapshot
+
+def invalidateifsnapshot():
+    global _ifsnapshot, _ifmulticast
+    _ifsnapshot = None
+    _ifmulticast = None
+
+_ifmulticast = None
+def getifmulticast(maxAge=None):
+    """Multicast group membership, read again whenever the interface
+    snapshot is refreshed"""
+    global _ifmulticast
+    snapshot = getifsnapshot(maxAge)
+    membership = _ifmulticast
+    if membership is None or membership.timestamp != snapshot.timestamp:
+        membership = readMulticastMembership(snapshot.timestamp)
+        _ifmulticast = membership
+    return membership
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+# Name, index and address lookups accept a snapshot up to lookupMaxAge
+# seconds old, so added or renumbered interfaces are seen within that time.
+# Name and index misses are answered by the platform libc call.  An address
+# miss takes a fresh snapshot only when the current one is older than
+# lookupMissAge, so lookups of non-local addresses enumerate at most once
+# per lookupMissAge seconds.
+lookupMaxAge = 10.0
+lookupMissAge = 1.0
+
+def _snapshotLookup(fn):
+    snapshot = getifsnapshot(lookupMaxAge)
+    result = fn(snapshot)
+    if result is None and snapshot.age() > lookupMissAge:
+        result = fn(getifsnapshot(lookupMissAge))
+    return result
+
 def getIFIndex(ifname):
     if isinstance(ifname, (int, long)):
-        if platform_if_indextoname(ifname):
+        if getIFName(ifname) is not None:
             return ifname
+        return None
     elif isinstance(ifname, (str, unicode)):
-        return platform_if_nametoindex(ifname)
-    return None
+        # unknown names are 0, as if_nametoindex reports them
+        snapshot = getifsnapshot(lookupMaxAge)
+        return snapshot.ifindexes.nameToIndex(ifname, platform_if_nametoindex) or 0
+    else:
+        return None
+
+def getIFName(ifindex):
+    snapshot = getifsnapshot(lookupMaxAge)
+    return snapshot.ifindexes.indexToName(ifindex, platform_if_indextoname) or None
 
 def getIFIndexForIP(ip, *afamilies):
     ip = asIP(ip)
-    ifipMap = getifaddrs(*afamilies)
-    for ifname, iplist in ifipMap:
-        if ip in iplist:
-            return getIFIndex(ifname)
-    return None
+    if afamilies and ip.afamily not in afamilies:
+        return None
+    return _snapshotLookup(lambda snapshot: snapshot.indexForAddress(ip))
 
 #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 #~ Main 
@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+##~ Copyright (C) 2002-2007  TechGame Networks, LLC.              ##
+##~                                                               ##
+##~ This library is free software; you can redistribute it        ##
+##~ and/or modify it under the terms of the BSD style License as  ##
+##~ found in the LICENSE file included with this distribution.    ##
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Imports
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+import os
+import ctypes
+from ctypes.util import find_library
+from multiprocessing.pool import ThreadPool
+
+import netif
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Constants / Variables / Etc.
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+CLONE_NEWNET = 0x40000000
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Definitions
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class NamespaceRestoreError(OSError):
+    """A worker could not return to the namespace it started in.
+
+    The worker thread is left in a foreign namespace, so the pool reading
+    namespaces is shut down rather than given more work.
+    """
+
+class NetNamespaceProvider(object):
+    """Enters linux network namespaces with setns(2).
+
+    A network namespace switch made by setns only applies to the calling
+    thread, so each pool worker enters the target namespace, enumerates,
+    and then returns to the namespace it started in.  Namespaces are
+    named by pid (/proc/<pid>/ns/net), by absolute path, or by their
+    name under /run/netns.
+    """
+
+    netnsDir = '/run/netns'
+    selfPaths = ['/proc/thread-self/ns/net', '/proc/self/ns/net']
+
+    _libc = None
+    def _setns(self, fd):
+        libc = self._libc
+        if libc is None:
+            libc = ctypes.CDLL(find_library('c'), use_errno=True)
+            self.__class__._libc = libc
+
+        if libc.setns(fd, CLONE_NEWNET) != 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+
+    def listNamespaces(self):
+        try:
+            return sorted(os.listdir(self.netnsDir))
+        except OSError:
+            return []
+
+    def resolve(self, ns):
+        if isinstance(ns, (int, long)):
+            return '/proc/%d/ns/net' % (ns,)
+        elif ns.startswith('/'):
+            return ns
+        return os.path.join(self.netnsDir, ns)
+
+    def enter(self, nsPath):
+        selfPath = [p for p in self.selfPaths if os.path.exists(p)][0]
+        restoreFd = os.open(selfPath, os.O_RDONLY)
+        try:
+            fd = os.open(nsPath, os.O_RDONLY)
+            try:
+                self._setns(fd)
+            finally:
+                os.close(fd)
+        except Exception:
+            os.close(restoreFd)
+            raise
+        return restoreFd
+
+    def restore(self, token):
+        try:
+            self._setns(token)
+        finally:
+            os.close(token)
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def _snapshotNamespace(provider, ns, query, broken):
+    if broken:
+        # a worker is stranded in another namespace; the call is failing
+        return (ns, None, broken[0])
+    try:
+        token = provider.enter(provider.resolve(ns))
+    except Exception, e:
+        return (ns, None, e)
+
+    try:
+        result = (ns, netif.queryifsnapshot(query), None)
+    except Exception, e:
+        result = (ns, None, e)
+
+    try:
+        provider.restore(token)
+    except Exception, e:
+        error = NamespaceRestoreError(getattr(e, 'errno', None),
+                'Could not return from namespace %s: %s' % (ns, e))
+        broken.append(error)
+        raise error
+    return result
+
+def getNamespaceSnapshots(namespaces=None, query=None, workers=16, provider=None):
+    """Returns [(ns, snapshot, error)] in the order of namespaces.
+
+    Namespaces that cannot be entered, e.g. because their process has
+    exited, report the exception instead of a snapshot.  If a worker cannot
+    return to its own namespace, the pool and its threads are torn down and
+    NamespaceRestoreError is raised.
+    """
+    if provider is None:
+        provider = NetNamespaceProvider()
+    if namespaces is None:
+        namespaces = provider.listNamespaces()
+
+    namespaces = list(namespaces)
+    if not namespaces:
+        return []
+
+    broken = []
+    pool = ThreadPool(max(1, min(workers, len(namespaces))))
+    try:
+        return pool.map(lambda ns: _snapshotNamespace(provider, ns, query, broken), namespaces)
+    finally:
+        if broken:
+            pool.terminate()
+        else: pool.close()
+        pool.join()
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Main
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+if __name__=='__main__':
+    from pprint import pprint
+    for ns, snapshot, error in getNamespaceSnapshots():
+        print ns, error or snapshot
+        if snapshot is not None:
+            pprint(snapshot.ifinfo)
+        print
+
@@ -0,0 +1,289 @@
+#!/usr/bin/env python
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+##~ Copyright (C) 2002-2007  TechGame Networks, LLC.              ##
+##~                                                               ##
+##~ This library is free software; you can redistribute it        ##
+##~ and/or modify it under the terms of the BSD style License as  ##
+##~ found in the LICENSE file included with this distribution.    ##
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+
+"""Parses and classifies files of addresses, one per line, on all cores.
+
+The file is mapped and cut into line aligned chunks.  Workers map the same
+file and are only sent chunk offsets; each returns the chunk's addresses as
+AddressArray columns and their ipclass bits as arrays.  Results come back in
+file order, and no more than maxInFlight chunks are queued or held at once,
+so a slow consumer holds back the readers rather than filling memory::
+
+    pipeline = parseAddressFile('addrs.log', workers=8)
+    for chunk in pipeline:
+        consume(chunk.addresses[AF_INET], chunk.classes[AF_INET])
+    print pipeline.stats.report()
+"""
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Imports
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+import os
+import mmap
+from collections import deque
+from timeit import default_timer as _timer
+
+import instrument
+from ipbulk import parseTexts, _arrayBytes, _arrayFromBytes
+from ipclass import classifyNumbers
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Constants / Variables / Etc.
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+defaultChunkSize = 4 << 20
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Definitions
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def _mapFile(path):
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if not size:
+            return ''
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+def iterChunks(data, chunkSize=defaultChunkSize):
+    """Yields (start, end) offsets of line aligned chunks of data"""
+    start, size = 0, len(data)
+    while start < size:
+        end = data.find('\n', min(start + chunkSize, size) - 1)
+        if end < 0:
+            end = size
+        else: end += 1
+        yield start, end
+        start = end
+
+class ChunkResult(object):
+    """Parsed columns of one chunk of the input.
+
+    addresses is {afamily: AddressArray} in line order, classes is
+    {afamily: array of ipclass bits} parallel to it (empty when not
+    classifying), and invalid counts the lines that were not addresses.
+    """
+
+    def __init__(self, index, start, end, lines, addresses, classes, seconds):
+        self.index = index
+        self.start = start
+        self.end = end
+        self.lines = lines
+        self.addresses = addresses
+        self.classes = classes
+        self.seconds = seconds
+
+    def __repr__(self):
+        return '<%s %d: %d lines, %d addresses>' % (self.__class__.__name__,
+                self.index, self.lines, self.count())
+
+    def count(self):
+        return sum(len(a) for a in self.addresses.itervalues())
+
+    def getInvalid(self):
+        return self.lines - self.count()
+    invalid = property(getInvalid)
+
+    def __reduce__(self):
+        classes = dict((k, _arrayBytes(v)) for k, v in self.classes.iteritems())
+        return (_unpickleChunk, (self.index, self.start, self.end, self.lines,
+                    self.addresses, classes, self.seconds))
+
+def _unpickleChunk(index, start, end, lines, addresses, classes, seconds):
+    classes = dict((k, _arrayFromBytes(v)) for k, v in classes.iteritems())
+    return ChunkResult(index, start, end, lines, addresses, classes, seconds)
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+_workerMaps = {}
+def _workerData(path):
+    data = _workerMaps.get(path)
+    if data is None:
+        data = _workerMaps[path] = _mapFile(path)
+    return data
+
+def parseChunk(data, index, start, end, classify=True):
+    t0 = _timer()
+    lines = [l.strip() for l in data[start:end].splitlines()]
+    lines = [l for l in lines if l]
+    addresses = parseTexts(lines, strict=False)
+    t1 = _timer()
+
+    classes = {}
+    if classify:
+        for afamily, addrs in addresses.iteritems():
+            classes[afamily] = classifyNumbers(afamily, addrs.iterNumbers())
+    t2 = _timer()
+    return ChunkResult(index, start, end, len(lines), addresses, classes, (t1 - t0, t2 - t1))
+
+def _parseFileChunk(path, index, start, end, classify):
+    return parseChunk(_workerData(path), index, start, end, classify)
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class PipelineStats(object):
+    """Counts and seconds spent per stage.
+
+    'parse' and 'classify' are summed over the workers; 'split' and 'wait'
+    (time the consumer was blocked on results) are in the calling process.
+    """
+
+    stageNames = ['split', 'parse', 'classify', 'wait']
+
+    def __init__(self):
+        self.chunks = 0
+        self.bytes = 0
+        self.lines = 0
+        self.addresses = 0
+        self.seconds = dict.fromkeys(self.stageNames, 0.0)
+        self.started = self.finished = None
+
+    def add(self, chunk):
+        self.chunks += 1
+        self.bytes += chunk.end - chunk.start
+        self.lines += chunk.lines
+        self.addresses += chunk.count()
+        self.seconds['parse'] += chunk.seconds[0]
+        self.seconds['classify'] += chunk.seconds[1]
+
+    def elapsed(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or _timer()) - self.started
+
+    def throughput(self):
+        """{stage: lines per second} for each stage, and 'total'"""
+        result = {}
+        for name, seconds in self.seconds.iteritems():
+            result[name] = seconds and self.lines / seconds or 0.0
+        elapsed = self.elapsed()
+        result['total'] = elapsed and self.lines / elapsed or 0.0
+        return result
+
+    def report(self):
+        elapsed = self.elapsed()
+        lines = ['%d chunks, %d lines, %d addresses, %.1f MB in %.2fs (%.1f MB/s)' % (
+                    self.chunks, self.lines, self.addresses, self.bytes/1048576.,
+                    elapsed, elapsed and self.bytes/1048576./elapsed or 0.0)]
+        throughput = self.throughput()
+        for name in self.stageNames + ['total']:
+            seconds = self.seconds.get(name, elapsed)
+            lines.append('  %-8s %8.2fs %12.0f lines/s' % (name, seconds, throughput[name]))
+        return '\n'.join(lines)
+
+class AddressFilePipeline(object):
+    """Iterates the ChunkResults of an address file in file order.
+
+    workers is the process count (cpu count when None; 0 parses in this
+    process) and maxInFlight bounds the chunks submitted but not yet
+    consumed, defaulting to twice the worker count.
+    """
+
+    def __init__(self, path, workers=None, chunkSize=defaultChunkSize, maxInFlight=None, classify=True):
+        if workers is None:
+            import multiprocessing
+            workers = multiprocessing.cpu_count()
+        self.path = path
+        self.workers = workers
+        self.chunkSize = chunkSize
+        self.maxInFlight = maxInFlight or max(2*workers, 1)
+        self.classify = classify
+        self.stats = PipelineStats()
+
+    def __iter__(self):
+        stats = self.stats
+        stats.started = _timer()
+        stats.finished = None
+        try:
+            if self.workers:
+                results = self._iterPool()
+            else: results = self._iterLocal()
+            for chunk in results:
+                stats.add(chunk)
+                if instrument.enabled:
+                    instrument.record('pipeline.parse', chunk.lines, chunk.seconds[0])
+                    instrument.record('pipeline.classify', chunk.count(), chunk.seconds[1])
+                yield chunk
+        finally:
+            stats.finished = _timer()
+
+    def _iterChunks(self, data):
+        chunks = iterChunks(data, self.chunkSize)
+        while True:
+            t0 = _timer()
+            chunk = next(chunks, None)
+            self.stats.seconds['split'] += _timer() - t0
+            if chunk is None:
+                return
+            yield chunk
+
+    def _iterLocal(self):
+        data = _mapFile(self.path)
+        try:
+            for index, (start, end) in enumerate(self._iterChunks(data)):
+                yield parseChunk(data, index, start, end, self.classify)
+        finally:
+            if isinstance(data, mmap.mmap):
+                data.close()
+
+    def _iterPool(self):
+        import multiprocessing
+        data = _mapFile(self.path)
+        pool = multiprocessing.Pool(self.workers)
+        pending = deque()
+        try:
+            for index, (start, end) in enumerate(self._iterChunks(data)):
+                pending.append(pool.apply_async(_parseFileChunk,
+                        (self.path, index, start, end, self.classify)))
+                if len(pending) >= self.maxInFlight:
+                    yield self._wait(pending.popleft())
+            while pending:
+                yield self._wait(pending.popleft())
+            pool.close()
+        finally:
+            pool.terminate()
+            pool.join()
+            if isinstance(data, mmap.mmap):
+                data.close()
+
+    def _wait(self, result):
+        t0 = _timer()
+        chunk = result.get()
+        self.stats.seconds['wait'] += _timer() - t0
+        return chunk
+
+def parseAddressFile(path, workers=None, chunkSize=defaultChunkSize, maxInFlight=None, classify=True):
+    return AddressFilePipeline(path, workers, chunkSize, maxInFlight, classify)
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Main
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+if __name__=='__main__':
+    import sys
+    import random
+    import tempfile
+
+    if len(sys.argv) > 1:
+        path = sys.argv[1]
+    else:
+        path = os.path.join(tempfile.gettempdir(), 'networkinfo-demo-addrs.log')
+        with open(path, 'w') as f:
+            for i in xrange(1000000):
+                if i % 10:
+                    f.write('%d.%d.%d.%d\n' % tuple(random.randrange(256) for j in xrange(4)))
+                else: f.write('2001:db8::%x\n' % (random.getrandbits(16),))
+
+    for workers in (0, None):
+        pipeline = parseAddressFile(path, workers, chunkSize=1 << 20)
+        for chunk in pipeline:
+            pass
+        print 'workers: %s' % (pipeline.workers,)
+        print pipeline.stats.report()
+        print
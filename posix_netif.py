@@ -27,36 +27,64 @@ import os
 import array
 import struct
 
-from socket import inet_ntop, AF_INET, AF_INET6
+from socket import AF_INET, AF_INET6
 import ctypes
 from ctypes.util import find_library
+from timeit import default_timer as _timer
+
+from ifflags import IFFlags
+import instrument
+from instrument import instrumented
+from linkaddr import MACAddress, AF_LINK
+from ip import IPv4, IPv6
 
 #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 #~ Definitions 
 #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
-AF_LINK = 18
+AF_PACKET = 17
 
+_linux = sys.platform.startswith('linux')
 _libc = ctypes.cdll.LoadLibrary(find_library('libc'))
 
 #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
 class sockaddr(ctypes.Structure):
-    _fields_ = [
-        ('sa_len', ctypes.c_ubyte),
-        ('sa_family', ctypes.c_ubyte),
-        ('sa_data', ctypes.c_ubyte*64),
-        ]
+    if _linux:
+        # linux has no sa_len, and sa_family is a full unsigned short
+        _fields_ = [
+            ('sa_family', ctypes.c_ushort),
+            ('sa_data', ctypes.c_ubyte*64),
+            ]
+    else:
+        _fields_ = [
+            ('sa_len', ctypes.c_ubyte),
+            ('sa_family', ctypes.c_ubyte),
+            ('sa_data', ctypes.c_ubyte*64),
+            ]
 
     _dataByFamily = {}
+    _packedByFamily = {}
+    _linuxDataLen = {AF_INET: 14, AF_INET6: 26, AF_PACKET: 18}
 
     def getFamily(self):
+        if _linux and self.sa_family == AF_PACKET:
+            return AF_LINK
         return self.sa_family
+    def getData(self):
+        if _linux:
+            dataLen = self._linuxDataLen.get(self.sa_family, 14)
+        else: dataLen = self.sa_len+1
+        return array.array('B', self.sa_data[0:dataLen]).tostring()
     def getAddress(self):
-        data = array.array('B', self.sa_data[0:self.sa_len+1]).tostring()
-        handler = self._dataByFamily.get(self.sa_family)
+        handler = self._dataByFamily.get(self.getFamily())
+        if handler is not None:
+            return handler(self, self.getData())
+        else: return None
+    def getPacked(self):
+        handler = self._packedByFamily.get(self.getFamily())
         if handler is not None:
-            return handler(self, data)
+            return handler(self, self.getData())
         else: return None
 
     def asTuple(self):
@@ -73,10 +101,24 @@ class sockaddr(ctypes.Structure):
         n = 6; ne = n+ord(data[3])
         a = ne; ae = a+ord(data[4])
         s = ae; se = s+ord(data[5])
-        addr = ':'.join([x.encode('hex') for x in data[a:ae]])
         #selctor = data[s:se]
-        return addr
-    _dataByFamily[AF_LINK] = _link
+        return MACAddress.fromPacked(data[a:ae])
+
+    def _packet(self, data):
+        # linux sockaddr_ll data is packed as follows::
+        #   (2) sll_protocol, 
+        #   (4) sll_ifindex, 
+        #   (2) sll_hatype, 
+        #   (1) sll_pkttype, 
+        #   (1) sll_halen, 
+        #   (8) sll_addr
+        a = 10; ae = a+ord(data[9])
+        return MACAddress.fromPacked(data[a:ae])
+
+    if _linux:
+        _dataByFamily[AF_LINK] = _packet
+    else:
+        _dataByFamily[AF_LINK] = _link
 
     def _ipv4(self, data):
         # data is packed as follows::
@@ -84,10 +126,10 @@ class sockaddr(ctypes.Structure):
         #   (4) address,
         #   (8) zeros
 
-        ipv4 = inet_ntop(AF_INET, data[2:6])
         #port = struct.unpack('H', data[0:2])[0]
-        return ipv4
+        return IPv4.fromPacked(data[2:6])
     _dataByFamily[AF_INET] = _ipv4
+    _packedByFamily[AF_INET] = lambda self, data: data[2:6]
 
     def _ipv6(self, data):
         # data is packed as follows::
@@ -96,10 +138,13 @@ class sockaddr(ctypes.Structure):
         #   (16) address, 
         #   (4) scope id, 
 
-        ipv6 = inet_ntop(AF_INET6, data[6:22])
         #port = struct.unpack('H', data[0:2])[0]
-        return ipv6
+        if len(data) >= 26:
+            scopeId = struct.unpack('I', data[22:26])[0]
+            return IPv6.fromPacked(data[6:22], False, scopeId)
+        return IPv6.fromPacked(data[6:22])
     _dataByFamily[AF_INET6] = _ipv6
+    _packedByFamily[AF_INET6] = lambda self, data: data[6:22]
 
 #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
@@ -115,19 +160,35 @@ class ifaddrs(ctypes.Structure):
         ('ifa_data', ctypes.c_void_p),
         ]
 
-    def addInterface(self, ifMap):
-        result = {}
+    def addInterface(self, ifMap, query=None, ifIndexes=None):
         ifName = self.ifa_name
+        sa = self.ifa_addr and self.ifa_addr[0] or None
+        family = sa is not None and sa.getFamily() or None
+        if query is not None:
+            if not query.matchInterface(ifName, self.ifa_flags):
+                return
+            if family in (AF_INET, AF_INET6):
+                if not query.matchAddress(family, sa.getPacked()):
+                    return
+            elif not query.matchAddress(family):
+                return
+
+        result = {}
         ifMap.append((ifName, result))
 
         result['name'] = ifName
-        result['if_index'] = _if_nametoindex(ifName)
+        if ifIndexes is not None:
+            ifIndex = ifIndexes.get(ifName)
+            if ifIndex is None:
+                ifIndex = ifIndexes[ifName] = _if_nametoindex(ifName)
+        else: ifIndex = _if_nametoindex(ifName)
+        result['if_index'] = ifIndex
         result['desc'] = ''
-        result['flags'] = self.ifa_flags
+        result['flags'] = IFFlags(self.ifa_flags)
 
         addrs = result.setdefault('addrs', [])
 
-        family, addr = self.ifa_addr and self.ifa_addr[0].asTuple() or (None,None)
+        addr = sa is not None and sa.getAddress() or None
         netmask = self.ifa_netmask and self.ifa_netmask[0].getAddress() or None
         dstaddr = self.ifa_dstaddr and self.ifa_dstaddr[0].getAddress() or None
 
@@ -142,6 +203,7 @@ ctypes.SetPointerType(ifaddrs_p, ifaddrs)
 
 #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
+@instrumented('posix.if_indextoname')
 def _if_indextoname(idx):
     # this only requires 16 bytes, but I prefer to overallocate
     interfaceName = ctypes.c_buffer("\x00", 256)
@@ -149,10 +211,12 @@ def _if_indextoname(idx):
     return interfaceName.value
 platform_if_indextoname = _if_indextoname
 
+@instrumented('posix.if_nametoindex')
 def _if_nametoindex(interfaceName):
     return _libc.if_nametoindex(interfaceName)
 platform_if_nametoindex = _if_nametoindex
 
+@instrumented('posix.libc_getifaddrs')
 def _getifaddrs():
     pAddrs = ifaddrs_p()
     err = _libc.getifaddrs(ctypes.byref(pAddrs))
@@ -164,14 +228,24 @@ def _getifaddrs():
 def _freeifaddrs(addrs):
     _libc.freeifaddrs(addrs)
 
-def posix_getifaddrs():
+@instrumented('posix.getifaddrs')
+def posix_getifaddrs(query=None):
     ifMap = []
+    ifIndexes = {}
     rootAddrs = _getifaddrs()
     try:
         entry = rootAddrs
-        while entry:
-            entry[0].addInterface(ifMap)
-            entry = entry[0].ifa_next
+        if instrument.enabled:
+            # addInterface runs per address, so it is timed here rather than wrapped
+            while entry:
+                start = _timer()
+                entry[0].addInterface(ifMap, query, ifIndexes)
+                instrument.record('posix.addInterface', 1, _timer() - start)
+                entry = entry[0].ifa_next
+        else:
+            while entry:
+                entry[0].addInterface(ifMap, query, ifIndexes)
+                entry = entry[0].ifa_next
     finally:
         _freeifaddrs(rootAddrs)
     return ifMap
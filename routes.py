@@ -0,0 +1,283 @@
+#!/usr/bin/env python
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+##~ Copyright (C) 2002-2007  TechGame Networks, LLC.              ##
+##~                                                               ##
+##~ This library is free software; you can redistribute it        ##
+##~ and/or modify it under the terms of the BSD style License as  ##
+##~ found in the LICENSE file included with this distribution.    ##
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Imports
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+import os
+import socket
+from socket import AF_INET, AF_INET6
+
+from ip import asIP, IPBase, IPv4, IPv6
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Constants / Variables / Etc.
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+RTF_UP = 0x0001
+RTF_GATEWAY = 0x0002
+RTF_HOST = 0x0004
+RTF_REJECT = 0x0200
+
+_bitsByFamily = {AF_INET: 32, AF_INET6: 128}
+_IPByFamily = {AF_INET: IPv4, AF_INET6: IPv6}
+
+# RFC 6724 scope values
+SCOPE_INTERFACE = 0x1
+SCOPE_LINK = 0x2
+SCOPE_ADMIN = 0x4
+SCOPE_SITE = 0x5
+SCOPE_ORGANIZATION = 0x8
+SCOPE_GLOBAL = 0xe
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Route Table
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class Route(object):
+    __slots__ = ['afamily', 'network', 'prefixLen', 'gateway', 'ifname', 'metric', 'flags']
+
+    def __init__(self, afamily, network, prefixLen, gateway, ifname, metric=0, flags=RTF_UP):
+        self.afamily = afamily
+        self.network = network
+        self.prefixLen = prefixLen
+        self.gateway = gateway or None
+        self.ifname = ifname
+        self.metric = metric
+        self.flags = flags
+
+    def __repr__(self):
+        IP = _IPByFamily[self.afamily]
+        via = self.gateway and (' via %s' % (IP(self.gateway),)) or ''
+        return '<%s %s/%d%s dev %s metric %d>' % (self.__class__.__name__,
+                IP(self.network), self.prefixLen, via, self.ifname, self.metric)
+
+    def getGatewayIP(self):
+        if self.gateway is not None:
+            return _IPByFamily[self.afamily](self.gateway)
+    gatewayIP = property(getGatewayIP)
+
+class RouteTable(object):
+    """Longest prefix match over routes, indexed by family and prefix length.
+
+    Each (family, prefix length) has a dict keyed by the network number
+    shifted down to the prefix, so a lookup is one dict probe per distinct
+    prefix length in the table, longest first.
+    """
+
+    def __init__(self, routes=()):
+        self._byFamily = {}
+        for route in routes:
+            self.add(route)
+
+    def __len__(self):
+        return sum(len(routes) for plens, byPrefix in self._byFamily.itervalues()
+                    for table in byPrefix.itervalues() for routes in table.itervalues())
+
+    def add(self, route):
+        if route.flags & RTF_REJECT or not (route.flags & RTF_UP):
+            return
+
+        plens, byPrefix = self._byFamily.setdefault(route.afamily, ([], {}))
+        table = byPrefix.get(route.prefixLen)
+        if table is None:
+            table = byPrefix[route.prefixLen] = {}
+            plens.append(route.prefixLen)
+            plens.sort(reverse=True)
+
+        shift = _bitsByFamily[route.afamily] - route.prefixLen
+        routes = table.setdefault(route.network >> shift, [])
+        routes.append(route)
+        routes.sort(key=lambda r: r.metric)
+
+    def lookup(self, ip):
+        if not isinstance(ip, IPBase):
+            ip = asIP(ip)
+        return self.lookupNumber(ip.afamily, long(ip))
+
+    def lookupNumber(self, afamily, n):
+        entry = self._byFamily.get(afamily)
+        if entry is None:
+            return None
+
+        plens, byPrefix = entry
+        bits = _bitsByFamily[afamily]
+        for plen in plens:
+            routes = byPrefix[plen].get(n >> (bits - plen))
+            if routes:
+                return routes[0]
+        return None
+
+    #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    @classmethod
+    def fromProc(klass, procNetDir='/proc/net'):
+        routes = []
+        path = os.path.join(procNetDir, 'route')
+        if os.path.exists(path):
+            with open(path, 'r') as routeFile:
+                routes.extend(readIPv4Routes(routeFile))
+
+        path = os.path.join(procNetDir, 'ipv6_route')
+        if os.path.exists(path):
+            with open(path, 'r') as routeFile:
+                routes.extend(readIPv6Routes(routeFile))
+        return klass(routes)
+
+def readIPv4Routes(routeFile):
+    """Parses the linux /proc/net/route format"""
+    lines = iter(routeFile)
+    next(lines, None)
+    for line in lines:
+        fields = line.split()
+        if len(fields) < 8:
+            continue
+        ifname, dest, gateway, flags, refcnt, use, metric, mask = fields[:8]
+        # the kernel prints the network order words in host order
+        mask = socket.ntohl(int(mask, 16))
+        yield Route(AF_INET,
+                socket.ntohl(int(dest, 16)),
+                bin(mask).count('1'),
+                socket.ntohl(int(gateway, 16)),
+                ifname, int(metric), int(flags, 16))
+
+def readIPv6Routes(routeFile):
+    """Parses the linux /proc/net/ipv6_route format"""
+    for line in routeFile:
+        fields = line.split()
+        if len(fields) < 10:
+            continue
+        dest, plen, src, srcPlen, nexthop, metric, refcnt, use, flags, ifname = fields[:10]
+        yield Route(AF_INET6,
+                long(dest, 16), int(plen, 16),
+                long(nexthop, 16),
+                ifname, int(metric, 16), int(flags, 16))
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Source Address Selection
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def _prefixEntry(text, plen, label):
+    return (plen, long(IPv6(text)) >> (128 - plen), label)
+
+# RFC 6724 default policy table labels, longest prefix first
+_policyLabels = [
+    _prefixEntry('::1', 128, 0),
+    _prefixEntry('::ffff:0:0', 96, 4),
+    _prefixEntry('::', 96, 3),
+    _prefixEntry('2001::', 32, 5),
+    _prefixEntry('2002::', 16, 2),
+    _prefixEntry('3ffe::', 16, 12),
+    _prefixEntry('fec0::', 10, 11),
+    _prefixEntry('fc00::', 7, 13),
+    ]
+_v4MappedBase = 0xffff << 32
+
+def scopeOf(afamily, n):
+    if afamily == AF_INET:
+        if (n >> 24) == 127 or (n >> 16) == 0xa9fe:
+            return SCOPE_LINK
+        return SCOPE_GLOBAL
+
+    if (n >> 120) == 0xff:
+        return (n >> 112) & 0xf
+    elif (n >> 118) == 0x3fa or n == 1:
+        return SCOPE_LINK
+    elif (n >> 118) == 0x3fb:
+        return SCOPE_SITE
+    return SCOPE_GLOBAL
+
+def labelOf(afamily, n):
+    if afamily == AF_INET:
+        n |= _v4MappedBase
+    for plen, prefix, label in _policyLabels:
+        if (n >> (128 - plen)) == prefix:
+            return label
+    return 1
+
+def commonPrefixLen(a, b, bits):
+    return bits - (a ^ b).bit_length()
+
+class SourceAddressSelector(object):
+    """RFC 6724 style source address selection from an interface snapshot.
+
+    Implements rules 1 (same address), 2 (appropriate scope), 5 (outgoing
+    interface), 6 (matching label) and 8 (longest matching prefix); the
+    deprecated, home and temporary address rules need state the snapshot
+    does not have.  Answers are kept per destination, up to maxCacheSize
+    of them before the cache is cleared, so the selector should be rebuilt
+    whenever the route table or snapshot is refreshed.
+    """
+
+    maxCacheSize = 4096
+
+    def __init__(self, routeTable, snapshot):
+        self.routeTable = routeTable
+        self.snapshot = snapshot
+        self._cache = {}
+        self._candidates = self._buildCandidates(snapshot)
+
+    def _buildCandidates(self, snapshot):
+        candidates = {}
+        for name, entries in snapshot:
+            for e in entries:
+                for a in e['addrs']:
+                    afamily = getattr(a, 'afamily', None)
+                    if afamily not in _bitsByFamily:
+                        continue
+                    n = long(a.ip)
+                    plen = a.prefixLen
+                    candidates.setdefault(afamily, []).append(
+                        (a.ip, n, plen, name, scopeOf(afamily, n), labelOf(afamily, n)))
+        return candidates
+
+    def select(self, dest):
+        if not isinstance(dest, IPBase):
+            dest = asIP(dest)
+        key = (dest.afamily, long(dest))
+        result = self._cache.get(key, False)
+        if result is False:
+            result = self._select(dest.afamily, key[1])
+            if len(self._cache) >= self.maxCacheSize:
+                self._cache.clear()
+            self._cache[key] = result
+        return result
+
+    def _select(self, afamily, dn):
+        candidates = self._candidates.get(afamily)
+        if not candidates:
+            return None
+
+        route = self.routeTable.lookupNumber(afamily, dn)
+        outIF = route is not None and route.ifname or None
+        bits = _bitsByFamily[afamily]
+        dScope = scopeOf(afamily, dn)
+        dLabel = labelOf(afamily, dn)
+
+        def rank(c):
+            ip, n, plen, ifname, scope, label = c
+            if scope >= dScope:
+                scopeRank = (0, scope)
+            else: scopeRank = (1, -scope)
+            return (n != dn, scopeRank, ifname != outIF, label != dLabel,
+                    -min(commonPrefixLen(n, dn, bits), plen))
+        return min(candidates, key=rank)[0]
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Main
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+if __name__=='__main__':
+    import netif
+    table = RouteTable.fromProc()
+    selector = SourceAddressSelector(table, netif.getifsnapshot())
+    for dest in ['8.8.8.8', '127.0.0.1', '2001:4860:4860::8888', 'fe80::1', '::1']:
+        print dest, table.lookup(dest), selector.select(dest)
+
@@ -0,0 +1,43 @@
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+##~ Copyright (C) 2002-2007  TechGame Networks, LLC.              ##
+##~                                                               ##
+##~ This library is free software; you can redistribute it        ##
+##~ and/or modify it under the terms of the BSD style License as  ##
+##~ found in the LICENSE file included with this distribution.    ##
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+
+"""Shared setup for the tests, which are run from this directory with::
+
+    python -m unittest discover -s tests
+
+The package modules import each other by plain module name, so the package
+directory itself is put on the path and its modules imported directly.
+"""
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Imports
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+import os
+import sys
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Definitions
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+testsDir = os.path.dirname(os.path.abspath(__file__))
+packageDir = os.path.dirname(testsDir)
+fixturesDir = os.path.join(testsDir, 'fixtures')
+
+if packageDir not in sys.path:
+    sys.path.insert(0, packageDir)
+
+def fixturePath(*parts):
+    return os.path.join(fixturesDir, *parts)
+
+def openFixture(*parts):
+    return open(fixturePath(*parts), 'rb')
+
+def readFixture(*parts):
+    with openFixture(*parts) as f:
+        return f.read()
@@ -0,0 +1,77 @@
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+##~ Copyright (C) 2002-2007  TechGame Networks, LLC.              ##
+##~                                                               ##
+##~ This library is free software; you can redistribute it        ##
+##~ and/or modify it under the terms of the BSD style License as  ##
+##~ found in the LICENSE file included with this distribution.    ##
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Imports
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+import os
+import sys
+import random
+import StringIO
+import unittest
+
+import support
+import footprint
+from ip import asIP, IPNetv4
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Definitions
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class TestBudgets(unittest.TestCase):
+    count = 2000
+
+    def assertUnderBudget(self, name, items):
+        perItem = footprint.measure(items).perItem(len(items))
+        self.assertTrue(perItem <= footprint.budgets[name],
+                '%s: %.1f bytes per item, budget %d' % (name, perItem, footprint.budgets[name]))
+
+    def testIPv4(self):
+        items = [asIP('10.%d.%d.%d' % tuple(random.randrange(256) for j in xrange(3)))
+                    for i in xrange(self.count)]
+        self.assertUnderBudget('parsed IPv4 addresses', items)
+
+    def testIPNetv4(self):
+        items = [IPNetv4.fromNumber(random.getrandbits(32), 24) for i in xrange(self.count)]
+        self.assertUnderBudget('IPNetv4 list', items)
+
+class TestMeasure(unittest.TestCase):
+    def testSharedCountedOnce(self):
+        shared = 'x' * 100
+        result = footprint.measure([shared, shared])
+        self.assertEqual(result.objects, 2)
+        self.assertEqual(result.byType['str'], (1, sys.getsizeof(shared)))
+
+    def testExclude(self):
+        shared = ['x' * 100]
+        outer = [shared]
+        self.assertEqual(footprint.sizeOf(outer, exclude=[id(shared)]), sys.getsizeof(outer))
+
+class TestRunWorkload(unittest.TestCase):
+    def testChildProcess(self):
+        if not hasattr(os, 'fork'):
+            return self.skipTest('needs fork')
+        # a closure is fine; forked children do not pickle the workload
+        count = 1000
+        stdout, sys.stdout = sys.stdout, StringIO.StringIO()
+        try:
+            stats = footprint.runWorkload('ints', count, lambda: range(count), 1)
+        finally:
+            sys.stdout = stdout
+        self.assertEqual(stats.count, count)
+        self.assertTrue(stats.rssAfter >= stats.rssBefore)
+        self.assertTrue(stats.footprint.total > count)
+        self.assertTrue(stats.isOverBudget())
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Main
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+if __name__=='__main__':
+    unittest.main()
@@ -0,0 +1,202 @@
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+##~ Copyright (C) 2002-2007  TechGame Networks, LLC.              ##
+##~                                                               ##
+##~ This library is free software; you can redistribute it        ##
+##~ and/or modify it under the terms of the BSD style License as  ##
+##~ found in the LICENSE file included with this distribution.    ##
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Imports
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+import struct
+import unittest
+
+import support
+import ifexport
+from ip import asIPNet
+from ifflags import IFFlags
+from ifsnapshot import IFSnapshot
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Definitions
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+_fixed = {'\xc0': None, '\xc2': False, '\xc3': True}
+_ints = {
+    0xcc: '>B', 0xcd: '>H', 0xce: '>L', 0xcf: '>Q',
+    0xd0: '>b', 0xd1: '>h', 0xd2: '>l', 0xd3: '>q', 0xcb: '>d'}
+_lengths = {
+    0xd9: ('>B', 'str'), 0xda: ('>H', 'str'), 0xdb: ('>L', 'str'),
+    0xc4: ('>B', 'bin'), 0xc5: ('>H', 'bin'), 0xc6: ('>L', 'bin'),
+    0xdc: ('>H', 'array'), 0xdd: ('>L', 'array'),
+    0xde: ('>H', 'map'), 0xdf: ('>L', 'map')}
+
+def _decode(data, i=0):
+    """Just enough of a msgpack decoder to read what the exporter writes"""
+    if data[i] in _fixed:
+        return _fixed[data[i]], i+1
+
+    code = ord(data[i]); i += 1
+    if code < 0x80: return code, i
+    if code >= 0xe0: return code - 0x100, i
+    if code in _ints:
+        fmt = _ints[code]
+        return struct.unpack_from(fmt, data, i)[0], i + struct.calcsize(fmt)
+
+    if 0xa0 <= code < 0xc0: n, kind = code & 0x1f, 'str'
+    elif 0x90 <= code < 0xa0: n, kind = code & 0x0f, 'array'
+    elif 0x80 <= code < 0x90: n, kind = code & 0x0f, 'map'
+    elif code in _lengths:
+        fmt, kind = _lengths[code]
+        n = struct.unpack_from(fmt, data, i)[0]
+        i += struct.calcsize(fmt)
+    else: raise ValueError("Unexpected msgpack code 0x%02x" % (code,))
+
+    if kind == 'str':
+        return data[i:i+n].decode('utf-8'), i+n
+    elif kind == 'bin':
+        return data[i:i+n], i+n
+    elif kind == 'array':
+        result = []
+        for x in xrange(n):
+            each, i = _decode(data, i)
+            result.append(each)
+        return result, i
+    else:
+        result = {}
+        for x in xrange(n):
+            k, i = _decode(data, i)
+            result[k], i = _decode(data, i)
+        return result, i
+
+def unpack(data):
+    if msgpack is not None:
+        return msgpack.unpackb(data, raw=False)
+    obj, i = _decode(data)
+    if i != len(data):
+        raise ValueError("%d trailing bytes" % (len(data) - i,))
+    return obj
+
+def _ifinfo(*interfaces):
+    return [(name, [{'name': name, 'if_index': index, 'desc': '', 'flags': IFFlags(0x43),
+                'addrs': [asIPNet(a) for a in addrs]}])
+            for name, index, addrs in interfaces]
+
+class FallbackEncoderMixin(object):
+    """Forces the hand-written encoder even where msgpack is installed"""
+
+    def setUp(self):
+        self.savedMsgpack = ifexport.msgpack
+        ifexport.msgpack = None
+
+    def tearDown(self):
+        ifexport.msgpack = self.savedMsgpack
+
+    def pack(self, obj):
+        return ifexport.encodeMsgpack(obj)
+
+class TestMsgpackEncoder(FallbackEncoderMixin, unittest.TestCase):
+    def testIntBoundaries(self):
+        fixtures = [
+            (0, '\x00'), (0x7f, '\x7f'), (0x80, '\xcc\x80'),
+            (0xff, '\xcc\xff'), (0x100, '\xcd\x01\x00'),
+            (0x10000, '\xce\x00\x01\x00\x00'),
+            (-1, '\xff'), (-32, '\xe0'), (-33, '\xd0\xdf'),
+            (-128, '\xd0\x80'), (-129, '\xd1\xff\x7f'),
+            (-0x8001, '\xd2\xff\xff\x7f\xff'),
+            ]
+        for n, expected in fixtures:
+            self.assertEqual(self.pack(n), expected, n)
+            self.assertEqual(unpack(expected), n)
+
+    def testStrBoundaries(self):
+        for n, header in [(0, '\xa0'), (31, '\xbf'), (32, '\xd9\x20'),
+                            (255, '\xd9\xff'), (256, '\xda\x01\x00')]:
+            text = u'x' * n
+            data = self.pack(text)
+            self.assertEqual(data, header + 'x' * n, n)
+            self.assertEqual(unpack(data), text)
+
+    def testBinBoundaries(self):
+        for n, header in [(0, '\xc4\x00'), (4, '\xc4\x04'), (255, '\xc4\xff'),
+                            (256, '\xc5\x01\x00')]:
+            raw = '\xc0' * n
+            data = self.pack(raw)
+            self.assertEqual(data, header + raw, n)
+            self.assertEqual(unpack(data), raw)
+
+    def testArrayLengths(self):
+        self.assertEqual(self.pack(range(15)), '\x9f' + ''.join(map(chr, range(15))))
+        data = self.pack(range(16))
+        self.assertEqual(data[:3], '\xdc\x00\x10')
+        self.assertEqual(unpack(data), range(16))
+
+    def testMapLengths(self):
+        small = dict((u'k%d' % i, i) for i in range(15))
+        self.assertEqual(self.pack(small)[0], '\x8f')
+        self.assertEqual(unpack(self.pack(small)), small)
+
+        large = dict((u'k%02d' % i, -i) for i in range(16))
+        data = self.pack(large)
+        self.assertEqual(data[:3], '\xde\x00\x10')
+        self.assertEqual(unpack(data), large)
+
+    def testMixedRecord(self):
+        record = {u't': 1190000000.5, u'full': 1, u'ok': True, u'none': None,
+                    u'addrs': [[2, 4, '\xc0\x00\x02\x02', 24]]}
+        self.assertEqual(unpack(self.pack(record)), record)
+
+class TestSnapshotExporter(FallbackEncoderMixin, unittest.TestCase):
+    def snapshot(self, timestamp, *addrs):
+        return IFSnapshot(_ifinfo(('eth0', 2, addrs)), timestamp)
+
+    def testIncrementalRoundTrip(self):
+        exporter = ifexport.SnapshotExporter(ifexport.FORMAT_MSGPACK, fullEvery=3)
+
+        record = unpack(exporter.export(self.snapshot(1.0, '192.0.2.2/24')))
+        self.assertEqual(record['full'], 1)
+        self.assertEqual(record['t'], 1.0)
+        self.assertEqual(record['ifs'], [[2, u'eth0', 0x43]])
+        self.assertEqual(record['addrs'], [[2, 4, '\xc0\x00\x02\x02', 24]])
+
+        self.assertEqual(exporter.export(self.snapshot(2.0, '192.0.2.2/24')), None)
+
+        record = unpack(exporter.export(self.snapshot(3.0, '192.0.2.2/24', '2001:db8::2/64')))
+        self.assertFalse('full' in record)
+        self.assertEqual(record['t'], 3.0)
+        self.assertEqual(record['ifs+'], [])
+        self.assertEqual(record['ifs-'], [])
+        self.assertEqual(record['addrs+'],
+            [[2, 6, '\x20\x01\x0d\xb8' + '\x00' * 11 + '\x02', 64]])
+        self.assertEqual(record['addrs-'], [])
+
+        # the third export since the last full record triggers another
+        record = unpack(exporter.export(self.snapshot(4.0, '2001:db8::2/64')))
+        self.assertEqual(record['full'], 1)
+        self.assertEqual(len(record['addrs']), 1)
+
+        record = unpack(exporter.export(self.snapshot(5.0)))
+        self.assertFalse('full' in record)
+        self.assertEqual(record['addrs-'],
+            [[2, 6, '\x20\x01\x0d\xb8' + '\x00' * 11 + '\x02', 64]])
+
+    def testResetSendsFull(self):
+        exporter = ifexport.SnapshotExporter(ifexport.FORMAT_MSGPACK)
+        exporter.export(self.snapshot(1.0, '192.0.2.2/24'))
+        exporter.reset()
+        record = unpack(exporter.export(self.snapshot(2.0, '192.0.2.2/24')))
+        self.assertEqual(record['full'], 1)
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Main
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+if __name__=='__main__':
+    unittest.main()
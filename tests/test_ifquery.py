@@ -0,0 +1,60 @@
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+##~ Copyright (C) 2002-2007  TechGame Networks, LLC.              ##
+##~                                                               ##
+##~ This library is free software; you can redistribute it        ##
+##~ and/or modify it under the terms of the BSD style License as  ##
+##~ found in the LICENSE file included with this distribution.    ##
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Imports
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+import unittest
+
+import support
+from ifquery import IFQuery
+from ifflags import IFF_UP, IFF_LOOPBACK
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Definitions
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class TestIFQueryName(unittest.TestCase):
+    def testExactName(self):
+        query = IFQuery(name='eth0')
+        self.assertTrue(query.matchName('eth0'))
+        self.assertFalse(query.matchName('eth1'))
+
+    def testStrNameAgainstUnicodeNames(self):
+        # winxp FriendlyNames are unicode
+        query = IFQuery(name='eth0')
+        self.assertFalse(query.matchName(u'Local Area Connection'))
+        self.assertTrue(query.matchName(u'eth0'))
+
+    def testUnicodeNameAgainstStrNames(self):
+        query = IFQuery(name=u'Local Area Connection')
+        self.assertFalse(query.matchName('eth0'))
+        self.assertTrue(query.matchName('Local Area Connection'))
+
+    def testGlob(self):
+        query = IFQuery(name='eth*')
+        self.assertTrue(query.matchName('eth0'))
+        self.assertTrue(query.matchName(u'eth12'))
+        self.assertFalse(query.matchName('wlan0'))
+
+    def testNoName(self):
+        self.assertTrue(IFQuery().matchName(u'anything'))
+
+    def testFlags(self):
+        query = IFQuery(flags=IFF_UP, notFlags=IFF_LOOPBACK)
+        self.assertTrue(query.matchInterface('eth0', IFF_UP))
+        self.assertFalse(query.matchInterface('eth0', 0))
+        self.assertFalse(query.matchInterface('lo', IFF_UP | IFF_LOOPBACK))
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Main
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+if __name__=='__main__':
+    unittest.main()
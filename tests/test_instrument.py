@@ -0,0 +1,136 @@
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+##~ Copyright (C) 2002-2007  TechGame Networks, LLC.              ##
+##~                                                               ##
+##~ This library is free software; you can redistribute it        ##
+##~ and/or modify it under the terms of the BSD style License as  ##
+##~ found in the LICENSE file included with this distribution.    ##
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Imports
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+import threading
+import unittest
+
+import support
+import instrument
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Definitions
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+@instrument.instrumented('test.double')
+def double(x):
+    return 2*x
+
+class InstrumentTestCase(unittest.TestCase):
+    def setUp(self):
+        instrument.disable()
+        instrument.reset()
+
+    def tearDown(self):
+        instrument.disable()
+        instrument.reset()
+
+class TestRecording(InstrumentTestCase):
+    def testDisabled(self):
+        self.assertEqual(double(2), 4)
+        instrument.count('test.count')
+        self.assertEqual(instrument.asDict(), {})
+
+    def testEnabled(self):
+        instrument.enable()
+        double(2)
+        double(3)
+        instrument.count('test.count', 5)
+        stats = instrument.asDict()
+        self.assertEqual(stats['test.double']['count'], 2)
+        self.assertEqual(stats['test.count']['count'], 5)
+
+    def testListener(self):
+        seen = []
+        listener = lambda *args: seen.append(args[:2])
+        instrument.addListener(listener)
+        try:
+            instrument.enable()
+            instrument.count('test.count')
+        finally:
+            instrument.removeListener(listener)
+        instrument.count('test.count')
+        self.assertEqual(seen, [('test.count', 1)])
+
+class TestProfile(InstrumentTestCase):
+    def testProfile(self):
+        instrument.count('test.before')
+        with instrument.profile() as p:
+            self.assertTrue(instrument.enabled)
+            double(1)
+        self.assertFalse(instrument.enabled)
+        self.assertEqual(p.stats.keys(), ['test.double'])
+        self.assertTrue('test.double' in p.report())
+
+    def testReportBeforeStats(self):
+        self.assertEqual(instrument.Profile().report(), '')
+
+    def testNested(self):
+        with instrument.profile() as outer:
+            with instrument.profile() as inner:
+                double(1)
+            self.assertTrue(instrument.enabled)
+            double(2)
+        self.assertFalse(instrument.enabled)
+        self.assertEqual(inner.stats['test.double']['count'], 1)
+        self.assertEqual(outer.stats['test.double']['count'], 2)
+
+    def testEnableOutlivesProfile(self):
+        with instrument.profile():
+            instrument.enable()
+        self.assertTrue(instrument.enabled)
+        with instrument.profile():
+            instrument.disable()
+            self.assertTrue(instrument.enabled)
+        self.assertFalse(instrument.enabled)
+
+    def testOverlappingThreads(self):
+        # the first thread's block ends while the second's is still running
+        entered, firstDone = threading.Event(), threading.Event()
+        results = {}
+        def second():
+            with instrument.profile():
+                entered.set()
+                firstDone.wait(5)
+                results['enabled'] = instrument.enabled
+        thread = threading.Thread(target=second)
+        with instrument.profile():
+            thread.start()
+            entered.wait(5)
+        firstDone.set()
+        thread.join(5)
+        self.assertEqual(results, {'enabled': True})
+        self.assertFalse(instrument.enabled)
+
+class TestHotPaths(InstrumentTestCase):
+    def testNotWrapped(self):
+        import netif
+        self.assertFalse(hasattr(netif.ifaddrAsIP, '__wrapped__'))
+        try:
+            import posix_netif
+        except (ImportError, OSError):
+            return
+        self.assertFalse(hasattr(posix_netif.ifaddrs.addInterface, '__wrapped__'))
+
+    def testRecordedInline(self):
+        import netif
+        with instrument.profile() as p:
+            ifinfo = netif.queryifinfo()
+        addrCount = sum(len(e['addrs']) for name, entries in ifinfo for e in entries)
+        if addrCount:
+            self.assertEqual(p.stats['netif.ifaddrAsIP']['count'], addrCount)
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Main
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+if __name__=='__main__':
+    unittest.main()
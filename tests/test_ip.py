@@ -0,0 +1,64 @@
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+##~ Copyright (C) 2002-2007  TechGame Networks, LLC.              ##
+##~                                                               ##
+##~ This library is free software; you can redistribute it        ##
+##~ and/or modify it under the terms of the BSD style License as  ##
+##~ found in the LICENSE file included with this distribution.    ##
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Imports
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+import socket
+import unittest
+
+import support
+from ip import ip, ipnet, IPv4, IPv6
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Definitions
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class TestIdentity(unittest.TestCase):
+    def testSameFamily(self):
+        self.assertEqual(ip('10.0.0.1'), ip('10.0.0.1'))
+        self.assertEqual(ip('10.0.0.1'), '10.0.0.1')
+        self.assertEqual(ip('2001:db8::1'), '2001:DB8:0::1')
+        self.assertEqual(hash(ip('2001:db8::1')), hash(IPv6.fromNumber(long(ip('2001:db8::1')))))
+
+    def testFamiliesKeptApart(self):
+        self.assertNotEqual(ip('10.0.0.1'), ip('::10.0.0.1'))
+        self.assertNotEqual(ip('0.0.0.1'), ip('::1'))
+        self.assertEqual(len(set([ip('0.0.0.1'), ip('::1')])), 2)
+        byIP = {ip('0.0.0.1'): 'v4', ip('::1'): 'v6'}
+        self.assertEqual(byIP[IPv4.fromNumber(1)], 'v4')
+        self.assertEqual(byIP[IPv6.fromNumber(1)], 'v6')
+
+    def testDedupAcrossForms(self):
+        # text, packed and number forms of one address hash alike
+        forms = [ip('192.0.2.1'), IPv4.fromPacked('\xc0\x00\x02\x01'), IPv4.fromNumber(0xc0000201)]
+        self.assertEqual(len(set(forms)), 1)
+
+    def testIPNets(self):
+        self.assertNotEqual(ipnet('0.0.0.1/32'), ipnet('::1/128'))
+        self.assertEqual(len(set([ipnet('10.0.0.0/8'), ipnet('10.0.0.0/8')])), 1)
+
+class TestSockaddr(unittest.TestCase):
+    def testSockaddr(self):
+        self.assertEqual(ip('192.0.2.1').sockaddr(80), ('192.0.2.1', 80))
+        self.assertEqual(ip('2001:db8::1').sockaddr(80, flowinfo=5), ('2001:db8::1', 80, 5, 0))
+        self.assertEqual(ipnet('2001:db8::1/64').sockaddr(80, flowinfo=5), ('2001:db8::1', 80, 5, 0))
+
+    def testFlowinfoKeywordOnly(self):
+        # as once forwarded to getaddrinfo
+        self.assertRaises(TypeError, ip('2001:db8::1').sockaddr, 80, socket.SOCK_STREAM)
+        self.assertRaises(TypeError, ipnet('192.0.2.0/24').sockaddr, 80, socket.SOCK_STREAM)
+        self.assertRaises(TypeError, ip('192.0.2.1').sockaddr, 80, socktype=socket.SOCK_STREAM)
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Main
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+if __name__=='__main__':
+    unittest.main()
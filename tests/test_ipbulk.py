@@ -0,0 +1,99 @@
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+##~ Copyright (C) 2002-2007  TechGame Networks, LLC.              ##
+##~                                                               ##
+##~ This library is free software; you can redistribute it        ##
+##~ and/or modify it under the terms of the BSD style License as  ##
+##~ found in the LICENSE file included with this distribution.    ##
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Imports
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+import array
+import random
+import cPickle
+import unittest
+from socket import AF_INET, AF_INET6
+
+import support
+from ip import asIP, IPv4, IPv6
+from ipbulk import AddressArray, splitByFamily, parseTexts, sortColumn
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Definitions
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class TestAddressArray(unittest.TestCase):
+    def testSortV4(self):
+        numbers = [random.getrandbits(32) for i in xrange(5000)]
+        addrs = AddressArray(AF_INET, numbers)
+        self.assertFalse(addrs.isSorted)
+        self.assertEqual(list(addrs.sort()), sorted(numbers))
+        self.assertTrue(addrs.isSorted)
+
+    def testSortV6(self):
+        numbers = [random.getrandbits(128) for i in xrange(5000)]
+        numbers += [numbers[0] | 1, numbers[0] & ~1]
+        addrs = AddressArray(AF_INET6, numbers)
+        self.assertEqual(list(addrs.sort()), sorted(numbers))
+        self.assertTrue(numbers[7] in addrs)
+
+    def testChunkedSort(self):
+        for afamily, bits in ((AF_INET, 32), (AF_INET6, 128)):
+            numbers = [random.getrandbits(bits) for i in xrange(3000)]
+            numbers += numbers[:500]
+            addrs = AddressArray(afamily, numbers)
+            addrs.sort(chunkSize=256)
+            self.assertEqual(list(addrs), sorted(numbers))
+            self.assertEqual(len(addrs.unique()), len(set(numbers)))
+            self.assertEqual(addrs.countDistinct(), len(set(numbers)))
+
+    def testSortColumnInPlace(self):
+        column = array.array('B', [3, 1, 2])
+        self.assertTrue(sortColumn(column) is column)
+        self.assertEqual(list(column), [1, 2, 3])
+        column = [5, 4, 3, 2, 1]
+        self.assertEqual(sortColumn(column, 2), [1, 2, 3, 4, 5])
+
+    def testUniqueAndGroups(self):
+        addrs = AddressArray.fromTexts(['10.0.0.2', '10.0.1.1', '10.0.0.2', '10.0.0.1'])
+        self.assertEqual(addrs.unique().asIPs(), ['10.0.0.1', '10.0.0.2', '10.0.1.1'])
+        self.assertEqual(addrs.countDistinct(), 3)
+        self.assertEqual([(str(n), c) for n, c in addrs.groupByPrefix(24, True)],
+                [('10.0.0.0', 3), ('10.0.1.0', 1)])
+
+    def testFromIPs(self):
+        addrs = AddressArray.fromIPs([asIP('10.0.0.1'), asIP('10.0.0.2')])
+        self.assertEqual(addrs.afamily, AF_INET)
+        self.assertEqual(addrs.asIPs(), ['10.0.0.1', '10.0.0.2'])
+
+    def testFromIPsRejectsMixedFamilies(self):
+        mixed = [asIP('10.0.0.1'), asIP('::1')]
+        self.assertRaises(ValueError, AddressArray.fromIPs, mixed)
+        self.assertRaises(ValueError, AddressArray.fromIPs, mixed[:1], AF_INET6)
+
+    def testSplitByFamily(self):
+        byFamily = splitByFamily([asIP('10.0.0.1'), asIP('::1'), asIP('10.0.0.2')])
+        self.assertEqual(len(byFamily[AF_INET]), 2)
+        self.assertEqual(byFamily[AF_INET6].asIPs(), ['::1'])
+
+    def testParseTexts(self):
+        byFamily = parseTexts(['10.0.0.1', 'junk', 'fe80::1'], strict=False)
+        self.assertEqual(byFamily[AF_INET].asIPs(), ['10.0.0.1'])
+        self.assertEqual(byFamily[AF_INET6].asIPs(), ['fe80::1'])
+        self.assertRaises(ValueError, parseTexts, ['10.0.0.1', 'junk'])
+
+    def testPickle(self):
+        for afamily, bits in ((AF_INET, 32), (AF_INET6, 128)):
+            addrs = AddressArray(afamily, [random.getrandbits(bits) for i in xrange(100)])
+            copy = cPickle.loads(cPickle.dumps(addrs, 2))
+            self.assertEqual(list(copy), list(addrs))
+            self.assertEqual(copy.isSorted, addrs.isSorted)
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Main
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+if __name__=='__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+##~ Copyright (C) 2002-2007  TechGame Networks, LLC.              ##
+##~                                                               ##
+##~ This library is free software; you can redistribute it        ##
+##~ and/or modify it under the terms of the BSD style License as  ##
+##~ found in the LICENSE file included with this distribution.    ##
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Imports
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+import unittest
+
+import support
+from linkaddr import MACAddress, AF_LINK
+from ifflags import IFFlags
+from ifsnapshot import IFSnapshot, addressKey
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Definitions
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class TestMACAddress(unittest.TestCase):
+    def testFromPacked(self):
+        mac = MACAddress.fromPacked('\x02\xfc\x00\x00\x00\x01')
+        self.assertEqual(mac, '02:fc:00:00:00:01')
+        self.assertEqual(mac.byteCount, 6)
+        self.assertEqual(mac.packed(), '\x02\xfc\x00\x00\x00\x01')
+
+    def testFromPackedEmpty(self):
+        # tun, wireguard and ipip links report sll_halen 0
+        self.assertIsNone(MACAddress.fromPacked(''))
+
+    def testZeroLength(self):
+        mac = MACAddress(0, 0)
+        self.assertFalse(mac)
+        self.assertEqual(mac.packed(), '')
+        self.assertEqual(mac.asStr(), '')
+        self.assertEqual(mac.asDotted(), '')
+        self.assertFalse(mac.isMulticast())
+        self.assertFalse(mac.isLocallyAdministered())
+
+    def testPacked(self):
+        for text, packed in [
+                ('01:00:5e:00:00:fb', '\x01\x00\x5e\x00\x00\xfb'),
+                ('02:00:00:ff:fe:00:00:01', '\x02\x00\x00\xff\xfe\x00\x00\x01'),
+                ('00:00:00:01', '\x00\x00\x00\x01'),
+                ('80:00:00:00:00:00:00:00:00:00:00:00:00:00:00:00:00:00:00:01', '\x80' + '\x00' * 18 + '\x01')]:
+            mac = MACAddress(text)
+            self.assertEqual(mac.packed(), packed, text)
+            self.assertEqual(MACAddress.fromPacked(packed), mac)
+
+    def testFirstOctetBits(self):
+        self.assertTrue(MACAddress('01:00:5e:00:00:fb').isMulticast())
+        self.assertFalse(MACAddress('02:fc:00:00:00:01').isMulticast())
+        self.assertTrue(MACAddress('02:fc:00:00:00:01').isLocallyAdministered())
+        self.assertFalse(MACAddress('00:1b:21:00:00:01').isLocallyAdministered())
+
+    def testZeroAddressIsTrue(self):
+        self.assertTrue(MACAddress('00:00:00:00:00:00'))
+
+class TestPosixSockaddr(unittest.TestCase):
+    def setUp(self):
+        try:
+            import posix_netif
+        except (ImportError, OSError, AttributeError):
+            self.skipTest('posix getifaddrs is not available')
+        self.sockaddr = posix_netif.sockaddr
+
+    def testPacketWithoutHardwareAddress(self):
+        # sll_protocol, sll_ifindex, sll_hatype, sll_pkttype, sll_halen, sll_addr
+        data = '\x00\x00' + '\x07\x00\x00\x00' + '\xfe\xff' + '\x00' + '\x00' + '\x00'*8
+        self.assertIsNone(self.sockaddr._packet.im_func(None, data))
+
+    def testPacketWithHardwareAddress(self):
+        data = '\x00\x00' + '\x04\x00\x00\x00' + '\x01\x00' + '\x00' + '\x06' + '\x02\xfc\x00\x00\x00\x01\x00\x00'
+        self.assertEqual(self.sockaddr._packet.im_func(None, data), '02:fc:00:00:00:01')
+
+class TestSnapshotWithoutLinkAddress(unittest.TestCase):
+    def _ifinfo(self, addrs):
+        return [('tun0', [{'name': 'tun0', 'if_index': 9, 'desc': '',
+                    'flags': IFFlags(0x11), 'addrs': addrs}])]
+
+    def testAddressKey(self):
+        self.assertEqual(addressKey(9, MACAddress(0, 0)), (9, AF_LINK, '', None))
+
+    def testDiff(self):
+        old = IFSnapshot(self._ifinfo([MACAddress(0, 0)]))
+        new = IFSnapshot(self._ifinfo([]))
+        diff = new.diffFrom(old)
+        self.assertEqual(diff.removedAddressKeys, [(9, AF_LINK, '', None)])
+
+    def testExport(self):
+        import ifexport
+        snapshot = IFSnapshot(self._ifinfo([MACAddress(0, 0)]))
+        self.assertTrue(ifexport.exportSnapshot(snapshot).endswith('\n'))
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Main
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+if __name__=='__main__':
+    unittest.main()
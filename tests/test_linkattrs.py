@@ -0,0 +1,91 @@
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+##~ Copyright (C) 2002-2007  TechGame Networks, LLC.              ##
+##~                                                               ##
+##~ This library is free software; you can redistribute it        ##
+##~ and/or modify it under the terms of the BSD style License as  ##
+##~ found in the LICENSE file included with this distribution.    ##
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Imports
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+
+import support
+import linkattrs
+import linux_netlink
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Definitions
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+# (name, ifindex, flags, carrier); the down link's carrier is what the
+# kernel reports over netlink, which sysfs refuses to read
+links = [
+    ('eth0', 2, 0x1003, 1),
+    ('eth1', 3, 0x1002, 1),
+    ]
+
+def _attr(rtaType, value):
+    data = struct.pack('=HH', 4 + len(value), rtaType) + value
+    return data + '\0' * (-len(data) % 4)
+
+def _newlink(name, ifindex, flags, carrier):
+    return (linkattrs._ifinfomsg.pack(0, 1, ifindex, flags, 0)
+            + _attr(linkattrs.IFLA_IFNAME, name + '\0')
+            + _attr(linkattrs.IFLA_MTU, struct.pack('=I', 1500))
+            + _attr(linkattrs.IFLA_OPERSTATE, chr(6 if flags & 1 else 2))
+            + _attr(linkattrs.IFLA_CARRIER, chr(carrier)))
+
+class TestDownLinkCarrier(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        for name, ifindex, flags, carrier in links:
+            base = os.path.join(self.root, name)
+            os.mkdir(base)
+            files = {'ifindex': ifindex, 'flags': '0x%x' % flags, 'mtu': 1500,
+                        'operstate': flags & 1 and 'up' or 'down', 'speed': 1000}
+            if flags & 1:
+                files['carrier'] = carrier
+            for fn, value in files.items():
+                with open(os.path.join(base, fn), 'w') as f:
+                    f.write('%s\n' % (value,))
+
+        self.saved = linux_netlink.netlinkDump, linkattrs._sysfsSpeed
+        linux_netlink.netlinkDump = self.netlinkDump
+        linkattrs._sysfsSpeed = self.sysfsSpeed
+
+    def tearDown(self):
+        linux_netlink.netlinkDump, linkattrs._sysfsSpeed = self.saved
+        shutil.rmtree(self.root)
+
+    def netlinkDump(self, msgType, afamily=0):
+        for each in links:
+            yield linux_netlink.RTM_NEWLINK, _newlink(*each)
+
+    def sysfsSpeed(self, name, root=None):
+        return self.saved[1](name, self.root)
+
+    def check(self, result):
+        up, down = result[2], result[3]
+        self.assertEqual((up.carrier, up.speed, up.operstate), (1, 1000, 'up'))
+        self.assertEqual((down.carrier, down.speed, down.operstate), (None, None, 'down'))
+        self.assertEqual(down.mtu, 1500)
+
+    def testNetlink(self):
+        self.check(linkattrs.readNetlinkLinks())
+
+    def testSysfs(self):
+        self.check(linkattrs.readSysfsLinks(self.root))
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Main
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+if __name__=='__main__':
+    unittest.main()
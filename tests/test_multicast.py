@@ -0,0 +1,106 @@
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+##~ Copyright (C) 2002-2007  TechGame Networks, LLC.              ##
+##~                                                               ##
+##~ This library is free software; you can redistribute it        ##
+##~ and/or modify it under the terms of the BSD style License as  ##
+##~ found in the LICENSE file included with this distribution.    ##
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Imports
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+import sys
+import unittest
+from socket import AF_INET, AF_INET6
+
+import support
+from multicast import readProcIGMP, readProcIGMP6, MulticastMembership
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Definitions
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+# /proc/net/igmp prints groups as host order words; the fixture was
+# written on a little endian host
+littleEndianOnly = unittest.skipIf(sys.byteorder != 'little', 'little endian fixture')
+
+def groupsOf(entries):
+    return [(ifindex, ifname, str(group)) for ifindex, ifname, group in entries]
+
+class TestProcParsers(unittest.TestCase):
+    @littleEndianOnly
+    def testIGMP(self):
+        with support.openFixture('proc_net', 'igmp') as igmpFile:
+            entries = groupsOf(readProcIGMP(igmpFile))
+        self.assertEqual(entries, [
+            (1, 'lo', '224.0.0.1'),
+            (4, 'eth0', '224.0.0.251'),
+            (4, 'eth0', '239.255.255.250'),
+            (4, 'eth0', '224.0.0.1'),
+            # names of 10 or more characters run into the colon
+            (7, 'veth0a1b2c', '224.0.0.1'),
+            (7, 'veth0a1b2c', '239.1.2.3'),
+            (9, 'br-0123456789ab', '224.0.0.1'),
+            ])
+
+    def testIGMP6(self):
+        with support.openFixture('proc_net', 'igmp6') as igmp6File:
+            entries = groupsOf(readProcIGMP6(igmp6File))
+        self.assertEqual(entries, [
+            (1, 'lo', 'ff02::1'),
+            (1, 'lo', 'ff01::1'),
+            (4, 'eth0', 'ff02::1'),
+            (4, 'eth0', 'ff02::1:ff00:2'),
+            (4, 'eth0', 'ff02::fb'),
+            (7, 'veth0a1b2c', 'ff02::1'),
+            (9, 'br-0123456789ab', 'ff02::1'),
+            (9, 'br-0123456789ab', 'ff05::1:3'),
+            ])
+
+    def testIGMPHeaderOnly(self):
+        self.assertEqual(list(readProcIGMP(['Idx\tDevice    : Count Querier\tGroup    Users Timer\tReporter\n'])), [])
+
+class TestMulticastMembership(unittest.TestCase):
+    def setUp(self):
+        self.membership = MulticastMembership.fromProc(support.fixturePath('proc_net'))
+
+    @littleEndianOnly
+    def testCounts(self):
+        self.assertEqual(len(self.membership), 15)
+        self.assertEqual(sorted(self.membership.byIndex), [1, 4, 7, 9])
+        self.assertEqual(self.membership.names[7], 'veth0a1b2c')
+
+    @littleEndianOnly
+    def testInterfacesFor(self):
+        self.assertEqual(self.membership.interfacesFor('224.0.0.1'), set([1, 4, 7, 9]))
+        self.assertEqual(self.membership.interfacesFor('239.1.2.3'), set([7]))
+        self.assertEqual(self.membership.interfacesFor('ff02::1'), set([1, 4, 7, 9]))
+        self.assertEqual(self.membership.interfacesFor('ff05::1:3'), set([9]))
+        self.assertEqual(self.membership.interfacesFor('239.9.9.9'), set())
+
+    @littleEndianOnly
+    def testGroupsOf(self):
+        self.assertEqual(sorted(map(str, self.membership.groupsOf(4, AF_INET))),
+                ['224.0.0.1', '224.0.0.251', '239.255.255.250'])
+        self.assertEqual(sorted(map(str, self.membership.groupsOf(9, AF_INET6))),
+                ['ff02::1', 'ff05::1:3'])
+        self.assertEqual(len(self.membership.groupsOf(9)), 3)
+        self.assertEqual(self.membership.groupsOf(99), set())
+
+    @littleEndianOnly
+    def testIsMember(self):
+        self.assertTrue(self.membership.isMember(7, '239.1.2.3'))
+        self.assertFalse(self.membership.isMember(4, '239.1.2.3'))
+        self.assertTrue(self.membership.isMember(4, 'ff02::1:ff00:2'))
+
+    def testMissingProc(self):
+        membership = MulticastMembership.fromProc(support.fixturePath('missing'))
+        self.assertEqual(len(membership), 0)
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Main
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+if __name__=='__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+##~ Copyright (C) 2002-2007  TechGame Networks, LLC.              ##
+##~                                                               ##
+##~ This library is free software; you can redistribute it        ##
+##~ and/or modify it under the terms of the BSD style License as  ##
+##~ found in the LICENSE file included with this distribution.    ##
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Imports
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+import sys
+import unittest
+from socket import AF_INET, AF_INET6
+
+import support
+import linux_netlink
+from ip import asIP
+from linkaddr import MACAddress
+from neighbors import Neighbor, NeighborTable, parseNetlinkNeighbor, readProcArp
+from neighbors import NUD_STALE, NUD_NOARP
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Definitions
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+# netlink headers are in host order; the capture is from a little endian host
+littleEndianOnly = unittest.skipIf(sys.byteorder != 'little', 'little endian capture')
+
+def capturedMessages():
+    """(nlmsg_type, payload) of each message in a captured RTM_GETNEIGH dump"""
+    data = support.readFixture('rtm_newneigh.bin')
+    header = linux_netlink._nlmsghdr
+    offset, result = 0, []
+    while offset + header.size <= len(data):
+        msgLen, msgType = header.unpack_from(data, offset)[:2]
+        result.append((msgType, data[offset + header.size:offset + msgLen]))
+        offset += linux_netlink._align(msgLen)
+    return result
+
+class TestNetlinkNeighbors(unittest.TestCase):
+    @littleEndianOnly
+    def testCapture(self):
+        messages = capturedMessages()
+        self.assertEqual([t for t, payload in messages],
+                [linux_netlink.RTM_NEWNEIGH]*4 + [linux_netlink.NLMSG_DONE])
+
+        neighbors = [parseNetlinkNeighbor(payload) for t, payload in messages[:-1]]
+        self.assertEqual([(n.ifindex, str(n.ip), str(n.mac), n.state) for n in neighbors], [
+            (4, '192.0.2.1', '02:fc:00:00:00:05', NUD_STALE),
+            (1, '0.0.0.0', '00:00:00:00:00:00', NUD_NOARP),
+            (4, 'ff02::1:ff00:1', '33:33:ff:00:00:01', NUD_NOARP),
+            (4, 'ff02::16', '33:33:00:00:00:16', NUD_NOARP),
+            ])
+        self.assertEqual(neighbors[0].ip.afamily, AF_INET)
+        self.assertEqual(neighbors[2].ip.afamily, AF_INET6)
+
+    @littleEndianOnly
+    def testMissingAttributes(self):
+        payload = capturedMessages()[0][1]
+        # the ndmsg alone, without NDA_DST or NDA_LLADDR
+        self.assertEqual(parseNetlinkNeighbor(payload[:12]), None)
+        # an unknown family
+        self.assertEqual(parseNetlinkNeighbor('\x07' + payload[1:]), None)
+
+class TestProcArp(unittest.TestCase):
+    def testIncompleteSkipped(self):
+        lines = [
+            'IP address       HW type     Flags       HW address            Mask     Device\n',
+            '192.0.2.1        0x1         0x2         02:fc:00:00:00:05     *        eth0\n',
+            '192.0.2.9        0x1         0x0         00:00:00:00:00:00     *        eth0\n',
+            ]
+        neighbors = list(readProcArp(lines, {'eth0': 4}.get))
+        self.assertEqual([(n.ifindex, str(n.ip), str(n.mac)) for n in neighbors],
+                [(4, '192.0.2.1', '02:fc:00:00:00:05')])
+
+class TestNeighborTable(unittest.TestCase):
+    def setUp(self):
+        self.table = NeighborTable([
+            Neighbor(4, asIP('192.0.2.1'), MACAddress('02:fc:00:00:00:05')),
+            Neighbor(4, asIP('fe80::fc:ff:fe00:5'), MACAddress('02:fc:00:00:00:05')),
+            Neighbor(5, asIP('192.0.2.1'), MACAddress('02:fc:00:00:00:06')),
+            ])
+
+    def testLookupText(self):
+        self.assertEqual(self.table.macFor(4, '192.0.2.1'), '02:fc:00:00:00:05')
+        self.assertEqual(self.table.macFor(5, '192.0.2.1'), '02:fc:00:00:00:06')
+        self.assertEqual(self.table.macFor(4, 'fe80::fc:ff:fe00:5'), '02:fc:00:00:00:05')
+        self.assertEqual(self.table.macFor(4, 'fe80::fc:ff:fe00:5%eth0'), '02:fc:00:00:00:05')
+        self.assertEqual(self.table.macFor(4, '192.0.2.2'), None)
+        self.assertEqual(self.table.macFor(6, '192.0.2.1'), None)
+
+    def testLookupIP(self):
+        self.assertEqual(self.table.lookup(4, asIP('192.0.2.1')).ifindex, 4)
+        self.assertEqual(self.table.lookup(4, asIP('::ffff:192.0.2.1')), None)
+
+    def testLookupMAC(self):
+        entries = self.table.lookupMAC('02:fc:00:00:00:05')
+        self.assertEqual(sorted(str(n.ip) for n in entries), ['192.0.2.1', 'fe80::fc:ff:fe00:5'])
+
+    def testUpdate(self):
+        changes = self.table.update([
+            Neighbor(4, asIP('192.0.2.1'), MACAddress('02:fc:00:00:00:05')),
+            Neighbor(4, asIP('fe80::fc:ff:fe00:5'), MACAddress('02:fc:00:00:00:05'), NUD_STALE),
+            ])
+        # one state change and one neighbor gone
+        self.assertEqual(changes, 2)
+        self.assertEqual(len(self.table), 2)
+        self.assertEqual(self.table.lookup(4, 'fe80::fc:ff:fe00:5').state, NUD_STALE)
+        self.assertEqual(self.table.lookupMAC('02:fc:00:00:00:06'), [])
+        self.assertEqual(self.table.update(list(self.table)), 0)
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Main
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+if __name__=='__main__':
+    unittest.main()
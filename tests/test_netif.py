@@ -0,0 +1,115 @@
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+##~ Copyright (C) 2002-2007  TechGame Networks, LLC.              ##
+##~                                                               ##
+##~ This library is free software; you can redistribute it        ##
+##~ and/or modify it under the terms of the BSD style License as  ##
+##~ found in the LICENSE file included with this distribution.    ##
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Imports
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+import unittest
+
+import support
+import netif
+from ip import asIP, asIPNet
+from ifflags import IFFlags
+from ifsnapshot import IFSnapshot
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Definitions
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def _ifinfo(*interfaces):
+    return [(name, [{'name': name, 'if_index': index, 'desc': '', 'flags': IFFlags(0x43),
+                'addrs': [asIPNet(a) for a in addrs]}])
+            for name, index, addrs in interfaces]
+
+class TestSnapshotLookups(unittest.TestCase):
+    """Interfaces come and go between queries of a fake platform"""
+
+    def setUp(self):
+        self.queries = 0
+        self.interfaces = [('eth0', 2, ['192.0.2.2/24'])]
+        self.libcCalls = 0
+        self.saved = (netif.queryifsnapshot, netif.platform_if_nametoindex,
+                        netif.platform_if_indextoname, netif.lookupMaxAge,
+                        netif.lookupMissAge)
+        netif.queryifsnapshot = self.queryifsnapshot
+        netif.platform_if_nametoindex = self.if_nametoindex
+        netif.platform_if_indextoname = self.if_indextoname
+        netif.invalidateifsnapshot()
+
+    def tearDown(self):
+        (netif.queryifsnapshot, netif.platform_if_nametoindex,
+            netif.platform_if_indextoname, netif.lookupMaxAge,
+            netif.lookupMissAge) = self.saved
+        netif.invalidateifsnapshot()
+
+    def queryifsnapshot(self, query=None):
+        self.queries += 1
+        return IFSnapshot(_ifinfo(*self.interfaces))
+
+    def if_nametoindex(self, name):
+        self.libcCalls += 1
+        return dict((n, i) for n, i, addrs in self.interfaces).get(name, 0)
+
+    def if_indextoname(self, index):
+        self.libcCalls += 1
+        return dict((i, n) for n, i, addrs in self.interfaces).get(index)
+
+    def age(self, seconds):
+        netif.getifsnapshot().timestamp -= seconds
+
+    def testCached(self):
+        self.assertEqual(netif.getIFIndex('eth0'), 2)
+        self.assertEqual(netif.getIFName(2), 'eth0')
+        self.assertEqual(netif.getIFIndexForIP('192.0.2.2'), 2)
+        self.assertEqual(self.queries, 1)
+
+    def testNameMissesAskLibc(self):
+        self.assertEqual(netif.getIFIndex('eth0'), 2)
+        self.interfaces.append(('eth1', 3, ['198.51.100.1/24']))
+        self.assertEqual(netif.getIFIndex('eth1'), 3)
+        self.assertEqual(netif.getIFName(3), 'eth1')
+        self.assertEqual(netif.getIFIndex(3), 3)
+        self.assertEqual(netif.getIFIndex('wg0'), 0)
+        self.assertEqual(netif.getIFName(7), None)
+        self.assertEqual(self.queries, 1)
+        # libc answers are remembered for the snapshot's lifetime
+        self.assertEqual(self.libcCalls, 3)
+
+    def testAddressMissOnFreshSnapshot(self):
+        self.assertEqual(netif.getIFIndex('eth0'), 2)
+        for i in xrange(5):
+            self.assertEqual(netif.getIFIndexForIP('203.0.113.9'), None)
+        self.assertEqual(self.queries, 1)
+
+    def testAddressMissRefreshesStaleSnapshot(self):
+        self.assertEqual(netif.getIFIndexForIP('192.0.2.2'), 2)
+        self.interfaces.append(('eth1', 3, ['198.51.100.1/24']))
+        self.age(netif.lookupMissAge + 1)
+        self.assertEqual(netif.getIFIndexForIP('198.51.100.1'), 3)
+        self.assertEqual(netif.getIFIndexForIP('203.0.113.9'), None)
+        self.assertEqual(self.queries, 2)
+
+    def testRenumberedAfterMaxAge(self):
+        self.assertEqual(netif.getIFIndex('eth0'), 2)
+        self.interfaces = [('eth0', 5, ['192.0.2.2/24'])]
+        netif.lookupMaxAge = 0
+        self.age(1)
+        self.assertEqual(netif.getIFIndex('eth0'), 5)
+        self.assertEqual(netif.getIFIndexForIP(asIP('192.0.2.2')), 5)
+
+    def testFamilyFilter(self):
+        from socket import AF_INET6
+        self.assertEqual(netif.getIFIndexForIP('192.0.2.2', AF_INET6), None)
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Main
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+if __name__=='__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+##~ Copyright (C) 2002-2007  TechGame Networks, LLC.              ##
+##~                                                               ##
+##~ This library is free software; you can redistribute it        ##
+##~ and/or modify it under the terms of the BSD style License as  ##
+##~ found in the LICENSE file included with this distribution.    ##
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Imports
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+import errno
+import threading
+import unittest
+
+import support
+import netif
+import netns
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Definitions
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class FakeNamespaceProvider(netns.NetNamespaceProvider):
+    """Tracks the namespace of each thread instead of calling setns"""
+
+    def __init__(self, missing=(), stuck=()):
+        self.missing = set(missing)
+        self.stuck = set(stuck)
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.entered = []
+        self.restored = []
+
+    def current(self):
+        return getattr(self.local, 'ns', 'host')
+
+    def listNamespaces(self):
+        return ['blue', 'green', 'red']
+
+    def enter(self, nsPath):
+        if nsPath in self.missing:
+            raise OSError(errno.ENOENT, 'No such file or directory', nsPath)
+        token = self.current()
+        self.local.ns = nsPath
+        with self.lock:
+            self.entered.append((token, nsPath))
+        return token
+
+    def restore(self, token):
+        nsPath = self.current()
+        if nsPath in self.stuck:
+            raise OSError(errno.EPERM, 'Operation not permitted')
+        self.local.ns = token
+        with self.lock:
+            self.restored.append((nsPath, token))
+
+class TestNamespaceSnapshots(unittest.TestCase):
+    def setUp(self):
+        self.provider = provider = FakeNamespaceProvider()
+        self._queryifsnapshot = netif.queryifsnapshot
+        netif.queryifsnapshot = lambda query: (provider.current(), query)
+
+    def tearDown(self):
+        netif.queryifsnapshot = self._queryifsnapshot
+
+    def snapshots(self, namespaces=None, workers=4):
+        return netns.getNamespaceSnapshots(namespaces, 'q', workers, self.provider)
+
+    def testEnterAndRestore(self):
+        result = self.snapshots()
+        self.assertEqual(result, [
+                (ns, ('/run/netns/' + ns, 'q'), None) for ns in ['blue', 'green', 'red']])
+        self.assertEqual(sorted(self.provider.restored),
+                sorted((ns, token) for token, ns in self.provider.entered))
+        for token, ns in self.provider.entered:
+            self.assertEqual(token, 'host')
+
+    def testResolve(self):
+        result = self.snapshots([1234, '/var/run/netns/x'])
+        self.assertEqual([snapshot[0] for ns, snapshot, error in result],
+                ['/proc/1234/ns/net', '/var/run/netns/x'])
+
+    def testEnterFailure(self):
+        self.provider.missing.add('/run/netns/green')
+        result = self.snapshots()
+        self.assertEqual(result[1][:2], ('green', None))
+        self.assertEqual(result[1][2].errno, errno.ENOENT)
+        self.assertEqual(result[0][2], None)
+        self.assertEqual(result[2][2], None)
+        self.assertEqual(len(self.provider.restored), 2)
+
+    def testQueryFailure(self):
+        def fail(query):
+            raise IOError('interrupted')
+        netif.queryifsnapshot = fail
+        result = self.snapshots(['blue'])
+        self.assertEqual(result[0][:2], ('blue', None))
+        self.assertTrue(isinstance(result[0][2], IOError))
+        self.assertEqual(self.provider.restored, [('/run/netns/blue', 'host')])
+
+    def testRestoreFailure(self):
+        self.provider.stuck.add('/run/netns/blue')
+        self.assertRaises(netns.NamespaceRestoreError, self.snapshots, workers=1)
+        # the stranded worker takes no more namespaces
+        self.assertEqual(self.provider.entered, [('host', '/run/netns/blue')])
+
+    def testRestoreFailureErrno(self):
+        self.provider.stuck.add('/run/netns/red')
+        try:
+            self.snapshots(workers=2)
+        except netns.NamespaceRestoreError, e:
+            self.assertEqual(e.errno, errno.EPERM)
+        else: self.fail('NamespaceRestoreError not raised')
+
+    def testEmpty(self):
+        self.assertEqual(self.snapshots([]), [])
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Main
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+if __name__=='__main__':
+    unittest.main()
@@ -0,0 +1,191 @@
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+##~ Copyright (C) 2002-2007  TechGame Networks, LLC.              ##
+##~                                                               ##
+##~ This library is free software; you can redistribute it        ##
+##~ and/or modify it under the terms of the BSD style License as  ##
+##~ found in the LICENSE file included with this distribution.    ##
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Imports
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+import sys
+import unittest
+from socket import AF_INET, AF_INET6
+
+import support
+from ip import ipnet
+from ifsnapshot import IFSnapshot
+from routes import RouteTable, Route, SourceAddressSelector, readIPv4Routes
+from routes import scopeOf, labelOf, SCOPE_LINK, SCOPE_SITE, SCOPE_GLOBAL
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Definitions
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+# /proc/net/route prints network order words in host order; the fixture
+# was captured on a little endian host
+littleEndianOnly = unittest.skipIf(sys.byteorder != 'little', 'little endian fixture')
+
+class TestRouteTable(unittest.TestCase):
+    def setUp(self):
+        self.table = RouteTable.fromProc(support.fixturePath('proc_net'))
+
+    def assertRoute(self, dest, ifname, gateway=None):
+        route = self.table.lookup(dest)
+        self.assertNotEqual(route, None, 'no route to %s' % (dest,))
+        self.assertEqual((route.ifname, route.gatewayIP), (ifname, gateway))
+
+    @littleEndianOnly
+    def testReadIPv4(self):
+        with support.openFixture('proc_net', 'route') as routeFile:
+            routes = list(readIPv4Routes(routeFile))
+        self.assertEqual(len(routes), 9)
+        default = routes[0]
+        self.assertEqual((default.network, default.prefixLen, default.metric), (0, 0, 100))
+        self.assertEqual(default.gatewayIP, '192.0.2.1')
+        self.assertEqual(routes[6].prefixLen, 32)
+        self.assertEqual(routes[1].gateway, None)
+
+    def testLen(self):
+        # reject routes and routes that are not up are left out
+        self.assertEqual(len(self.table), 7 + 8)
+
+    @littleEndianOnly
+    def testIPv4LongestPrefix(self):
+        self.assertRoute('10.1.2.3', 'tun0')
+        self.assertRoute('10.1.9.9', 'wg0')
+        self.assertRoute('10.2.0.1', 'eth0', '192.0.2.254')
+        self.assertRoute('192.0.2.77', 'eth0')
+        self.assertRoute('8.8.8.8', 'eth0', '192.0.2.1')
+
+    @littleEndianOnly
+    def testIPv4Metric(self):
+        self.assertRoute('10.1.2.4', 'wg2')
+
+    @littleEndianOnly
+    def testIPv4SkipsRejectAndDown(self):
+        self.assertRoute('10.9.1.1', 'eth0', '192.0.2.254')
+        self.assertRoute('172.16.1.1', 'eth0', '192.0.2.1')
+
+    def testIPv6LongestPrefix(self):
+        self.assertRoute('::1', 'lo')
+        self.assertRoute('fd00::2', 'eth0')
+        self.assertRoute('fd00::99', 'eth0')
+        self.assertRoute('2001:db8:1::5', 'wg0')
+        self.assertRoute('2001:db8:5::5', 'eth0', 'fd00::fe')
+        self.assertRoute('2001:4860::8888', 'eth0', 'fd00::1')
+
+    def testIPv6SkipsReject(self):
+        self.assertRoute('2001:db8:2::5', 'eth0', 'fd00::fe')
+
+    def testNoRoute(self):
+        table = RouteTable([Route(AF_INET, 10 << 24, 8, 0, 'eth0')])
+        self.assertEqual(table.lookup('192.0.2.1'), None)
+        self.assertEqual(table.lookup('::1'), None)
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class TestScopesAndLabels(unittest.TestCase):
+    def testScope(self):
+        self.assertEqual(scopeOf(AF_INET, 127 << 24 | 1), SCOPE_LINK)
+        self.assertEqual(scopeOf(AF_INET, 0xa9fe0101), SCOPE_LINK)
+        self.assertEqual(scopeOf(AF_INET, 0xc0000202), SCOPE_GLOBAL)
+        self.assertEqual(scopeOf(AF_INET6, 1), SCOPE_LINK)
+        self.assertEqual(scopeOf(AF_INET6, 0xfe80 << 112), SCOPE_LINK)
+        self.assertEqual(scopeOf(AF_INET6, 0xfec0 << 112), SCOPE_SITE)
+        self.assertEqual(scopeOf(AF_INET6, 0xff05 << 112), SCOPE_SITE)
+        self.assertEqual(scopeOf(AF_INET6, 0xfd00 << 112), SCOPE_GLOBAL)
+
+    def testLabel(self):
+        self.assertEqual(labelOf(AF_INET6, 1), 0)
+        self.assertEqual(labelOf(AF_INET, 0xc0000202), 4)
+        self.assertEqual(labelOf(AF_INET6, 0x2002 << 112), 2)
+        self.assertEqual(labelOf(AF_INET6, 0x2001 << 112), 5)
+        self.assertEqual(labelOf(AF_INET6, 0xfd00 << 112), 13)
+        self.assertEqual(labelOf(AF_INET6, 0x20010db8 << 96), 1)
+
+class TestSourceAddressSelector(unittest.TestCase):
+    def setUp(self):
+        self.table = RouteTable([
+            Route(AF_INET, 0, 0, 0xc0000201, 'eth0'),
+            Route(AF_INET6, 0, 0, 0xfd00 << 112 | 1, 'eth0'),
+            Route(AF_INET6, 0xfe80 << 112, 64, 0, 'eth0'),
+            Route(AF_INET6, 0x20010db80001 << 80, 48, 0, 'wg0'),
+            ])
+
+    def selector(self, **addrsByName):
+        ifinfo = []
+        for name, addrs in sorted(addrsByName.items()):
+            ifinfo.append((name, [{'name': name, 'flags': 0, 'addrs': [ipnet(a) for a in addrs]}]))
+        return SourceAddressSelector(self.table, IFSnapshot(ifinfo))
+
+    def testRule1SameAddress(self):
+        selector = self.selector(eth0=['192.0.2.2/24', 'fd00::2/64'], lo=['127.0.0.1/8', '::1/128'])
+        self.assertEqual(selector.select('fd00::2'), 'fd00::2')
+        self.assertEqual(selector.select('127.0.0.1'), '127.0.0.1')
+
+    def testRule2Scope(self):
+        selector = self.selector(eth0=['fe80::2/64', 'fec0::2/64', 'fd00::2/64'])
+        # the smallest scope at least as large as the destination's
+        self.assertEqual(selector.select('fe80::99'), 'fe80::2')
+        self.assertEqual(selector.select('fec0::99'), 'fec0::2')
+        self.assertEqual(selector.select('2001:4860::8888'), 'fd00::2')
+        # and failing that the largest smaller one
+        selector = self.selector(eth0=['fe80::2/64', 'fec0::2/64'])
+        self.assertEqual(selector.select('2001:4860::8888'), 'fec0::2')
+
+    def testRule2BeforeRule5(self):
+        # a link local address on the outgoing interface loses to global scope
+        selector = self.selector(eth0=['fd00::2/64'], wg0=['fe80::1:1/64'])
+        self.assertEqual(selector.select('2001:db8:1::5'), 'fd00::2')
+
+    def testRule5OutgoingInterface(self):
+        selector = self.selector(eth0=['fd00::2/64'], wg0=['fd01::1/64'])
+        self.assertEqual(selector.select('2001:db8:1::5'), 'fd01::1')
+        self.assertEqual(selector.select('2001:db8:5::5'), 'fd00::2')
+
+    def testRule6MatchingLabel(self):
+        # the teredo address shares the longer prefix but not the label
+        selector = self.selector(eth0=['2001:0:53aa::2/32', '2600::2/64'])
+        self.assertEqual(selector.select('2001:db8::5'), '2600::2')
+        self.assertEqual(selector.select('2001:0:1234::5'), '2001:0:53aa::2')
+
+    def testRule8LongestPrefix(self):
+        selector = self.selector(eth0=['2600::2/64', '2001:db8::2/64', '2001:db8:0:1::2/64'])
+        self.assertEqual(selector.select('2001:db8::5'), '2001:db8::2')
+        self.assertEqual(selector.select('2001:db8:0:1::5'), '2001:db8:0:1::2')
+        self.assertEqual(selector.select('2600::5'), '2600::2')
+
+    def testRule8CappedAtPrefixLength(self):
+        # matching bits past the candidate's own prefix do not count
+        selector = self.selector(eth0=['2001:db8::5:2/32', '2001:db8::9/112'])
+        self.assertEqual(selector.select('2001:db8::5:3'), '2001:db8::9')
+
+    def testIPv4(self):
+        selector = self.selector(eth0=['169.254.7.7/16', '192.0.2.2/24'], lo=['127.0.0.1/8'])
+        self.assertEqual(selector.select('8.8.8.8'), '192.0.2.2')
+        self.assertEqual(selector.select('169.254.1.1'), '169.254.7.7')
+
+    def testNoCandidates(self):
+        selector = self.selector(eth0=['192.0.2.2/24'])
+        self.assertEqual(selector.select('2001:db8::5'), None)
+
+    def testCached(self):
+        selector = self.selector(eth0=['192.0.2.2/24'])
+        self.assertTrue(selector.select('8.8.8.8') is selector.select('8.8.8.8'))
+
+    def testCacheBounded(self):
+        selector = self.selector(eth0=['192.0.2.2/24'])
+        selector.maxCacheSize = 16
+        for i in xrange(100):
+            self.assertEqual(selector.select('198.51.100.%d' % (i,)), '192.0.2.2')
+            self.assertTrue(len(selector._cache) <= 16)
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Main
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+if __name__=='__main__':
+    unittest.main()
@@ -0,0 +1,228 @@
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+##~ Copyright (C) 2002-2007  TechGame Networks, LLC.              ##
+##~                                                               ##
+##~ This library is free software; you can redistribute it        ##
+##~ and/or modify it under the terms of the BSD style License as  ##
+##~ found in the LICENSE file included with this distribution.    ##
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Imports
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+import struct
+import socket
+import unittest
+from StringIO import StringIO
+from socket import AF_INET, AF_INET6
+
+import support
+from linkaddr import AF_LINK
+from ifquery import IFQuery
+from ifflags import IFF_UP, IFF_RUNNING, IFF_LOOPBACK, IFF_MULTICAST
+import winxp_adapters
+from winxp_adapters import AdapterAddressesParser, saveCapture, parseCapture
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Definitions
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+# Field offsets of IP_ADAPTER_ADDRESSES and IP_ADAPTER_UNICAST_ADDRESS as
+# the Windows SDK headers lay them out, kept apart from winxp_adapters.Layout
+# so the fixtures check it rather than echo it
+sdkLayouts = {
+    4: dict(
+        adapter=dict(Length=0, IfIndex=4, Next=8, AdapterName=12,
+            FirstUnicastAddress=16, Description=36, FriendlyName=40,
+            PhysicalAddress=44, PhysicalAddressLength=52, Flags=56, Mtu=60,
+            IfType=64, OperStatus=68, Ipv6IfIndex=72, ZoneIndices=76,
+            FirstPrefix=140),
+        adapterSizeXP=144, adapterSizeLH=376,
+        unicast=dict(Length=0, Flags=4, Next=8, AddressPtr=12, AddressLength=16,
+            OnLinkPrefixLength=44),
+        unicastSize=48, baseAddress=0x003a2b00),
+    8: dict(
+        adapter=dict(Length=0, IfIndex=4, Next=8, AdapterName=16,
+            FirstUnicastAddress=24, Description=64, FriendlyName=72,
+            PhysicalAddress=80, PhysicalAddressLength=88, Flags=92, Mtu=96,
+            IfType=100, OperStatus=104, Ipv6IfIndex=108, ZoneIndices=112,
+            FirstPrefix=176),
+        adapterSizeXP=184, adapterSizeLH=448,
+        unicast=dict(Length=0, Flags=4, Next=8, AddressPtr=16, AddressLength=24,
+            OnLinkPrefixLength=56),
+        unicastSize=64, baseAddress=0x000001d4c0a80000),
+    }
+
+class GAABuffer(object):
+    """Builds a GetAdaptersAddresses style buffer for one pointer size"""
+
+    def __init__(self, pointerSize):
+        self.pointerSize = pointerSize
+        self.layout = sdkLayouts[pointerSize]
+        self.base = self.layout['baseAddress']
+        self.data = bytearray()
+        self.ptrCode = {4: '<I', 8: '<Q'}[pointerSize]
+
+    def alloc(self, size):
+        self.data.extend('\0' * (-len(self.data) % 8))
+        offset = len(self.data)
+        self.data.extend('\0' * size)
+        return offset
+
+    def blob(self, value):
+        offset = self.alloc(len(value))
+        self.data[offset:offset+len(value)] = value
+        return self.base + offset
+
+    def put(self, offset, code, value):
+        if code == 'P':
+            code = self.ptrCode
+        struct.pack_into(code, self.data, offset, value)
+
+    def sockaddr(self, text):
+        if ':' in text:
+            packed = socket.inet_pton(AF_INET6, text.split('%')[0])
+            scopeId = '%' in text and int(text.split('%')[1]) or 0
+            return self.blob(struct.pack('<HHI16sI', 23, 0, 0, packed, scopeId)), 28
+        return self.blob(struct.pack('<HH4s8x', 2, 0, socket.inet_aton(text))), 16
+
+    def adapter(self, name, ifIndex, mac='', ifType=6, operStatus=1, flags=0,
+                ipv6IfIndex=None, addrs=(), xp=False):
+        fields = self.layout['adapter']
+        size = self.layout[xp and 'adapterSizeXP' or 'adapterSizeLH']
+        offset = self.alloc(size)
+        self.put(offset + fields['Length'], '<I', size)
+        self.put(offset + fields['IfIndex'], '<I', ifIndex)
+        self.put(offset + fields['AdapterName'], 'P', self.blob('{%08X-GUID}\0' % (ifIndex,)))
+        self.put(offset + fields['Description'], 'P', self.blob((name + ' adapter\0').encode('utf-16-le')))
+        self.put(offset + fields['FriendlyName'], 'P', self.blob((name + '\0').encode('utf-16-le')))
+        macOffset = offset + fields['PhysicalAddress']
+        self.data[macOffset:macOffset+len(mac)] = mac
+        self.put(offset + fields['PhysicalAddressLength'], '<I', len(mac))
+        self.put(offset + fields['Flags'], '<I', flags)
+        self.put(offset + fields['Mtu'], '<I', 1500)
+        self.put(offset + fields['IfType'], '<I', ifType)
+        self.put(offset + fields['OperStatus'], '<I', operStatus)
+        if ipv6IfIndex is None:
+            ipv6IfIndex = ifIndex
+        self.put(offset + fields['Ipv6IfIndex'], '<I', ipv6IfIndex)
+        self.put(offset + fields['FirstPrefix'], 'P', self.base + self.alloc(self.pointerSize * 4))
+
+        link = offset + fields['FirstUnicastAddress']
+        for text, prefixLen in addrs:
+            link = self.unicast(link, text, prefixLen)
+        return offset
+
+    def unicast(self, link, text, prefixLen):
+        fields = self.layout['unicast']
+        offset = self.alloc(self.layout['unicastSize'])
+        self.put(link, 'P', self.base + offset)
+        ptr, length = self.sockaddr(text)
+        self.put(offset + fields['Length'], '<I', self.layout['unicastSize'])
+        self.put(offset + fields['AddressPtr'], 'P', ptr)
+        self.put(offset + fields['AddressLength'], '<i', length)
+        self.put(offset + fields['OnLinkPrefixLength'], '<B', prefixLen)
+        return offset + fields['Next']
+
+    def chain(self, offsets):
+        for offset, nextOffset in zip(offsets, offsets[1:]):
+            self.put(offset + self.layout['adapter']['Next'], 'P', self.base + nextOffset)
+        return str(self.data)
+
+def buildFixture(pointerSize):
+    gaa = GAABuffer(pointerSize)
+    data = gaa.chain([
+        gaa.adapter(u'Ethernet', 12, '\x00\x15\x5d\x01\x02\x03',
+            addrs=[('fe80::215:5dff:fe01:203%12', 64), ('192.0.2.10', 24)]),
+        gaa.adapter(u'Loopback Pseudo-Interface 1', 1, ifType=24,
+            flags=winxp_adapters.IP_ADAPTER_NO_MULTICAST, xp=True,
+            addrs=[('::1', 128), ('127.0.0.1', 8)]),
+        gaa.adapter(u'Teredo Tunneling Pseudo-Interface', 0, '\0' * 8,
+            ipv6IfIndex=14, ifType=131, operStatus=2),
+        ])
+    return data, gaa.base
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class GAAParserTests(object):
+    pointerSize = None
+
+    def setUp(self):
+        self.data, self.base = buildFixture(self.pointerSize)
+        self.parser = AdapterAddressesParser(self.pointerSize)
+
+    def parse(self, query=None):
+        return self.parser.parse(self.data, self.base, query)
+
+    def testLayoutOffsets(self):
+        layout = sdkLayouts[self.pointerSize]
+        for name, offset in layout['adapter'].iteritems():
+            self.assertEqual((name, self.parser.adapter.offsets[name]), (name, offset))
+        self.assertEqual(self.parser.adapter.size, layout['adapterSizeXP'])
+        for name, offset in layout['unicast'].iteritems():
+            self.assertEqual((name, self.parser.unicast.offsets[name]), (name, offset))
+        self.assertEqual(self.parser.unicast.size, layout['unicastSize'])
+
+    def testFirstPrefix(self):
+        rec = self.parser.adapter.unpack(self.data, 0, len(self.data))
+        prefixPtr = rec['FirstPrefix']
+        self.assertTrue(self.base < prefixPtr < self.base + len(self.data))
+        self.assertEqual(rec['Mtu'], 1500)
+        self.assertEqual(rec['ZoneIndices'], (0,) * 16)
+
+    def testInterfaces(self):
+        result = self.parse()
+        self.assertEqual([name for name, info in result],
+                [u'Ethernet', u'Loopback Pseudo-Interface 1', u'Teredo Tunneling Pseudo-Interface'])
+        ethernet, loopback, teredo = [info for name, info in result]
+
+        self.assertEqual(ethernet['if_index'], 12)
+        self.assertEqual(ethernet['adapterName'], '{0000000C-GUID}')
+        self.assertEqual(ethernet['desc'], u'Ethernet adapter')
+        self.assertEqual(ethernet['flags'], IFF_UP | IFF_RUNNING | IFF_MULTICAST)
+        self.assertEqual(loopback['flags'], IFF_UP | IFF_RUNNING | IFF_LOOPBACK)
+        self.assertEqual(teredo['flags'], IFF_MULTICAST)
+        # IfIndex is 0 for IPv6 only interfaces
+        self.assertEqual(teredo['if_index'], 14)
+
+    def testAddresses(self):
+        ethernet, loopback, teredo = [info['addrs'] for name, info in self.parse()]
+        self.assertEqual(ethernet[0], (AF_LINK, '00:15:5d:01:02:03'))
+        afamily, ip, netmask = ethernet[1]
+        self.assertEqual((afamily, ip, netmask.asPrefixLen()), (AF_INET6, 'fe80::215:5dff:fe01:203', 64))
+        self.assertEqual(ip.scopeId, 12)
+        afamily, ip, netmask = ethernet[2]
+        self.assertEqual((afamily, ip, netmask), (AF_INET, '192.0.2.10', '255.255.255.0'))
+
+        self.assertEqual([(a[0], str(a[1]), a[2].asPrefixLen()) for a in loopback],
+                [(AF_INET6, '::1', 128), (AF_INET, '127.0.0.1', 8)])
+        # all zero, but reported with a length
+        self.assertEqual(teredo, [(AF_LINK, '00:00:00:00:00:00:00:00')])
+
+    def testQuery(self):
+        result = self.parse(IFQuery(afamilies=(AF_INET,), notFlags=IFF_LOOPBACK))
+        self.assertEqual([(name, info['addrs']) for name, info in result], [
+                (u'Ethernet', [(AF_INET, '192.0.2.10', '255.255.255.0')]),
+                (u'Teredo Tunneling Pseudo-Interface', [])])
+
+    def testCaptureRoundTrip(self):
+        capture = StringIO()
+        saveCapture(capture, self.data, self.base, self.pointerSize)
+        capture.seek(0)
+        self.assertEqual(parseCapture(capture), self.parse())
+
+    def testPointerOutsideBuffer(self):
+        self.assertRaises(ValueError, self.parser.parse, self.data, self.base + 0x10000)
+
+class TestX86(GAAParserTests, unittest.TestCase):
+    pointerSize = 4
+
+class TestX64(GAAParserTests, unittest.TestCase):
+    pointerSize = 8
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Main
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+if __name__=='__main__':
+    unittest.main()
@@ -98,12 +98,10 @@ def is_multicast(text):
     @rtype: bool
     """
     try:
+        if ':' in text:
+            return ord(ipv6.inet_aton(text)[0]) == 255
         first = ord(ipv4.inet_aton(text)[0])
         return (first >= 224 and first <= 239)
     except:
-        try:
-            first = ord(ipv6.inet_aton(text)[0])
-            return (first == 255)
-        except:
-            raise ValueError
-    
+        raise ValueError
+
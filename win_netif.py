@@ -22,10 +22,7 @@ __all__ = [
 import ctypes
 import socket
 from socket import AF_INET, AF_INET6
-try:
-    from socket import AF_LINK
-except ImportError:
-    AF_LINK = 'mac'
+from linkaddr import AF_LINK, MACAddress
 
 #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 #~ Definitions 
@@ -44,6 +41,8 @@ class IP_ADDR_STRING(ctypes.Structure):
         ]
     def hasValidAddress(self):
         return self.IpAddress != '0.0.0.0' 
+    def matchScope(self, query):
+        return query.matchScope(AF_INET, socket.inet_aton(self.IpAddress))
 
 ctypes.SetPointerType(PIP_ADDR_STRING, IP_ADDR_STRING)
 
@@ -76,9 +75,14 @@ class IP_ADAPTER_INFO(ctypes.Structure):
         ('LeaseExpires', ctypes.c_ulong),
     ]
 
-    def addInterface(self, ifMap):
-        result = {}
+    def addInterface(self, ifMap, query=None):
         ifName = self.AdapterName
+        # GetAdaptersInfo reports no interface flags, so only the name is
+        # checked; a flags filter would otherwise drop every adapter
+        if query is not None and not query.matchName(ifName):
+            return
+
+        result = {}
         ifMap.append((ifName, result))
 
         afamily = AF_INET
@@ -89,13 +93,16 @@ class IP_ADAPTER_INFO(ctypes.Structure):
         result['addrs'] = addrs = []
 
         macAddress = self.Address[:self.AddressLength]
-        if macAddress: 
-            macAddress = ':'.join('%02x'%(x,) for x in macAddress)
+        if macAddress and (query is None or query.matchAddress(AF_LINK)):
+            macAddress = MACAddress.fromPacked(''.join(map(chr, macAddress)))
             addrs.append((AF_LINK, macAddress))
 
+        if query is not None and not query.matchFamily(afamily):
+            return
+
         ipaddr = self.IpAddressList
         while ipaddr:
-            if ipaddr.hasValidAddress():
+            if ipaddr.hasValidAddress() and (query is None or ipaddr.matchScope(query)):
                 #addrs.append((ipaddr.Context, ipaddr.IpAddress, ipaddr.IpMask))
                 addrs.append((afamily, ipaddr.IpAddress, ipaddr.IpMask))
             ipaddr = ipaddr.Next
@@ -116,7 +123,7 @@ def _if_nametoindex(interfaceName):
     raise NotImplementedError()
 platform_if_nametoindex = _if_nametoindex
 
-def win_getifaddrs():
+def win_getifaddrs(query=None):
     bytecount = ctypes.c_ulong(0)
     iph.GetAdaptersInfo(None, ctypes.byref(bytecount))
 
@@ -128,7 +135,7 @@ def win_getifaddrs():
     ifMap = []
     entry = adapterData
     while entry:
-        entry[0].addInterface(ifMap)
+        entry[0].addInterface(ifMap, query)
         entry = entry[0].Next
     return ifMap
 platform_getifaddrs = win_getifaddrs
@@ -0,0 +1,329 @@
+#!/usr/bin/env python
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+##~ Copyright (C) 2002-2007  TechGame Networks, LLC.              ##
+##~                                                               ##
+##~ This library is free software; you can redistribute it        ##
+##~ and/or modify it under the terms of the BSD style License as  ##
+##~ found in the LICENSE file included with this distribution.    ##
+##~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~##
+
+"""Pure parser for the buffer filled in by GetAdaptersAddresses.
+
+The buffer holds a linked list of IP_ADAPTER_ADDRESSES records whose
+pointers all point back into the same buffer, so given the bytes and the
+address the buffer was at, it can be walked with struct.unpack_from on any
+platform.  saveCapture()/loadCapture() keep such snapshots in a file.
+"""
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Imports
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+import struct
+from socket import AF_INET, AF_INET6
+
+from linkaddr import AF_LINK, MACAddress
+from ip import IPv4, IPv6
+from ifflags import *
+import instrument
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Constants / Variables / Etc.
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+# winsock address families, which are what the buffer holds whatever
+# platform it is parsed on
+WS_AF_INET = 2
+WS_AF_INET6 = 23
+
+IF_TYPE_SOFTWARE_LOOPBACK = 24
+IfOperStatusUp = 1
+IP_ADAPTER_NO_MULTICAST = 0x10
+
+def _fields(*names):
+    return [tuple(n.split(':')) for n in names]
+
+_adapterFields = _fields(
+    'Length:I', 'IfIndex:I', 'Next:P', 'AdapterName:P',
+    'FirstUnicastAddress:P', 'FirstAnycastAddress:P',
+    'FirstMulticastAddress:P', 'FirstDnsServerAddress:P',
+    'DnsSuffix:P', 'Description:P', 'FriendlyName:P',
+    'PhysicalAddress:8s', 'PhysicalAddressLength:I',
+    'Flags:I', 'Mtu:I', 'IfType:I', 'OperStatus:I',
+    # XP SP1 and later
+    'Ipv6IfIndex:I', 'ZoneIndices:16I', 'FirstPrefix:P')
+
+_unicastFields = _fields(
+    'Length:I', 'Flags:I', 'Next:P', 'Address:A',
+    'PrefixOrigin:I', 'SuffixOrigin:I', 'DadState:I',
+    'ValidLifetime:I', 'PreferredLifetime:I', 'LeaseLifetime:I',
+    # Vista and later
+    'OnLinkPrefixLength:B')
+
+_ushort = struct.Struct('<H')
+_ulong = struct.Struct('<I')
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Definitions
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class Layout(object):
+    """Little endian struct layout of a C structure for a pointer size.
+
+    Field codes are struct codes, plus 'P' for a pointer and 'A' for an
+    embedded SOCKET_ADDRESS, which unpacks as <name>Ptr and <name>Length.
+    """
+
+    def __init__(self, fields, pointerSize):
+        ptrCode = {4: 'I', 8: 'Q'}[pointerSize]
+        fmt = []
+        # [(name, first value index, value count, end offset)]
+        self.fields = entries = []
+        self.offsets = offsets = {}
+        state = [0, 0, 1]  # offset, value index, struct alignment
+
+        def add(name, code, align):
+            offset, index, structAlign = state
+            pad = -offset % align
+            if pad:
+                fmt.append('%dx' % pad)
+            fmt.append(code)
+            offsets[name] = offset + pad
+            if code.endswith('s'):
+                count = 1
+            else: count = int(code[:-1] or 1)
+            end = offset + pad + struct.calcsize('<' + code)
+            entries.append((name, index, count, end))
+            state[:] = [end, index + count, max(structAlign, align)]
+
+        for name, code in fields:
+            if code == 'A':
+                add(name + 'Ptr', ptrCode, pointerSize)
+                add(name + 'Length', 'i', 4)
+                pad = -state[0] % pointerSize
+                if pad:
+                    fmt.append('%dx' % pad)
+                    state[0] += pad
+                continue
+            if code == 'P':
+                code = ptrCode
+            if code.endswith('s'):
+                align = 1
+            else: align = struct.calcsize('<' + code[-1])
+            add(name, code, align)
+
+        # trailing padding, as sizeof() includes it
+        pad = -state[0] % state[2]
+        if pad:
+            fmt.append('%dx' % pad)
+        self.struct = struct.Struct('<' + ''.join(fmt))
+        self.size = self.struct.size
+
+    def unpack(self, data, offset, length=None):
+        """Returns {name: value} for the record at offset.
+
+        When the record is shorter than the full layout, as with older
+        versions of a structure, only the fields within length are kept.
+        """
+        if length is None or length >= self.size:
+            values = self.struct.unpack_from(data, offset)
+            length = self.size
+        else:
+            raw = data[offset:offset+length].ljust(self.size, '\0')
+            values = self.struct.unpack_from(raw, 0)
+
+        result = {}
+        for name, index, count, end in self.fields:
+            if end > length:
+                break
+            if count == 1:
+                result[name] = values[index]
+            else: result[name] = values[index:index+count]
+        return result
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def adapterIFFlags(operStatus, ifType, adapterFlags):
+    # synthesize posix style ifa_flags from the adapter record
+    flags = 0
+    if operStatus == IfOperStatusUp:
+        flags |= IFF_UP | IFF_RUNNING
+    if ifType == IF_TYPE_SOFTWARE_LOOPBACK:
+        flags |= IFF_LOOPBACK
+    if not (adapterFlags & IP_ADAPTER_NO_MULTICAST):
+        flags |= IFF_MULTICAST
+    return flags
+
+class AdapterAddressesParser(object):
+    def __init__(self, pointerSize=None):
+        if pointerSize is None:
+            pointerSize = struct.calcsize('P')
+        self.pointerSize = pointerSize
+        self.adapter = Layout(_adapterFields, pointerSize)
+        self.unicast = Layout(_unicastFields, pointerSize)
+
+    def parse(self, data, baseAddress, query=None):
+        """Returns the [(name, info)] list winxp_getifaddrs produces for a
+        GetAdaptersAddresses buffer that was located at baseAddress"""
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        elif not isinstance(data, str):
+            data = str(bytearray(data))
+
+        ifMap = []
+        if not data:
+            return ifMap
+
+        offset = 0
+        while offset is not None:
+            length, = _ulong.unpack_from(data, offset)
+            rec = self.adapter.unpack(data, offset, length)
+            self.addInterface(ifMap, data, baseAddress, rec, query)
+            offset = self._offsetOf(data, baseAddress, rec['Next'])
+        return ifMap
+
+    def addInterface(self, ifMap, data, base, rec, query=None):
+        ifName = self._wstring(data, base, rec['FriendlyName'])
+        flags = adapterIFFlags(rec['OperStatus'], rec['IfType'], rec['Flags'])
+        if query is not None and not query.matchInterface(ifName, flags):
+            return
+
+        ifIndex = rec['IfIndex'] or rec.get('Ipv6IfIndex', 0)
+
+        result = {}
+        ifMap.append((ifName, result))
+
+        result['name'] = ifName
+        result['adapterName'] = self._string(data, base, rec['AdapterName'])
+        result['if_index'] = ifIndex
+        result['desc'] = self._wstring(data, base, rec['Description'])
+        result['flags'] = IFFlags(flags)
+        result['adapterFlags'] = rec['Flags']
+        result['addrs'] = addrs = []
+
+        if query is None or query.matchAddress(AF_LINK):
+            macLength = min(rec['PhysicalAddressLength'], 8)
+            if macLength:
+                macAddress = MACAddress.fromPacked(rec['PhysicalAddress'][:macLength])
+                addrs.append((AF_LINK, macAddress))
+
+        offset = self._offsetOf(data, base, rec['FirstUnicastAddress'])
+        while offset is not None:
+            length, = _ulong.unpack_from(data, offset)
+            ua = self.unicast.unpack(data, offset, length)
+            addr = self._sockaddr(data, base, ua['AddressPtr'],
+                        ua['AddressLength'], ua.get('OnLinkPrefixLength', 0), query)
+            if addr is not None:
+                addrs.append(addr)
+            offset = self._offsetOf(data, base, ua['Next'])
+
+    #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    def _offsetOf(self, data, base, ptr):
+        if not ptr:
+            return None
+        offset = ptr - base
+        if not 0 <= offset < len(data):
+            raise ValueError("Pointer %#x is outside of the adapter buffer" % (ptr,))
+        return offset
+
+    def _string(self, data, base, ptr):
+        offset = self._offsetOf(data, base, ptr)
+        if offset is None:
+            return None
+        end = data.find('\0', offset)
+        if end < 0:
+            end = len(data)
+        return data[offset:end]
+
+    def _wstring(self, data, base, ptr):
+        offset = self._offsetOf(data, base, ptr)
+        if offset is None:
+            return None
+        end = data.find('\0\0', offset)
+        while end >= 0 and (end - offset) & 1:
+            end = data.find('\0\0', end + 1)
+        if end < 0:
+            end = len(data)
+        return data[offset:end].decode('utf-16-le')
+
+    def _sockaddr(self, data, base, ptr, length, prefixLen, query=None):
+        offset = self._offsetOf(data, base, ptr)
+        if offset is None:
+            return None
+        wsFamily, = _ushort.unpack_from(data, offset)
+        if wsFamily == WS_AF_INET and length >= 16:
+            afamily, packed = AF_INET, data[offset+4:offset+8]
+            IP = IPv4
+            scopeId = None
+        elif wsFamily == WS_AF_INET6 and length >= 28:
+            afamily, packed = AF_INET6, data[offset+8:offset+24]
+            IP = IPv6
+            scopeId, = _ulong.unpack_from(data, offset+24)
+        else:
+            if instrument.enabled:
+                instrument.count('winxp.unknownFamily')
+            return None
+
+        if query is not None:
+            if not query.matchFamily(afamily) or not query.matchScope(afamily, packed):
+                return None
+        if scopeId:
+            addr = IP.fromPacked(packed, False, scopeId)
+        else: addr = IP.fromPacked(packed)
+        return (afamily, addr, IP.fromPrefixLen(prefixLen))
+
+_parsers = {}
+def parseAdapterAddresses(data, baseAddress, query=None, pointerSize=None):
+    parser = _parsers.get(pointerSize)
+    if parser is None:
+        parser = _parsers[pointerSize] = AdapterAddressesParser(pointerSize)
+    return parser.parse(data, baseAddress, query)
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Captures
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+_captureMagic = 'GAA1'
+_captureHeader = struct.Struct('<4sBxxxQ')
+
+def saveCapture(fileOrPath, data, baseAddress, pointerSize=None):
+    if pointerSize is None:
+        pointerSize = struct.calcsize('P')
+    if isinstance(fileOrPath, basestring):
+        with open(fileOrPath, 'wb') as f:
+            return saveCapture(f, data, baseAddress, pointerSize)
+    fileOrPath.write(_captureHeader.pack(_captureMagic, pointerSize, baseAddress))
+    fileOrPath.write(str(data))
+
+def loadCapture(fileOrPath):
+    """Returns (data, baseAddress, pointerSize) from a saved capture"""
+    if isinstance(fileOrPath, basestring):
+        with open(fileOrPath, 'rb') as f:
+            return loadCapture(f)
+    raw = fileOrPath.read()
+    magic, pointerSize, baseAddress = _captureHeader.unpack_from(raw, 0)
+    if magic != _captureMagic:
+        raise ValueError("Not a GetAdaptersAddresses capture")
+    return raw[_captureHeader.size:], baseAddress, pointerSize
+
+def parseCapture(fileOrPath, query=None):
+    data, baseAddress, pointerSize = loadCapture(fileOrPath)
+    return parseAdapterAddresses(data, baseAddress, query, pointerSize)
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#~ Main
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+if __name__=='__main__':
+    import sys
+    import timeit
+    from pprint import pprint
+
+    for path in sys.argv[1:]:
+        data, baseAddress, pointerSize = loadCapture(path)
+        pprint(parseAdapterAddresses(data, baseAddress, None, pointerSize))
+        n = 1000
+        t = timeit.timeit(lambda: parseAdapterAddresses(data, baseAddress, None, pointerSize), number=n)
+        print '%s: %.1f usec per parse' % (path, 1e6*t/n)
+
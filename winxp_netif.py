@@ -19,249 +19,95 @@ __all__ = [
 #~ Imports 
 #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
-import struct
+import threading
 import ctypes
-import socket
 from socket import AF_INET, AF_INET6
-try:
-    from socket import AF_LINK
-except ImportError:
-    AF_LINK = 'mac'
-
-if hasattr(socket, 'inet_pton'):
-    from socket import inet_pton, inet_ntop
-else:
-    from .utils.inet import inet_pton, inet_ntop
+from linkaddr import AF_LINK
+from instrument import instrumented
+from winxp_adapters import parseAdapterAddresses, saveCapture
 
 #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 #~ Definitions 
 #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
-PSOCKET_ADDRESS = ctypes.POINTER('SOCKET_ADDRESS')
-class SOCKET_ADDRESS(ctypes.Structure):
-    _fields_ = [
-        ('lpSockAddr', ctypes.POINTER(ctypes.c_char)),
-        ('iSockaddrLength', ctypes.c_int), ]
-
-    formats = {
-        }
-
-    def iterAddresses(self, prefixLen=0):
-        bytes = self.lpSockAddr[:self.iSockaddrLength]
-        decode = self.formats.get(ord(bytes[0]))
-        if decode is not None:
-            yield decode(self, bytes, prefixLen)
-        else: print 'no decode for:', ord(bytes[0])
-
-    def decode_AF_INET(self, bytes, prefixLen):
-        afamily, port, addr = struct.unpack('@hH4s8x', bytes)
-        addr = inet_ntop(AF_INET, addr)
-
-        mask = ~((1<<(32-prefixLen)) - 1)
-        mask = struct.pack('!L', mask & 0xffffffff)
-        mask = inet_ntop(AF_INET, mask)
-        return (afamily, addr, mask)
-    formats[AF_INET] = decode_AF_INET
-
-    def decode_AF_INET6(self, bytes, prefixLen):
-        afamily, port, addr = struct.unpack('@hH4x16s4x', bytes)
-        addr = inet_ntop(AF_INET6, addr)
-
-        mask = ~((1L<<(128-prefixLen)) - 1)
-        mask = struct.pack('!QQ', 
-                    (mask>>64) & 0xffffffffffffffff,
-                    (mask>> 0) & 0xffffffffffffffff)
-        mask = inet_ntop(AF_INET6, mask)
-        return (afamily, addr, mask)
-    formats[AF_INET6] = decode_AF_INET6
-
-ctypes.SetPointerType(PSOCKET_ADDRESS, SOCKET_ADDRESS)
-
-def linkedListIterAddresses(self, prefixLen=0):
-    cur = [self]
-    while cur:
-        for addr in cur[0].Address.iterAddresses(prefixLen):
-            yield addr
-        cur = cur[0].Next
-
-
-PIP_ADAPTER_UNICAST_ADDRESS = ctypes.POINTER('IP_ADAPTER_UNICAST_ADDRESS')
-class IP_ADAPTER_UNICAST_ADDRESS(ctypes.Structure):
-    _fields_ = [
-        ('Length', ctypes.c_ulong),
-        ('Flags', ctypes.c_ulong),
-        ('Next', PIP_ADAPTER_UNICAST_ADDRESS),
-        ('Address', SOCKET_ADDRESS),
-        ('PrefixOrigin', ctypes.c_ulong),
-        ('SuffixOrigin', ctypes.c_ulong),
-        ('DadState', ctypes.c_ulong),
-        ('ValidLifetime', ctypes.c_ulong),
-        ('PreferredLifetime', ctypes.c_ulong),
-        ('LeaseLifetime', ctypes.c_ulong),
-        ('OnLinkPrefixLength', ctypes.c_ubyte), ]
-
-    _iterAddresses = linkedListIterAddresses
-    def iterAddresses(self):
-        return self._iterAddresses()
-
-ctypes.SetPointerType(PIP_ADAPTER_UNICAST_ADDRESS, IP_ADAPTER_UNICAST_ADDRESS)
-
-PIP_ADAPTER_ANYCAST_ADDRESS = ctypes.POINTER('IP_ADAPTER_ANYCAST_ADDRESS')
-class IP_ADAPTER_ANYCAST_ADDRESS(ctypes.Structure):
-    _fields_ = [
-        ('Length', ctypes.c_ulong),
-        ('Flags', ctypes.c_ulong),
-        ('Next', PIP_ADAPTER_ANYCAST_ADDRESS),
-        ('Address', SOCKET_ADDRESS),]
-
-    iterAddresses = linkedListIterAddresses
-ctypes.SetPointerType(PIP_ADAPTER_ANYCAST_ADDRESS, IP_ADAPTER_ANYCAST_ADDRESS)
-
-PIP_ADAPTER_MULTICAST_ADDRESS = ctypes.POINTER('PIP_ADAPTER_MULTICAST_ADDRESS')
-class IP_ADAPTER_MULTICAST_ADDRESS(ctypes.Structure):
-    _fields_ = [
-        ('Length', ctypes.c_ulong),
-        ('Flags', ctypes.c_ulong),
-        ('Next', PIP_ADAPTER_MULTICAST_ADDRESS),
-        ('Address', SOCKET_ADDRESS),]
-
-    iterAddresses = linkedListIterAddresses
-ctypes.SetPointerType(PIP_ADAPTER_MULTICAST_ADDRESS, IP_ADAPTER_MULTICAST_ADDRESS)
-
-PIP_ADAPTER_DNS_SERVER_ADDRESS = ctypes.POINTER('IP_ADAPTER_DNS_SERVER_ADDRESS')
-class IP_ADAPTER_DNS_SERVER_ADDRESS(ctypes.Structure):
-    _fields_ = [
-        ('Length', ctypes.c_ulong),
-        ('Reserved', ctypes.c_ulong),
-        ('Next', PIP_ADAPTER_DNS_SERVER_ADDRESS),
-        ('Address', SOCKET_ADDRESS),]
-
-    iterAddresses = linkedListIterAddresses
-ctypes.SetPointerType(PIP_ADAPTER_DNS_SERVER_ADDRESS, IP_ADAPTER_DNS_SERVER_ADDRESS)
-
-PIP_ADAPTER_PREFIX = ctypes.POINTER('IP_ADAPTER_PREFIX')
-class IP_ADAPTER_PREFIX(ctypes.Structure):
-    _fields_ = [
-        ('Length', ctypes.c_ulong),
-        ('Flags', ctypes.c_ulong),
-        ('Next', PIP_ADAPTER_PREFIX),
-        ('Address', SOCKET_ADDRESS),
-        ('PrefixLength', ctypes.c_ulong),]
-
-    iterAddresses = linkedListIterAddresses
-ctypes.SetPointerType(PIP_ADAPTER_PREFIX, IP_ADAPTER_PREFIX)
-
-PIP_ADAPTER_ADDRESSES = ctypes.POINTER('IP_ADAPTER_ADDRESSES')
-class IP_ADAPTER_ADDRESSES(ctypes.Structure):
-    MAX_ADAPTER_ADDRESS_LENGTH = 8
-
-    _fields_ = [
-        ('Length', ctypes.c_ulong),
-        ('IfIndex', ctypes.c_ulong),
-        ('Next', PIP_ADAPTER_ADDRESSES),
-        ('AdapterName', ctypes.c_char_p),
-
-        ('FirstUnicastAddress', PIP_ADAPTER_UNICAST_ADDRESS),
-        ('FirstAnycastAddress', PIP_ADAPTER_ANYCAST_ADDRESS),
-        ('FirstMulticastAddress', PIP_ADAPTER_MULTICAST_ADDRESS),
-        ('FirstDnsServerAddress', PIP_ADAPTER_DNS_SERVER_ADDRESS),
-
-        ('DnsSuffix', ctypes.c_wchar_p),
-        ('Description', ctypes.c_wchar_p),
-        ('FriendlyName', ctypes.c_wchar_p),
-
-        ('PhysicalAddress', ctypes.c_ubyte*MAX_ADAPTER_ADDRESS_LENGTH),
-        ('PhysicalAddressLength', ctypes.c_ulong),
-
-        ('Flags', ctypes.c_ulong),
-        ('Mtu', ctypes.c_ulong),
-
-        ('OperStatus', ctypes.c_ulong),
-
-        # NOTE: SP1 and later
-        ('Ipv6IfIndex', ctypes.c_ulong),
-        ('ZoneIndices', ctypes.c_ulong*16),
-        ('FirstPrefix', PIP_ADAPTER_PREFIX),
-
-        # NOTE: Vista and later
-        ##('TransmitLinkSpeed', ctypes.c_ulonglong),
-        ##('ReceiveLinkSpeed', ctypes.c_ulonglong),
-        ##('FirstWinsServerAddress', PIP_ADAPTER_WINS_SERVER_ADDRESS_LH),
-        ##('FirstGatewayAddress', PIP_ADAPTER_GATEWAY_ADDRESS_LH),
-
-        ##('Ipv4Metric', ctypes.c_ulong),
-        ##('Ipv6Metric', ctypes.c_ulong),
-        ##('Luid', IF_LUID),
-        ##('Dhcpv4Server', SOCKET_ADDRESS),
-        ##('CompartmentId', NET_IF_COMPARTMENT_ID),
-        ##('NetworkGuid', NET_IF_NETWORK_GUID),
-        ##('ConnectionType', ctypes.c_ulong),
-        ##('NetworkGuid', NET_IF_NETWORK_GUID),
-        ##('TunnelType', ctypes.c_ulong),
-        ##('Dhcpv6Server', SOCKET_ADDRESS),
-        ##('Dhcpv6ClientDuid', ctypes.c_ubyte*MAX_DHCPV6_DUID_LENGTH),
-        ##('Dhcpv6ClientDuidLength', ctypes.c_ulong),
-        ##('Dhcpv6Iaid', ctypes.c_ulong),
-
-        # NOTE: Windows Server 208 and later
-        ##('FirstDnsSuffix', PIP_ADAPTER_DNS_SUFFIX), 
-        ]
-
-    def addInterface(self, ifMap):
-        result = {}
-        ifName = self.FriendlyName
-        ifMap.append((ifName, result))
-
-        result['name'] = ifName
-        result['adapterName'] = self.AdapterName
-        result['if_index'] = self.IfIndex
-        result['desc'] = self.Description
-        result['flags'] = self.Flags
-        result['addrs'] = addrs = []
-
-        macAddress = self.PhysicalAddress[:self.PhysicalAddressLength]
-        if macAddress: 
-            macAddress = ':'.join('%02x'%(x,) for x in macAddress)
-            addrs.append((AF_LINK, macAddress))
-
-        addrs.extend(self.iterAddressesOf(self.FirstUnicastAddress))
-
-    def iterAddressesOf(self, addrList):
-        if addrList:
-            return addrList[0].iterAddresses()
-        else: return iter([])
-
-ctypes.SetPointerType(PIP_ADAPTER_ADDRESSES, IP_ADAPTER_ADDRESSES)
+ERROR_SUCCESS = 0
+ERROR_BUFFER_OVERFLOW = 111
+ERROR_NO_DATA = 232
 
 iph = ctypes.windll.iphlpapi
 
+@instrumented('winxp.if_indextoname')
 def _if_indextoname(idx):
     raise NotImplementedError()
 platform_if_indextoname = _if_indextoname
 
+@instrumented('winxp.if_nametoindex')
 def _if_nametoindex(interfaceName):
     raise NotImplementedError()
 platform_if_nametoindex = _if_nametoindex
 
-def winxp_getifaddrs(afamily=0):
-    ifMap = []
-    bytecount = ctypes.c_ulong(0)
-    iph.GetAdaptersAddresses(afamily, 0, None, None, ctypes.byref(bytecount))
-    if 0 == bytecount.value:
-        return ifMap
-
-    count = 1 + bytecount.value/ctypes.sizeof(IP_ADAPTER_ADDRESSES)
-    bytecount.value = count * ctypes.sizeof(IP_ADAPTER_ADDRESSES)
-    adapterData = (IP_ADAPTER_ADDRESSES*count)()
-
-    if 0 != iph.GetAdaptersAddresses(afamily, 0, None, adapterData, ctypes.byref(bytecount)):
-        return ifMap
-
-    entry = adapterData
-    while entry:
-        entry[0].addInterface(ifMap)
-        entry = entry[0].Next
-    return ifMap
+def _queryAddressFamily(query):
+    # let GetAdaptersAddresses do the family filtering when it can
+    if query is not None and len(query.afamilies) == 1:
+        afamily, = query.afamilies
+        if afamily in (AF_INET, AF_INET6):
+            return afamily
+    return 0
+
+class AdapterBuffer(object):
+    """Reusable GetAdaptersAddresses buffer that grows on demand.
+
+    Once it has grown to fit, a refresh is a single GetAdaptersAddresses
+    call into the same allocation.
+    """
+
+    initialSize = 15*1024
+    maxAttempts = 4
+
+    def __init__(self, size=None):
+        self.lock = threading.Lock()
+        self.resize(size or self.initialSize)
+
+    def resize(self, size):
+        self.buffer = ctypes.create_string_buffer(size)
+        self.size = size
+
+    def query(self, afamily=0, flags=0):
+        """Returns (data, baseAddress) for a fresh snapshot of the adapters"""
+        with self.lock:
+            for attempt in xrange(self.maxAttempts):
+                bytecount = ctypes.c_ulong(self.size)
+                err = iph.GetAdaptersAddresses(afamily, flags, None,
+                            self.buffer, ctypes.byref(bytecount))
+                if err == ERROR_SUCCESS:
+                    return self.buffer.raw, ctypes.addressof(self.buffer)
+                elif err == ERROR_NO_DATA:
+                    return '', ctypes.addressof(self.buffer)
+                elif err == ERROR_BUFFER_OVERFLOW:
+                    # the adapter list can grow between calls; leave headroom
+                    self.resize(bytecount.value + bytecount.value/4)
+                else: raise ctypes.WinError(err)
+        raise ctypes.WinError(ERROR_BUFFER_OVERFLOW)
+
+_adapterBuffer = None
+def getAdapterBuffer():
+    global _adapterBuffer
+    if _adapterBuffer is None:
+        _adapterBuffer = AdapterBuffer()
+    return _adapterBuffer
+
+def captureAdapterAddresses(fileOrPath, afamily=0):
+    """Saves the raw GetAdaptersAddresses buffer for parsing elsewhere"""
+    data, baseAddress = getAdapterBuffer().query(afamily)
+    saveCapture(fileOrPath, data, baseAddress)
+
+@instrumented('winxp.getifaddrs')
+def winxp_getifaddrs(afamily=0, query=None):
+    if not afamily:
+        afamily = _queryAddressFamily(query)
+
+    data, baseAddress = getAdapterBuffer().query(afamily)
+    return parseAdapterAddresses(data, baseAddress, query)
 platform_getifaddrs = winxp_getifaddrs
 
 #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~